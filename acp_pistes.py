@@ -0,0 +1,233 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script reprend l'ACP du notebook (`projet_reporting.ipynb`) sur les colonnes numériques des pistes,
+# sans matérialiser la table standardisée : les données nettoyées sont lues par blocs de --taille-bloc
+# lignes et seuls l'effectif, les moyennes et la matrice des co-moments sont conservés
+# (AccumulateurMoments de `statistiques_flux.py`). La matrice de covariance des données standardisées
+# (StandardScaler) s'en déduit exactement : ses valeurs et vecteurs propres donnent les mêmes variances
+# expliquées et composantes que PCA() sur toute la table, avec une mémoire bornée par la taille d'un bloc.
+# Avec --par-playlist, seules les colonnes propres aux playlists sont retenues, une ligne par playlist
+# (les lignes d'une playlist répètent les mêmes valeurs).
+# Avec --projection, un second passage projette chaque bloc sur les deux premières composantes
+# (float32) et écrit les coordonnées dans `alcrowd/acp/projection_acp.parquet`.
+#
+# Utilisation :
+#   python acp_pistes.py [--taille-bloc 1000000] [--par-playlist] [--projection]
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import argparse
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from chargement_donnees import DOSSIER_DONNEES, iterer_donnees_nettoyees
+from statistiques_exploratoire import COLONNES_NUMERIQUES
+from statistiques_flux import AccumulateurMoments
+from rendu_figures import executer_rendus
+from instrumentation import Instrumentation
+
+DOSSIER_ACP = os.path.join(DOSSIER_DONNEES, 'acp')
+
+# Colonnes de l'ACP : les colonnes int64/float64 du CSV nettoyé lu par le notebook, dans le même ordre
+COLONNES_ACP = COLONNES_NUMERIQUES
+# Colonnes propres aux playlists (identiques sur toutes les lignes d'une playlist)
+COLONNES_PLAYLIST = [col for col in COLONNES_ACP if col not in ('pos', 'track_duration_ms')]
+
+#################################################################################################
+
+# Blocs des colonnes de l'ACP. Avec par_playlist, seule la première ligne de chaque playlist est gardée :
+# les lignes d'une playlist sont contiguës, le dernier pid d'un bloc est comparé au début du suivant.
+def iterer_blocs(colonnes, taille_bloc, par_playlist=False, dossier=DOSSIER_DONNEES):
+    dernier_pid = None
+    for bloc in iterer_donnees_nettoyees(colonnes, taille_bloc=taille_bloc, dossier=dossier):
+        if par_playlist:
+            pids = bloc['pid'].to_numpy()
+            precedents = np.concatenate([[dernier_pid if dernier_pid is not None else pids[0] - 1], pids[:-1]])
+            dernier_pid = pids[-1]
+            bloc = bloc[pids != precedents]
+        # PCA() refuse les valeurs manquantes : les lignes incomplètes sont écartées
+        yield bloc.dropna()
+
+#################################################################################################
+
+# Ajustement : moments par blocs, puis décomposition de la covariance des données standardisées
+
+def ajuster_acp(blocs, colonnes):
+    moments = AccumulateurMoments(colonnes)
+    for bloc in blocs:
+        moments.ajouter(bloc)
+    if moments.n < 2:
+        raise ValueError("Il faut au moins deux lignes pour calculer une ACP.")
+
+    # Écarts-types de StandardScaler (ddof = 0, 1 pour une colonne constante)
+    echelle = np.sqrt(np.diag(moments.comoments) / moments.n)
+    echelle[echelle == 0] = 1.0
+    # Covariance (ddof = 1, comme PCA) des colonnes standardisées
+    covariance = moments.comoments / np.outer(echelle, echelle) / (moments.n - 1)
+    valeurs_propres, vecteurs_propres = np.linalg.eigh(covariance)
+    ordre = np.argsort(valeurs_propres)[::-1]
+    variances = np.clip(valeurs_propres[ordre], 0, None)
+    composantes = vecteurs_propres[:, ordre].T
+    # Signes des composantes fixés comme scikit-learn : le coefficient de plus grande valeur absolue est positif
+    signes = np.sign(composantes[np.arange(len(composantes)), np.abs(composantes).argmax(axis=1)])
+    composantes *= signes[:, np.newaxis]
+
+    return {
+        'colonnes': list(colonnes), 'nb_lignes': moments.n, 'moyenne': moments.moyenne.copy(), 'echelle': echelle,
+        'composantes': composantes, 'variance_expliquee': variances,
+        'ratio_variance_expliquee': variances / np.trace(covariance),
+    }
+
+
+# Coordonnées d'un bloc sur les `nb_composantes` premières composantes (float32)
+def projeter_bloc(bloc, acp, nb_composantes=2):
+    valeurs = bloc[acp['colonnes']].to_numpy(dtype=np.float32)
+    centrees = (valeurs - acp['moyenne'].astype(np.float32)) / acp['echelle'].astype(np.float32)
+    return centrees @ acp['composantes'][:nb_composantes].T.astype(np.float32)
+
+
+# Projection bloc par bloc, écrite au fil de l'eau dans un Parquet (pid, PC1, PC2)
+def ecrire_projection(blocs, acp, chemin):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    nb_lignes = 0
+    try:
+        for bloc in blocs:
+            coordonnees = projeter_bloc(bloc, acp)
+            table = pa.table({'pid': bloc['pid'].to_numpy(), 'PC1': coordonnees[:, 0], 'PC2': coordonnees[:, 1]})
+            if writer is None:
+                writer = pq.ParquetWriter(chemin, table.schema)
+            writer.write_table(table)
+            nb_lignes += len(bloc)
+    finally:
+        if writer is not None:
+            writer.close()
+    return nb_lignes
+
+
+# Corrélations entre les colonnes d'origine et les deux premières composantes (cercle des corrélations)
+def correlations_composantes(acp):
+    return acp['composantes'][:2].T * np.sqrt(acp['variance_expliquee'][:2])
+
+
+def tableau_variance(acp):
+    ratios = acp['ratio_variance_expliquee']
+    return pd.DataFrame({
+        'composante': np.arange(1, len(ratios) + 1),
+        'variance_expliquee': acp['variance_expliquee'],
+        'ratio_variance_expliquee': ratios,
+        'ratio_cumule': ratios.cumsum(),
+    })
+
+#################################################################################################
+
+# Figures du notebook : variance expliquée (par composante et cumulée) et cercle des corrélations
+
+def tracer_variance(explained_variance, chemin):
+    cumulative_variance = explained_variance.cumsum()
+    plt.figure(figsize=(10, 4))
+
+    # Variance expliquée par composante
+    plt.subplot(1, 2, 1)
+    plt.plot(range(1, len(explained_variance)+1), explained_variance, marker='o')
+    plt.title("Variance expliquée par composante")
+    plt.xlabel("Composante principale")
+    plt.ylabel("Variance expliquée")
+
+    # Variance cumulée
+    plt.subplot(1, 2, 2)
+    plt.plot(range(1, len(cumulative_variance)+1), cumulative_variance, marker='o', color='green')
+    plt.axhline(0.95, color='red', linestyle='--')
+    plt.title("Variance expliquée cumulée")
+    plt.xlabel("Nombre de composantes")
+    plt.ylabel("Cumul de variance")
+
+    plt.tight_layout()
+    plt.savefig(chemin)
+    plt.close()
+    return f"Variance expliquée sauvegardée : {chemin}"
+
+
+def tracer_cercle(correlations, colonnes, ratios, chemin):
+    plt.figure(figsize=(8, 8))
+    circle = plt.Circle((0, 0), 1, color='gray', fill=False)
+    plt.gca().add_artist(circle)
+
+    for i, (x, y) in enumerate(correlations):
+        plt.arrow(0, 0, x, y, head_width=0.03, head_length=0.03, color='r')
+        plt.text(x * 1.1, y * 1.1, colonnes[i], ha='center', va='center')
+
+    plt.xlim(-1.1, 1.1)
+    plt.ylim(-1.1, 1.1)
+    plt.xlabel(f"PC1 ({ratios[0]*100:.1f}%)")
+    plt.ylabel(f"PC2 ({ratios[1]*100:.1f}%)")
+    plt.axhline(0, color='gray', linestyle='--')
+    plt.axvline(0, color='gray', linestyle='--')
+    plt.title("PCA Correlation Circle")
+    plt.grid()
+    plt.gca().set_aspect('equal', adjustable='box')
+    plt.savefig(chemin)
+    plt.close()
+    return f"Cercle des corrélations sauvegardé : {chemin}"
+
+#################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="ACP des colonnes numériques, ajustée par blocs.")
+    parser.add_argument('--taille-bloc', type=int, default=1_000_000,
+                        help="Nombre de lignes lues par bloc (défaut : 1 000 000).")
+    parser.add_argument('--par-playlist', action='store_true',
+                        help="ACP des seules colonnes des playlists, une ligne par playlist.")
+    parser.add_argument('--projection', action='store_true',
+                        help="Écrire les coordonnées sur PC1 et PC2 de chaque ligne (second passage).")
+    parser.add_argument('--rapport', default=None,
+                        help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+    args = parser.parse_args()
+    instrumentation = Instrumentation('acp_pistes.py', vars(args), args.rapport)
+
+    colonnes = COLONNES_PLAYLIST if args.par_playlist else COLONNES_ACP
+    with instrumentation.etape('ajustement') as etape:
+        acp = ajuster_acp(iterer_blocs(colonnes, args.taille_bloc, args.par_playlist), colonnes)
+        etape['lignes_entree'] = acp['nb_lignes']
+    print(f"ACP ajustée sur {acp['nb_lignes']} {'playlists' if args.par_playlist else 'lignes'} "
+          f"et {len(colonnes)} colonnes.")
+
+    os.makedirs(DOSSIER_ACP, exist_ok=True)
+    variance = tableau_variance(acp)
+    variance.to_csv(os.path.join(DOSSIER_ACP, 'variance_expliquee.csv'), index=False)
+    pd.DataFrame(acp['composantes'], columns=colonnes,
+                 index=[f'PC{i}' for i in range(1, len(colonnes) + 1)]).to_csv(
+        os.path.join(DOSSIER_ACP, 'composantes.csv'))
+    print(variance.to_string(index=False))
+
+    with instrumentation.etape('figures'):
+        ratios = acp['ratio_variance_expliquee']
+        executer_rendus([
+            (tracer_variance, {'explained_variance': ratios,
+                               'chemin': os.path.join(DOSSIER_ACP, 'acp_1_variance_expliquee.png')}),
+            (tracer_cercle, {'correlations': correlations_composantes(acp), 'colonnes': colonnes, 'ratios': ratios,
+                             'chemin': os.path.join(DOSSIER_ACP, 'acp_2_cercle_correlations.png')}),
+        ])
+
+    if args.projection:
+        chemin = os.path.join(DOSSIER_ACP, 'projection_acp.parquet')
+        with instrumentation.etape('projection') as etape:
+            etape['lignes_sortie'] = ecrire_projection(iterer_blocs(colonnes, args.taille_bloc, args.par_playlist),
+                                                       acp, chemin)
+        print(f"Projection sur PC1 et PC2 sauvegardée : {chemin}")
+    instrumentation.terminer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module calcule les statistiques par playlist utilisées par `album_unique_artistes.py` (et les
+# caractéristiques par pid du clustering, `agreger_par_pid`) :
+# Reproduire `df.groupby(['name', 'pid']).agg(...)` (valeurs 'first' et trois 'nunique') sans passer par
+# les hachages/tris de chaînes de pandas.
+# Chaque colonne est réduite à des codes entiers, puis les couples (groupe, code) sont triés une seule
+# fois par colonne : le nombre de valeurs distinctes d'un groupe est le nombre de frontières entre couples.
+#
+# Le résultat est identique à celui du groupby : même ordre (name puis pid), mêmes règles pour les
+# valeurs manquantes (lignes sans nom ignorées, NaN non comptés comme valeur distincte).
+#
+# Le mode approché (`agreger_playlists_approche`) remplace les nombres exacts d'artistes et d'albums par
+# des sketches HyperLogLog (`hyperloglog.py`), un par playlist. Les sketches sont enregistrés par slice
+# dans `alcrowd/sketches_hll/` : seules les slices nouvelles ou modifiées sont relues. Les sketches d'une
+# playlist présente dans plusieurs slices sont ensuite fusionnés, pour une ligne par (name, pid).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import glob
+import numpy as np
+import pandas as pd
+
+from chargement_donnees import DOSSIER_DONNEES, chemin_donnees_nettoyees, charger_donnees_nettoyees
+from hyperloglog import RegistresHyperLogLog, hacher_valeurs, precision_pour_erreur
+from manifeste_slices import VERSION_NETTOYAGE, charger_manifeste
+
+# Colonnes comptées (valeurs distinctes) et colonnes recopiées (première valeur) par playlist
+COLONNES_DISTINCTES = {
+    'artist_name': 'artistes_uniques_reels',
+    'album_name': 'albums_uniques_reels',
+    'track_name': 'tracks_uniques_reels',
+}
+COLONNES_PREMIERES = ['num_albums', 'num_artists', 'num_tracks']
+
+# Colonnes comptées (valeurs distinctes) par pid pour le clustering
+COLONNES_CLUSTERING_DISTINCTES = {
+    'album_name': 'num_albums',
+    'artist_name': 'num_artists',
+}
+
+# Colonnes estimées par sketch en mode approché
+COLONNES_SKETCHES = {
+    'artist_name': 'artistes_uniques_reels',
+    'album_name': 'albums_uniques_reels',
+}
+COLONNES_APPROCHE = ['name', 'pid'] + COLONNES_PREMIERES + list(COLONNES_SKETCHES)
+
+#################################################################################################
+
+# Codes entiers d'une colonne (-1 pour les valeurs manquantes) et valeurs correspondantes.
+# Les catégories (Parquet) fournissent directement leurs codes ; avec trier=True les codes suivent
+# l'ordre des valeurs.
+def coder_colonne(serie, trier=False):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codes = serie.cat.codes.to_numpy()
+        categories = serie.cat.categories
+        if trier and not categories.is_monotonic_increasing:
+            ordre = np.argsort(np.argsort(categories.to_numpy()))
+            codes = np.where(codes >= 0, ordre[np.maximum(codes, 0)], -1)
+            categories = categories.sort_values()
+        return codes.astype(np.int64), categories
+    codes, valeurs = pd.factorize(serie, sort=trier)
+    return codes.astype(np.int64), valeurs
+
+
+# Nombre de valeurs distinctes par groupe, en un tri des couples (groupe, code)
+def compter_distincts(groupes, codes, nb_groupes):
+    presents = (codes >= 0) & (groupes >= 0)
+    nb_codes = int(codes.max()) + 1 if presents.any() else 1
+    couples = np.sort(groupes[presents] * nb_codes + codes[presents])
+    frontieres = np.ones(len(couples), dtype=bool)
+    frontieres[1:] = couples[1:] != couples[:-1]
+    return np.bincount(couples[frontieres] // nb_codes, minlength=nb_groupes)
+
+
+# Première valeur non manquante de chaque groupe (comme 'first' dans un groupby)
+def premieres_valeurs(groupes, serie, nb_groupes, premieres_lignes):
+    valeurs = serie.to_numpy()
+    if not serie.isnull().any():
+        return valeurs[premieres_lignes]
+    lignes = np.flatnonzero(serie.notnull().to_numpy() & (groupes >= 0))
+    groupes_presents, positions = np.unique(groupes[lignes], return_index=True)
+    resultat = np.full(nb_groupes, np.nan)
+    resultat[groupes_presents] = valeurs[lignes[positions]]
+    return resultat
+
+
+# Statistiques par playlist : groupes (name, pid) triés, premières valeurs et nombres de valeurs distinctes
+# (par défaut celles de COLONNES_PREMIERES et COLONNES_DISTINCTES)
+def agreger_playlists(df, colonnes_premieres=COLONNES_PREMIERES, colonnes_distinctes=COLONNES_DISTINCTES):
+    codes_noms, noms = coder_colonne(df['name'], trier=True)
+    pids = df['pid'].to_numpy().astype(np.int64)
+    avec_nom = codes_noms >= 0
+
+    # Identifiant de groupe : rang du couple (code du nom, pid) dans l'ordre trié
+    decalage = int(pids.min()) if len(pids) else 0
+    largeur = int(pids.max()) - decalage + 1 if len(pids) else 1
+    cles = codes_noms * largeur + (pids - decalage)
+    cles_groupes, premieres_lignes, groupes = np.unique(cles[avec_nom], return_index=True, return_inverse=True)
+    nb_groupes = len(cles_groupes)
+    premieres_lignes = np.flatnonzero(avec_nom)[premieres_lignes]
+    groupes_complets = np.full(len(df), -1, dtype=np.int64)
+    groupes_complets[avec_nom] = groupes.reshape(-1)
+
+    colonnes = {}
+    noms_groupes = noms.take(cles_groupes // largeur)
+    if isinstance(df['name'].dtype, pd.CategoricalDtype):
+        colonnes['name'] = pd.Categorical(noms_groupes, categories=df['name'].cat.categories)
+    else:
+        colonnes['name'] = noms_groupes
+    colonnes['pid'] = df['pid'].to_numpy()[premieres_lignes]
+    for col in colonnes_premieres:
+        colonnes[col] = premieres_valeurs(groupes_complets, df[col], nb_groupes, premieres_lignes)
+    for col, nom_sortie in colonnes_distinctes.items():
+        codes, _ = coder_colonne(df[col])
+        colonnes[nom_sortie] = compter_distincts(groupes_complets, codes, nb_groupes)
+
+    return pd.DataFrame(colonnes)
+
+
+# Caractéristiques par playlist du clustering (`clustering_playlists.py`) : équivalent de
+# df.groupby('pid').agg avec 'count' pour track_uri, 'nunique' pour album_name/artist_name et 'first'
+# pour playlist_duration_ms, calculé sur des codes entiers. Le résultat est trié par pid.
+def agreger_par_pid(df):
+    pids, premieres_lignes, groupes = np.unique(df['pid'].to_numpy(), return_index=True, return_inverse=True)
+    groupes = groupes.reshape(-1).astype(np.int64)
+    nb_groupes = len(pids)
+    colonnes = {'pid': pids}
+    colonnes['num_tracks'] = np.bincount(groupes[df['track_uri'].notnull().to_numpy()], minlength=nb_groupes)
+    for col, nom_sortie in COLONNES_CLUSTERING_DISTINCTES.items():
+        codes, _ = coder_colonne(df[col])
+        colonnes[nom_sortie] = compter_distincts(groupes, codes, nb_groupes)
+    colonnes['duration_ms'] = premieres_valeurs(groupes, df['playlist_duration_ms'], nb_groupes, premieres_lignes)
+    return pd.DataFrame(colonnes)
+
+#################################################################################################
+
+# Mode approché : sketches HyperLogLog par playlist, enregistrés par slice
+
+def chemin_sketches_slice(dossier, indice):
+    return os.path.join(dossier, 'sketches_hll', f'slice-{indice:010d}.npz')
+
+
+# Jeton de validité des sketches de chaque slice : empreintes SHA-256 du fichier JSON et des clés des
+# lignes conservées après dédoublonnage (nettoyage incrémental, une partition par slice) ou date du
+# fichier nettoyé (nettoyage complet), plus le nombre de lignes de la slice.
+def jetons_slices(dossier, data_path, lignes_par_slice):
+    empreintes = {}
+    if os.path.isdir(data_path):
+        manifeste = charger_manifeste(os.path.join(dossier, 'manifeste_slices.json'))
+        for nom, entree in manifeste['slices'].items():
+            debut = nom.split('.')[2].split('-')[0]
+            empreintes[int(debut)] = f"v{VERSION_NETTOYAGE}:{entree['sha256']}:{entree.get('cles', '')}"
+    date = f'mtime:{os.stat(data_path).st_mtime_ns}'
+    return {indice: f'{empreintes.get(indice, date)}:{lignes}' for indice, lignes in lignes_par_slice.items()}
+
+
+# Sketches des playlists d'un DataFrame : colonnes de playlist (première valeur) et registres par colonne
+def calculer_sketches(df, precision):
+    pids, premieres_lignes, groupes = np.unique(df['pid'].to_numpy(), return_index=True, return_inverse=True)
+    groupes = groupes.reshape(-1)
+    contenu = {
+        'pid': pids,
+        'name': np.asarray(df['name'].astype(str).to_numpy()[premieres_lignes], dtype=str),
+        'precision': np.array(precision),
+    }
+    for col in COLONNES_PREMIERES:
+        contenu[col] = df[col].to_numpy()[premieres_lignes]
+    for col in COLONNES_SKETCHES:
+        hachages, presentes = hacher_valeurs(df[col])
+        sketch = RegistresHyperLogLog(len(pids), precision)
+        sketch.ajouter(groupes[presentes], hachages[presentes])
+        contenu[f'registres_{col}'] = sketch.registres
+    return contenu
+
+
+def sauvegarder_sketches(contenu, chemin, jeton):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_temporaire = chemin + '.tmp.npz'
+    np.savez(chemin_temporaire, jeton=np.array(jeton), **contenu)
+    os.replace(chemin_temporaire, chemin)
+
+
+# Sketches enregistrés d'une slice, ou None s'ils sont absents, périmés ou d'une autre précision
+def charger_sketches(chemin, jeton, precision):
+    if not os.path.exists(chemin):
+        return None
+    with np.load(chemin) as fichier:
+        if str(fichier['jeton']) != jeton or int(fichier['precision']) != precision:
+            return None
+        return {cle: fichier[cle] for cle in fichier.files if cle != 'jeton'}
+
+
+# Statistiques approchées par playlist et sketches correspondants ({colonne: RegistresHyperLogLog}).
+# Les lignes ne sont relues que pour les slices sans sketches à jour ; sans colonne 'slice'
+# (données lues depuis le CSV), tous les sketches sont recalculés et ne sont pas enregistrés.
+def agreger_playlists_approche(erreur=0.1, dossier=DOSSIER_DONNEES):
+    precision = precision_pour_erreur(erreur)
+    data_path = chemin_donnees_nettoyees(dossier)
+
+    if not data_path.endswith('.parquet'):
+        print("Données CSV sans colonne 'slice' : sketches recalculés sans être enregistrés.")
+        parties = [calculer_sketches(charger_donnees_nettoyees(COLONNES_APPROCHE, dossier), precision)]
+    else:
+        lignes_par_slice = pd.read_parquet(data_path, columns=['slice'])['slice'].value_counts().sort_index()
+        jetons = jetons_slices(dossier, data_path, lignes_par_slice.to_dict())
+        sketches_slices, a_calculer = {}, []
+        for indice in lignes_par_slice.index:
+            contenu = charger_sketches(chemin_sketches_slice(dossier, indice), jetons[indice], precision)
+            if contenu is None:
+                a_calculer.append(int(indice))
+            else:
+                sketches_slices[indice] = contenu
+        print(f"Sketches : {len(sketches_slices)} slice(s) à jour, {len(a_calculer)} à calculer "
+              f"(précision {precision}, {2 ** precision} registres par playlist).")
+
+        if a_calculer:
+            df = charger_donnees_nettoyees(COLONNES_APPROCHE + ['slice'], dossier,
+                                           filtres=[('slice', 'in', a_calculer)])
+            for indice, partie in df.groupby('slice', sort=True):
+                contenu = calculer_sketches(partie, precision)
+                sauvegarder_sketches(contenu, chemin_sketches_slice(dossier, indice), jetons[indice])
+                sketches_slices[indice] = contenu
+
+        # Sketches des slices qui ne figurent plus dans les données
+        presentes = {chemin_sketches_slice(dossier, indice) for indice in lignes_par_slice.index}
+        for chemin in glob.glob(os.path.join(dossier, 'sketches_hll', 'slice-*.npz')):
+            if chemin not in presentes:
+                os.remove(chemin)
+        parties = [sketches_slices[indice] for indice in lignes_par_slice.index]
+
+    colonnes = {cle: np.concatenate([partie[cle] for partie in parties])
+                for cle in ['name', 'pid'] + COLONNES_PREMIERES}
+    lignes = pd.DataFrame(colonnes)
+    registres = {col: RegistresHyperLogLog.concatener(
+        (RegistresHyperLogLog(len(partie['pid']), precision, partie[f'registres_{col}']) for partie in parties),
+        precision) for col in COLONNES_SKETCHES}
+
+    # Une playlist réémise dans plusieurs slices a une ligne de sketches par slice : comme dans le mode exact,
+    # qui groupe la table entière, ces lignes sont regroupées par (name, pid), triées dans le même ordre.
+    # Les registres sont combinés par maximum (union des valeurs) et les colonnes de playlist gardent leur
+    # première valeur non manquante dans l'ordre des slices.
+    ordre = lignes.sort_values(['name', 'pid'], kind='stable').index.to_numpy()
+    lignes = lignes.iloc[ordre].reset_index(drop=True)
+    nouveaux = np.ones(len(lignes), dtype=bool)
+    nouveaux[1:] = ((lignes['name'].to_numpy()[1:] != lignes['name'].to_numpy()[:-1])
+                    | (lignes['pid'].to_numpy()[1:] != lignes['pid'].to_numpy()[:-1]))
+    premieres_lignes = np.flatnonzero(nouveaux)
+    groupes = np.cumsum(nouveaux) - 1
+    nb_groupes = len(premieres_lignes)
+
+    playlists_stats = lignes.iloc[premieres_lignes][['name', 'pid']].reset_index(drop=True)
+    for col in COLONNES_PREMIERES:
+        playlists_stats[col] = premieres_valeurs(groupes, lignes[col], nb_groupes, premieres_lignes)
+    sketches = {}
+    for col, nom_sortie in COLONNES_SKETCHES.items():
+        sketch = registres[col].selectionner(ordre)
+        if nb_groupes < len(lignes):
+            sketch = sketch.regrouper(groupes, nb_groupes)
+        sketches[col] = sketch
+        playlists_stats[nom_sortie] = np.rint(sketch.estimer()).astype(np.int64)
+    return playlists_stats, sketches
+
+
+# Erreur observée du mode approché sur un échantillon de playlists : nombres exacts recalculés à partir
+# des lignes de l'échantillon, par playlist et pour l'union de l'échantillon.
+def comparer_echantillon(playlists_stats, sketches, taille=1000, graine=0, dossier=DOSSIER_DONNEES):
+    rng = np.random.default_rng(graine)
+    lignes = np.sort(rng.choice(len(playlists_stats), size=min(taille, len(playlists_stats)), replace=False))
+    pids = playlists_stats['pid'].to_numpy()[lignes]
+    df = charger_donnees_nettoyees(['name', 'pid'] + COLONNES_PREMIERES + list(COLONNES_DISTINCTES), dossier,
+                                   filtres=[('pid', 'in', pids.tolist())])
+    exact = agreger_playlists(df).set_index('pid')
+
+    mesures = []
+    for col, nom_sortie in COLONNES_SKETCHES.items():
+        approche = playlists_stats[nom_sortie].to_numpy()[lignes]
+        reference = exact[nom_sortie].reindex(pids).to_numpy()
+        erreurs = np.abs(approche - reference) / np.maximum(reference, 1)
+        union = sketches[col].selectionner(lignes).regrouper(np.zeros(len(lignes), dtype=np.int64), 1)
+        union_exacte = df[col].nunique()
+        mesures.append({
+            'colonne': nom_sortie,
+            'erreur_theorique': round(sketches[col].erreur, 4),
+            'erreur_moyenne': round(float(erreurs.mean()), 4),
+            'erreur_p95': round(float(np.quantile(erreurs, 0.95)), 4),
+            'erreur_max': round(float(erreurs.max()), 4),
+            'union_exacte': int(union_exacte),
+            'union_estimee': int(round(union.estimer()[0])),
+            'erreur_union': round(abs(union.estimer()[0] - union_exacte) / max(union_exacte, 1), 4),
+        })
+    return pd.DataFrame(mesures)
@@ -12,77 +12,157 @@
 # Effectuer des tests statistiques pour valider ou réfuter l'hypothèse
 # Créer des visualisations détaillées de l'analyse
 # Générer un rapport complet avec conclusions métier
+#
+# Avec --approximatif, les nombres d'artistes et d'albums uniques sont estimés par des sketches
+# HyperLogLog enregistrés par slice (voir agregation_playlists.py) : une actualisation ne relit que
+# les slices nouvelles ou modifiées. --erreur fixe l'erreur relative visée ; l'erreur observée est
+# mesurée sur un échantillon de --echantillon playlists recalculées exactement.
+#
+# Le test de Wilcoxon est complété par des intervalles de confiance bootstrap (--resamples rééchantillons,
+# niveau --niveau, graine --graine) du ratio moyen, du pourcentage de playlists avec plus d'albums que
+# d'artistes et de deux tailles d'effet (d_z, corrélation rang-bisériale), par catégorie de taille et sur
+# toutes les playlists (`bootstrap_dispersion.py`, catégories traitées en parallèle sur --workers processus).
+#
+# Les figures sont rendues en parallèle (--workers processus, backend Agg) à partir des statistiques
+# calculées ici ; leur code est dans figures_dispersion.py.
+#
+# Les résultats (tables par playlist, test de Wilcoxon, intervalles bootstrap, figures et CSV) sont mis en cache
+# (`cache_resultats.py`) sous une clé dérivée du contenu des données, des sources et des paramètres :
+# une exécution sur des données inchangées les restaure sans recalcul ni rendu. --recalculer force
+# le calcul ; `python cache_resultats.py invalider` vide le cache.
+#
+# Chaque étape est mesurée (`instrumentation.py` : durée, temps CPU, pic RSS, lignes) et un rapport
+# d'exécution JSON est écrit en fin de script (--rapport pour choisir son chemin).
 
 #################################################################################################
 
 # Importation des bibliothèques
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-import warnings
+import argparse
 import os
 
+from chargement_donnees import charger_donnees_nettoyees, chemin_donnees_nettoyees
+from agregation_playlists import agreger_playlists, agreger_playlists_approche, comparer_echantillon
+from statistiques_dispersion import (COLONNES_DISPERSION, categoriser_taille, ajouter_ratios, tester_wilcoxon,
+                                     calculer_resultats, ratio_par_categorie)
+from bootstrap_dispersion import intervalles_bootstrap, formater_intervalles
+from figures_dispersion import configurer_style, taches_technique, taches_dashboards
+from rendu_figures import executer_rendus
+from cache_resultats import CacheResultats, TAILLE_MAX_MO
+from instrumentation import Instrumentation
+
+parser = argparse.ArgumentParser(description="Analyse de la dispersion album/artiste des playlists.")
+parser.add_argument('--approximatif', action='store_true',
+                    help="Estimer les artistes/albums uniques par sketches HyperLogLog.")
+parser.add_argument('--erreur', type=float, default=0.1,
+                    help="Erreur relative visée des sketches (défaut : 0.1).")
+parser.add_argument('--echantillon', type=int, default=1000,
+                    help="Nombre de playlists recalculées exactement pour mesurer l'erreur (défaut : 1000).")
+parser.add_argument('--resamples', type=int, default=2000,
+                    help="Nombre de rééchantillons bootstrap des intervalles de confiance (défaut : 2000).")
+parser.add_argument('--niveau', type=float, default=0.95,
+                    help="Niveau des intervalles de confiance bootstrap (défaut : 0.95).")
+parser.add_argument('--graine', type=int, default=0,
+                    help="Graine aléatoire du bootstrap (défaut : 0).")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Nombre de processus du bootstrap et du rendu des figures "
+                         "(défaut : tous les cœurs ; 1 = séquentiel).")
+parser.add_argument('--recalculer', action='store_true',
+                    help="Ignorer le cache des résultats et remplacer son entrée.")
+parser.add_argument('--taille-cache', type=int, default=TAILLE_MAX_MO,
+                    help=f"Taille maximale du cache des résultats en Mo (défaut : {TAILLE_MAX_MO}).")
+parser.add_argument('--rapport', default=None,
+                    help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+args = parser.parse_args()
+instrumentation = Instrumentation('album_unique_artistes.py', vars(args), args.rapport)
+
 # Configuration pour l'affichage
-warnings.filterwarnings('ignore')
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+configurer_style()
 
 print("Importation des bibliothèques")
 #################################################################################################
 
 # Chargement des données
 base_dir = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(base_dir, 'alcrowd', 'alcrowd_cleaned.csv')
 output_dir = os.path.join(base_dir, 'alcrowd')
 
-if not os.path.exists(data_path):
-    raise FileNotFoundError(f"Le fichier de données nettoyées n'a pas été trouvé : {data_path}\n"
-                            "Pensez à dans un premier temps, exécuter le script de nettoyage des données.")
-
-df = pd.read_csv(data_path)
-print(f"Données chargées depuis '{data_path}'.")
-print(f"Dimensions du dataset : {df.shape[0]} lignes et {df.shape[1]} colonnes")
+# Seules les colonnes utilisées par l'analyse (COLONNES_DISPERSION) sont lues (Parquet si disponible, sinon CSV)
+
+# Modules dont dépendent les résultats : toute modification de l'un d'eux invalide le cache
+MODULES_RESULTATS = ['album_unique_artistes.py', 'agregation_playlists.py', 'chargement_donnees.py',
+                     'schema_donnees.py', 'hyperloglog.py', 'statistiques_dispersion.py', 'bootstrap_dispersion.py',
+                     'figures_dispersion.py']
+parametres = {'approximatif': args.approximatif, 'resamples': args.resamples, 'niveau': args.niveau,
+              'graine': args.graine}
+if args.approximatif:
+    parametres.update(erreur=args.erreur, echantillon=args.echantillon)
+
+with instrumentation.etape('lecture_cache') as etape:
+    cache = CacheResultats(taille_max_mo=args.taille_cache)
+    cle_cache = cache.cle(chemin_donnees_nettoyees(), MODULES_RESULTATS, parametres)
+    en_cache = None if args.recalculer else cache.lire(cle_cache)
+    etape['succes'] = en_cache is not None
+if en_cache is not None:
+    print(f"Résultats trouvés dans le cache (clé {cle_cache[:12]}) : calculs et rendus sautés.")
+
+if not args.approximatif and en_cache is None:
+    with instrumentation.etape('chargement') as etape:
+        df = charger_donnees_nettoyees(COLONNES_DISPERSION)
+        etape['lignes_sortie'] = len(df)
+    print(f"Dimensions du dataset : {df.shape[0]} lignes et {df.shape[1]} colonnes")
 
 #################################################################################################
 
 # Analyse des playlists uniques
 print("\nÉtape 1: Calcul des statistiques par playlist...")
 
-# Grouper par playlist pour obtenir les statistiques uniques
-playlists_stats = df.groupby(['name', 'pid']).agg({
-    'num_albums': 'first',
-    'num_artists': 'first',
-    'num_tracks': 'first',
-    'artist_name': 'nunique',  # Nombre d'artistes uniques réels
-    'album_name': 'nunique',   # Nombre d'albums uniques réels
-    'track_name': 'nunique'    # Nombre de tracks uniques réels
-}).reset_index()
-
-# Renommage des colonnes pour plus de clarté
-playlists_stats.rename(columns={
-    'artist_name': 'artistes_uniques_reels',
-    'album_name': 'albums_uniques_reels',
-    'track_name': 'tracks_uniques_reels'
-}, inplace=True)
-
-# Calculer le ratio albums/artistes
-playlists_stats['ratio_albums_artistes'] = (
-    playlists_stats['albums_uniques_reels'] / 
-    playlists_stats['artistes_uniques_reels']
-)
-
-# Calculer la différence albums - artistes
-playlists_stats['diff_albums_artistes'] = (
-    playlists_stats['albums_uniques_reels'] - 
-    playlists_stats['artistes_uniques_reels']
-)
+if en_cache is not None:
+    playlists_stats = en_cache['tables']['playlists_stats']
+else:
+    with instrumentation.etape('agregation', lignes_entree=None if args.approximatif else len(df)) as etape:
+        if args.approximatif:
+            # Estimations HyperLogLog (artistes et albums uniques uniquement)
+            playlists_stats, sketches = agreger_playlists_approche(erreur=args.erreur)
+        else:
+            # Statistiques uniques par playlist (équivalent de df.groupby(['name', 'pid']).agg avec 'first' pour
+            # num_albums/num_artists/num_tracks et 'nunique' pour artist_name/album_name/track_name),
+            # calculées en un passage sur des codes entiers (voir agregation_playlists.py)
+            playlists_stats = agreger_playlists(df)
+        etape['lignes_sortie'] = len(playlists_stats)
+
+    # Calculer le ratio et la différence albums/artistes
+    ajouter_ratios(playlists_stats)
 
 print(f"Statistiques calculées pour {len(playlists_stats)} playlists uniques.")
 
 #################################################################################################
 
+# Rapport du mode approché : cardinalités par taille de playlist et sur tout le corpus
+# (fusion des sketches des playlists), puis erreur observée sur un échantillon
+if args.approximatif:
+    print("\nÉtape 1b: Cardinalités approchées (HyperLogLog)...")
+    if en_cache is not None:
+        cardinalites = en_cache['tables']['cardinalites']
+        erreurs_echantillon = en_cache['tables']['erreurs_echantillon']
+    else:
+        with instrumentation.etape('cardinalites_approchees', lignes_entree=len(playlists_stats)):
+            tailles = categoriser_taille(playlists_stats['num_tracks'])
+            codes_tailles = tailles.cat.codes.to_numpy()
+            cardinalites = pd.DataFrame(index=list(tailles.cat.categories) + ['Total'])
+            for col, sketch in sketches.items():
+                par_taille = sketch.regrouper(codes_tailles, len(tailles.cat.categories)).estimer()
+                total = sketch.regrouper(np.zeros(len(sketch), dtype=np.int64), 1).estimer()
+                cardinalites[f'{col} distincts (≈)'] = np.rint(np.concatenate([par_taille, total])).astype(np.int64)
+        with instrumentation.etape('erreur_echantillon', lignes_entree=args.echantillon):
+            erreurs_echantillon = comparer_echantillon(playlists_stats, sketches, taille=args.echantillon)
+    print(cardinalites.to_string())
+
+    print(f"\nErreur observée sur un échantillon de {min(args.echantillon, len(playlists_stats))} playlists :")
+    print(erreurs_echantillon.to_string(index=False))
+
+#################################################################################################
+
 # Analyse statistique de l'hypothèse
 print("\nÉtape 2: Test de l'hypothèse de dispersion album/artiste...")
 
@@ -111,342 +191,83 @@ print(f"  - Écart-type : {playlists_stats['artistes_uniques_reels'].std():.2f}"
 print("\n2. TEST DE L'HYPOTHÈSE PRINCIPALE")
 print("-"*50)
 
-# Pourcentage de playlists avec plus d'albums que d'artistes
-plus_albums = (playlists_stats['albums_uniques_reels'] > 
-               playlists_stats['artistes_uniques_reels']).sum()
-pct_plus_albums = (plus_albums / len(playlists_stats)) * 100
-
-print(f"Playlists avec plus d'albums que d'artistes : {plus_albums}/{len(playlists_stats)} ({pct_plus_albums:.1f}%)")
+# Test statistique (test de Wilcoxon pour échantillons appariés) et indicateurs de l'hypothèse
+if en_cache is not None:
+    resultats = en_cache['valeurs']
+else:
+    with instrumentation.etape('test_wilcoxon', lignes_entree=len(playlists_stats)):
+        statistic, p_value = tester_wilcoxon(playlists_stats)
+    resultats = calculer_resultats(playlists_stats, statistic, p_value)
 
-# Test statistique (test de Wilcoxon pour échantillons appariés)
-statistic, p_value = stats.wilcoxon(
-    playlists_stats['albums_uniques_reels'], 
-    playlists_stats['artistes_uniques_reels']
-)
+# Pourcentage de playlists avec plus d'albums que d'artistes
+print(f"Playlists avec plus d'albums que d'artistes : {resultats['plus_albums']}/{len(playlists_stats)} "
+      f"({resultats['pct_plus_albums']:.1f}%)")
 
 print(f"\nTest de Wilcoxon (échantillons appariés) :")
-print(f"  - Statistique : {statistic}")
-print(f"  - p-value : {p_value:.2e}")
-print(f"  - Significatif (α=0.05) : {'Oui' if p_value < 0.05 else 'Non'}")
+print(f"  - Statistique : {resultats['statistique_wilcoxon']}")
+print(f"  - p-value : {resultats['p_value']:.2e}")
+print(f"  - Significatif (α=0.05) : {'Oui' if resultats['p_value'] < 0.05 else 'Non'}")
+
+# Intervalles de confiance bootstrap et tailles d'effet, par catégorie de taille et au total
+if en_cache is not None:
+    intervalles = en_cache['tables']['intervalles_bootstrap']
+else:
+    with instrumentation.etape('bootstrap', lignes_entree=len(playlists_stats)):
+        intervalles = intervalles_bootstrap(playlists_stats, args.resamples, args.niveau, args.graine, args.workers)
+print(f"\n{formater_intervalles(intervalles, args.niveau)}")
+print(f"({args.resamples} rééchantillons ; d_z : différence moyenne / écart-type des différences ; "
+      f"rang_biserial : (W+ - W-) / (W+ + W-))")
 
 #################################################################################################
 
 # Analyse du ratio
 print("\n3. ANALYSE DU RATIO ALBUMS/ARTISTES")
 print("-"*50)
-ratio_moyen = playlists_stats['ratio_albums_artistes'].mean()
-ratio_median = playlists_stats['ratio_albums_artistes'].median()
-
-print(f"Ratio moyen albums/artistes : {ratio_moyen:.3f}")
-print(f"Ratio médian albums/artistes : {ratio_median:.3f}")
+print(f"Ratio moyen albums/artistes : {resultats['ratio_moyen']:.3f}")
+print(f"Ratio médian albums/artistes : {resultats['ratio_median']:.3f}")
 
 # Playlists avec ratio > 1 (plus d'albums que d'artistes)
-ratio_sup_1 = (playlists_stats['ratio_albums_artistes'] > 1).sum()
-pct_ratio_sup_1 = (ratio_sup_1 / len(playlists_stats)) * 100
-
-print(f"Playlists avec ratio > 1 : {ratio_sup_1}/{len(playlists_stats)} ({pct_ratio_sup_1:.1f}%)")
+print(f"Playlists avec ratio > 1 : {resultats['ratio_sup_1']}/{len(playlists_stats)} "
+      f"({resultats['pct_ratio_sup_1']:.1f}%)")
 
 #################################################################################################
 
 # Distribution de la différence
 print("\n4. ANALYSE DE LA DIFFÉRENCE (ALBUMS - ARTISTES)")
 print("-"*50)
-diff_positive = (playlists_stats['diff_albums_artistes'] > 0).sum()
-pct_diff_positive = (diff_positive / len(playlists_stats)) * 100
-
-print(f"Playlists avec différence positive : {diff_positive}/{len(playlists_stats)} ({pct_diff_positive:.1f}%)")
-print(f"Différence moyenne : {playlists_stats['diff_albums_artistes'].mean():.2f}")
-print(f"Différence médiane : {playlists_stats['diff_albums_artistes'].median():.2f}")
-
-# Stockage des résultats pour les visualisations
-resultats = {
-    'pct_plus_albums': pct_plus_albums,
-    'p_value': p_value,
-    'ratio_moyen': ratio_moyen,
-    'ratio_median': ratio_median,
-    'pct_ratio_sup_1': pct_ratio_sup_1
-}
-
-#################################################################################################
-
-# Création des visualisations techniques
-print("\nÉtape 3: Création des visualisations techniques...")
-
-# Configuration de la figure avec espacement optimisé
-fig, axes = plt.subplots(2, 3, figsize=(20, 14))
-fig.suptitle('Analyse de la Dispersion Album/Artiste dans les Playlists', 
-             fontsize=16, fontweight='bold', y=0.98)
-
-# 1. Distribution des albums et artistes uniques
-axes[0, 0].hist(playlists_stats['albums_uniques_reels'], bins=30, alpha=0.7, 
-               label='Albums uniques', color='skyblue')
-axes[0, 0].hist(playlists_stats['artistes_uniques_reels'], bins=30, alpha=0.7, 
-               label='Artistes uniques', color='lightcoral')
-axes[0, 0].set_xlabel('Nombre')
-axes[0, 0].set_ylabel('Fréquence')
-axes[0, 0].set_title('Distribution Albums vs Artistes Uniques')
-axes[0, 0].legend()
-axes[0, 0].grid(True, alpha=0.3)
-
-# 2. Scatter plot Albums vs Artistes
-axes[0, 1].scatter(playlists_stats['artistes_uniques_reels'], 
-                  playlists_stats['albums_uniques_reels'], 
-                  alpha=0.6, s=30)
-# Ligne y=x pour référence
-max_val = max(playlists_stats['artistes_uniques_reels'].max(), 
-              playlists_stats['albums_uniques_reels'].max())
-axes[0, 1].plot([0, max_val], [0, max_val], 'r--', alpha=0.8, linewidth=2, 
-               label='Ligne d\'égalité (y=x)')
-axes[0, 1].set_xlabel('Artistes uniques')
-axes[0, 1].set_ylabel('Albums uniques')
-axes[0, 1].set_title('Relation Albums vs Artistes')
-axes[0, 1].legend()
-axes[0, 1].grid(True, alpha=0.3)
-
-# 3. Distribution du ratio Albums/Artistes
-axes[0, 2].hist(playlists_stats['ratio_albums_artistes'], bins=30, 
-               alpha=0.7, color='green', edgecolor='black')
-axes[0, 2].axvline(x=1, color='red', linestyle='--', linewidth=2, 
-                  label='Ratio = 1')
-axes[0, 2].axvline(x=resultats['ratio_moyen'], color='blue', linestyle='-', 
-                  linewidth=2, label=f'Moyenne = {resultats["ratio_moyen"]:.2f}')
-axes[0, 2].set_xlabel('Ratio Albums/Artistes')
-axes[0, 2].set_ylabel('Fréquence')
-axes[0, 2].set_title('Distribution du Ratio Albums/Artistes')
-axes[0, 2].legend()
-axes[0, 2].grid(True, alpha=0.3)
-
-# 4. Distribution de la différence
-axes[1, 0].hist(playlists_stats['diff_albums_artistes'], bins=30, 
-               alpha=0.7, color='purple', edgecolor='black')
-axes[1, 0].axvline(x=0, color='red', linestyle='--', linewidth=2, 
-                  label='Différence = 0')
-axes[1, 0].set_xlabel('Différence (Albums - Artistes)')
-axes[1, 0].set_ylabel('Fréquence')
-axes[1, 0].set_title('Distribution de la Différence Albums - Artistes')
-axes[1, 0].legend()
-axes[1, 0].grid(True, alpha=0.3)
-
-# 5. Box plot comparatif
-data_boxplot = [playlists_stats['artistes_uniques_reels'], 
-                playlists_stats['albums_uniques_reels']]
-axes[1, 1].boxplot(data_boxplot, labels=['Artistes', 'Albums'])
-axes[1, 1].set_ylabel('Nombre d\'éléments uniques')
-axes[1, 1].set_title('Comparaison Box Plot')
-axes[1, 1].grid(True, alpha=0.3)
-
-# 6. Analyse par taille de playlist
-# Créer des catégories de taille
-playlists_stats['categorie_taille'] = pd.cut(
-    playlists_stats['num_tracks'], 
-    bins=[0, 20, 50, 100, float('inf')], 
-    labels=['Petite (≤20)', 'Moyenne (21-50)', 'Grande (51-100)', 'Très grande (>100)']
-)
-
-ratio_par_taille = playlists_stats.groupby('categorie_taille')['ratio_albums_artistes'].mean()
-axes[1, 2].bar(range(len(ratio_par_taille)), ratio_par_taille.values, 
-              color=['lightblue', 'lightgreen', 'lightyellow', 'lightpink'])
-axes[1, 2].set_xticks(range(len(ratio_par_taille)))
-axes[1, 2].set_xticklabels(ratio_par_taille.index, rotation=45, ha='right')
-axes[1, 2].axhline(y=1, color='red', linestyle='--', alpha=0.8)
-axes[1, 2].set_ylabel('Ratio moyen Albums/Artistes')
-axes[1, 2].set_title('Ratio par Taille de Playlist')
-axes[1, 2].grid(True, alpha=0.3)
-
-# Ajustement de l'espacement pour éviter la superposition des titres
-plt.subplots_adjust(top=0.93, bottom=0.08, left=0.08, right=0.95, 
-                    hspace=0.35, wspace=0.25)
-visualization_path = os.path.join(output_dir, 'analyse_dispersion_album_artiste.png')
-plt.savefig(visualization_path, dpi=300, bbox_inches='tight')
-print(f"Visualisations techniques sauvegardées : {visualization_path}")
-plt.show()
-
-#################################################################################################
-
-# VISUALISATIONS POUR DASHBOARD GRAND PUBLIC
-print("\nÉtape 3b: Création des visualisations pour dashboard grand public...")
-
-# Couleurs corporate et modernes
-colors_primary = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
-colors_accent = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+print(f"Playlists avec différence positive : {resultats['diff_positive']}/{len(playlists_stats)} "
+      f"({resultats['pct_diff_positive']:.1f}%)")
+print(f"Différence moyenne : {resultats['diff_moyenne']:.2f}")
+print(f"Différence médiane : {resultats['diff_mediane']:.2f}")
 
 #################################################################################################
 
-# 1. GRAPHIQUE PRINCIPAL : Message percutant
-fig1, ax1 = plt.subplots(figsize=(12, 8))
-
-# Données pour le graphique en secteurs
-labels = [f'Plus d\'albums\n({pct_plus_albums:.1f}%)', 
-          f'Plus d\'artistes\n({100-pct_plus_albums:.1f}%)']
-sizes = [pct_plus_albums, 100-pct_plus_albums]
-colors = ['#4ECDC4', '#FF6B6B']
-explode = (0.1, 0)  # Mise en avant du secteur principal
-
-wedges, texts, autotexts = ax1.pie(sizes, explode=explode, labels=labels, colors=colors,
-                                   autopct='%1.1f%%', startangle=90, 
-                                   textprops={'fontsize': 14, 'fontweight': 'bold'})
-
-ax1.set_title('🎵 Les playlists Spotify privilégient la DIVERSITÉ des ALBUMS\n'
-              f'Sur 10 000 playlists analysées', 
-              fontsize=18, fontweight='bold', pad=20)
-
-# Ajout d'un message central
-circle = plt.Circle((0,0), 0.4, fc='white', linewidth=2, edgecolor='gray')
-fig1.gca().add_artist(circle)
-ax1.text(0, 0, f'{pct_plus_albums:.0f}%\nConfirmé', 
-         horizontalalignment='center', verticalalignment='center',
-         fontsize=20, fontweight='bold', color='#2c3e50')
-
-plt.tight_layout()
-dashboard_1_path = os.path.join(output_dir, 'dashboard_1_message_principal.png')
-plt.savefig(dashboard_1_path, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"Graphique principal sauvegardé : {dashboard_1_path}")
-plt.show()
-
-#################################################################################################
-
-# 2. COMPARAISON SIMPLE : Barres horizontales
-fig2, ax2 = plt.subplots(figsize=(12, 6))
-
-moyennes = [playlists_stats['artistes_uniques_reels'].mean(), 
-           playlists_stats['albums_uniques_reels'].mean()]
-categories = ['Artistes uniques\npar playlist', 'Albums uniques\npar playlist']
-colors_bars = ['#FF6B6B', '#4ECDC4']
-
-bars = ax2.barh(categories, moyennes, color=colors_bars, height=0.6)
-
-# Ajout des valeurs sur les barres
-for i, (bar, value) in enumerate(zip(bars, moyennes)):
-    ax2.text(value + 1, bar.get_y() + bar.get_height()/2, 
-             f'{value:.1f}', ha='left', va='center', 
-             fontsize=16, fontweight='bold')
-
-ax2.set_xlabel('Nombre moyen par playlist', fontsize=14, fontweight='bold')
-ax2.set_title('📊 En moyenne, chaque playlist contient plus d\'albums que d\'artistes\n'
-              'Les utilisateurs explorent en profondeur les catalogues', 
-              fontsize=16, fontweight='bold', pad=20)
-
-ax2.grid(axis='x', alpha=0.3)
-ax2.set_xlim(0, max(moyennes) * 1.2)
-
-# Ajout d'une flèche et annotation
-ax2.annotate('10,5 albums de plus\nen moyenne !', 
-             xy=(moyennes[1], 1), xytext=(moyennes[1]+5, 0.3),
-             arrowprops=dict(arrowstyle='->', color='green', lw=2),
-             fontsize=12, fontweight='bold', color='green')
-
-plt.tight_layout()
-dashboard_2_path = os.path.join(output_dir, 'dashboard_2_comparaison_moyennes.png')
-plt.savefig(dashboard_2_path, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"Graphique de comparaison sauvegardé : {dashboard_2_path}")
-plt.show()
+# Statistiques utilisées par les figures : ratio moyen par catégorie de taille
+if en_cache is not None:
+    ratio_par_taille = en_cache['tables']['ratio_par_taille']
+else:
+    with instrumentation.etape('statistiques_figures', lignes_entree=len(playlists_stats)):
+        ratio_par_taille = ratio_par_categorie(playlists_stats)
 
 #################################################################################################
 
-# 3. TENDANCE PAR TAILLE : Message comportemental
-fig3, ax3 = plt.subplots(figsize=(12, 7))
+# Création des visualisations techniques et des visualisations pour dashboard grand public :
+# chaque figure est une tâche indépendante (figures_dispersion.py), rendue dans un pool de processus
+print("\nÉtape 3: Création des visualisations techniques et du dashboard grand public...")
 
-# Données par taille avec messages clairs
-tailles_labels = ['Courtes\n(≤20 titres)', 'Moyennes\n(21-50 titres)', 
-                  'Longues\n(51-100 titres)', 'Très longues\n(>100 titres)']
-ratios_moyens = ratio_par_taille.values
-
-bars = ax3.bar(tailles_labels, ratios_moyens, 
-               color=['#FFE5B4', '#FFCC99', '#FFB366', '#FF9933'], 
-               edgecolor='white', linewidth=2)
-
-# Ligne de référence
-ax3.axhline(y=1, color='red', linestyle='--', linewidth=3, alpha=0.8, 
-           label='Égalité albums = artistes')
-
-# Ajout des valeurs sur les barres
-for bar, value in zip(bars, ratios_moyens):
-    ax3.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.02,
-             f'{value:.2f}', ha='center', va='bottom', 
-             fontsize=14, fontweight='bold')
-
-ax3.set_ylabel('Ratio Albums/Artistes', fontsize=14, fontweight='bold')
-ax3.set_title('🎯 Plus la playlist est longue, plus la diversité d\'albums augmente\n'
-              'Comportement constant quelque soit la taille de playlist', 
-              fontsize=16, fontweight='bold', pad=20)
-
-ax3.grid(axis='y', alpha=0.3)
-ax3.legend(fontsize=12)
-ax3.set_ylim(0, max(ratios_moyens) * 1.1)
-
-plt.tight_layout()
-dashboard_3_path = os.path.join(output_dir, 'dashboard_3_tendance_taille.png')
-plt.savefig(dashboard_3_path, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"Graphique de tendance sauvegardé : {dashboard_3_path}")
-plt.show()
-
-#################################################################################################
-
-# 4. INFOGRAPHIE DE SYNTHÈSE
-fig4, ((ax4a, ax4b), (ax4c, ax4d)) = plt.subplots(2, 2, figsize=(16, 12))
-fig4.suptitle('🎵 DÉCOUVERTE MUSICALE : Les utilisateurs Spotify explorent en PROFONDEUR', 
-              fontsize=20, fontweight='bold', y=0.95)
-
-# 4a. Statistique clé
-ax4a.text(0.5, 0.5, f'{pct_plus_albums:.0f}%', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=60, fontweight='bold', color='#4ECDC4',
-          transform=ax4a.transAxes)
-ax4a.text(0.5, 0.2, 'des playlists ont plus\nd\'albums que d\'artistes', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=16, fontweight='bold', transform=ax4a.transAxes)
-ax4a.set_xlim(0, 1)
-ax4a.set_ylim(0, 1)
-ax4a.axis('off')
-
-# 4b. Ratio moyen
-ax4b.text(0.5, 0.5, f'{ratio_moyen:.2f}', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=50, fontweight='bold', color='#FF6B6B',
-          transform=ax4b.transAxes)
-ax4b.text(0.5, 0.2, 'albums par artiste\nen moyenne', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=16, fontweight='bold', transform=ax4b.transAxes)
-ax4b.set_xlim(0, 1)
-ax4b.set_ylim(0, 1)
-ax4b.axis('off')
-
-# 4c. Différence moyenne
-ax4c.text(0.5, 0.5, f'+{playlists_stats["diff_albums_artistes"].mean():.1f}', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=50, fontweight='bold', color='#45B7D1',
-          transform=ax4c.transAxes)
-ax4c.text(0.5, 0.2, 'albums de plus\nque d\'artistes', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=16, fontweight='bold', transform=ax4c.transAxes)
-ax4c.set_xlim(0, 1)
-ax4c.set_ylim(0, 1)
-ax4c.axis('off')
-
-# 4d. Conclusion métier
-ax4d.text(0.5, 0.6, '💡 INSIGHT MÉTIER', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=18, fontweight='bold', color='#2c3e50',
-          transform=ax4d.transAxes)
-ax4d.text(0.5, 0.4, 'Les utilisateurs préfèrent\nEXPLORER EN PROFONDEUR\nles catalogues d\'artistes\nplutôt que découvrir\nsuperficiellement', 
-          horizontalalignment='center', verticalalignment='center',
-          fontsize=14, fontweight='bold', transform=ax4d.transAxes)
-ax4d.set_xlim(0, 1)
-ax4d.set_ylim(0, 1)
-ax4d.axis('off')
-
-plt.tight_layout()
-dashboard_4_path = os.path.join(output_dir, 'dashboard_4_infographie_synthese.png')
-plt.savefig(dashboard_4_path, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"Infographie de synthèse sauvegardée : {dashboard_4_path}")
-plt.show()
+taches_dashboard = taches_dashboards(resultats, ratio_par_taille, output_dir)
+taches = taches_technique(playlists_stats, resultats, ratio_par_taille, output_dir) + taches_dashboard
+if en_cache is not None:
+    print(f"{len(taches)} figure(s) restaurée(s) depuis le cache.")
+else:
+    with instrumentation.etape('rendu_figures', lignes_entree=len(playlists_stats)):
+        executer_rendus(taches, workers=args.workers, configurer_style=configurer_style)
 
 print("\n🎯 Visualisations dashboard créées avec succès !")
 print("📊 Fichiers générés pour dashboard grand public :")
-print(f"   1. Message principal : {dashboard_1_path}")
-print(f"   2. Comparaison : {dashboard_2_path}")
-print(f"   3. Tendance : {dashboard_3_path}")
-print(f"   4. Infographie : {dashboard_4_path}")
+for numero, (titre, (_, arguments)) in enumerate(zip(['Message principal', 'Comparaison', 'Tendance', 'Infographie'],
+                                                     taches_dashboard), 1):
+    print(f"   {numero}. {titre} : {arguments['chemin']}")
 
 #################################################################################################
 
@@ -463,6 +284,11 @@ print("'Les playlists contiennent plus d'albums uniques que d'artistes (forte di
 print(f"\nRésultats clés :")
 print(f"- {resultats['pct_plus_albums']:.1f}% des playlists ont plus d'albums que d'artistes")
 print(f"- Ratio moyen albums/artistes : {resultats['ratio_moyen']:.3f}")
+total = intervalles.loc['Total']
+print(f"- Intervalle de confiance à {args.niveau:.0%} : ratio moyen [{total['ratio_moyen_bas']:.3f} ; "
+      f"{total['ratio_moyen_haut']:.3f}], playlists avec plus d'albums [{total['pct_plus_albums_bas']:.1f}% ; "
+      f"{total['pct_plus_albums_haut']:.1f}%]")
+print(f"- Tailles d'effet : d_z = {total['d_z']:.3f}, corrélation rang-bisériale = {total['rang_biserial']:.3f}")
 print(f"- Test statistique significatif : {'Oui' if resultats['p_value'] < 0.05 else 'Non'} (p = {resultats['p_value']:.2e})")
 
 if resultats['pct_plus_albums'] > 50 and resultats['ratio_moyen'] > 1:
@@ -495,11 +321,28 @@ else:
 #################################################################################################
 
 # Sauvegarde des résultats
-results_path = os.path.join(output_dir, 'analyse_dispersion_resultats.csv')
-playlists_stats.to_csv(results_path, index=False)
+# Les estimations du mode approché ne remplacent pas les résultats exacts
+nom_resultats = 'analyse_dispersion_resultats_approx.csv' if args.approximatif else 'analyse_dispersion_resultats.csv'
+results_path = os.path.join(output_dir, nom_resultats)
+bootstrap_path = os.path.join(output_dir, nom_resultats.replace('_resultats', '_bootstrap'))
+if en_cache is None:
+    with instrumentation.etape('sauvegarde_resultats', lignes_entree=len(playlists_stats)):
+        playlists_stats.to_csv(results_path, index=False)
+        intervalles.to_csv(bootstrap_path)
+
+    # Mise en cache des tables intermédiaires, des valeurs et des fichiers produits
+    with instrumentation.etape('ecriture_cache'):
+        tables = {'playlists_stats': playlists_stats, 'ratio_par_taille': ratio_par_taille,
+                  'intervalles_bootstrap': intervalles}
+        if args.approximatif:
+            tables.update(cardinalites=cardinalites, erreurs_echantillon=erreurs_echantillon)
+        fichiers = [tache[1]['chemin'] for tache in taches] + [results_path, bootstrap_path]
+        cache.enregistrer(cle_cache, tables, resultats, fichiers)
 print(f"\nRésultats détaillés sauvegardés : {results_path}")
+print(f"Intervalles de confiance bootstrap sauvegardés : {bootstrap_path}")
 
 print("\n--- Analyse de la dispersion album/artiste terminée ---")
 print(f"Hypothèse {'CONFIRMÉE' if resultats['pct_plus_albums'] > 50 else 'RÉFUTÉE'} avec {resultats['pct_plus_albums']:.1f}% de validation")
+instrumentation.terminer()
 
 # Fin du script
@@ -9,15 +9,70 @@
 # Charger le jeu de données nettoyé (`alcrowd_cleaned.csv`).
 # Réaliser une analyse univariée pour comprendre la distribution de chaque variable (statistiques descriptives, histogrammes).
 # Réaliser une analyse bivariée pour explorer les relations entre les variables (matrice de corrélation).
+#
+# Avec --par-blocs, les données sont lues par blocs de --taille-bloc lignes et résumées par des
+# accumulateurs (`statistiques_flux.py`) : moments et co-moments pour describe() et la corrélation,
+# comptages de valeurs pour les quantiles, histogrammes, boxplots et Top 20, fréquences de mots pour
+# le nuage de mots.
+# Le nuage de mots est tracé à partir des fréquences des mots des noms de playlists, comptées sur un nom
+# par playlist (--ponderation-mots playlist, défaut) ou sur chaque piste (--ponderation-mots piste, une
+# playlist pèse alors son nombre de pistes) ; chaque nom distinct n'est découpé qu'une fois
+# (ComptageMots, `statistiques_exploratoire.py`).
+# Avec --top-classements, le Top 20 des artistes et albums est lu dans les classements mensuels tenus à
+# jour par le nettoyage (`classements_frequents.py`) au lieu d'être recompté sur toutes les pistes ;
+# les comptes affichés sont alors les minorants garantis des résumés.
+#
+# Dans les deux modes, histogrammes, densités et boxplots sont tracés à partir de résumés précalculés
+# une fois par colonne (`resume_distributions.py`, enregistrés dans `resumes_distributions.json`).
+# Le pairplot et le nuage de points sont tracés au niveau playlist : un point par pid, chaque playlist
+# comptant une fois dans les deux rendus ; la durée des pistes y est la durée moyenne des pistes de la
+# playlist (playlist_duration_ms / num_tracks). Au-delà de --seuil-points playlists, ils sont tracés sur un
+# échantillon uniforme de --seuil-points playlists (--rendu echantillon) ou par densité 2D (--rendu densite).
+#
+# Les graphiques sont rendus en parallèle (--workers processus, backend Agg) à partir de ces résumés ;
+# leur code est dans figures_exploratoire.py.
+#
+# Chaque étape est mesurée (`instrumentation.py` : durée, temps CPU, pic RSS, lignes) et un rapport
+# d'exécution JSON est écrit en fin de script (--rapport pour choisir son chemin).
 
 
 # Importation des bibliothèques
 import pandas as pd
-import numpy as np
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+import argparse
+
+from chargement_donnees import charger_donnees_nettoyees, iterer_donnees_nettoyees
+from statistiques_flux import AccumulateurMoments, ComptageValeurs, decrire
+from resume_distributions import sauvegarder_resumes
+from statistiques_exploratoire import (COLONNES_NUMERIQUES, COLONNES_EDA, COLONNES_TOP, COLONNES_PAIRPLOT,
+                                       COLONNES_POINTS, premiere_ligne_par_playlist, resumer_colonnes,
+                                       top_valeurs, ComptageMots, compter_mots, matrice_correlation,
+                                       selectionner_points)
+from classements_frequents import ClassementsMensuels
+from figures_exploratoire import taches_figures
+from rendu_figures import executer_rendus
+from instrumentation import Instrumentation
+
+parser = argparse.ArgumentParser(description="Analyse exploratoire des données nettoyées.")
+parser.add_argument('--par-blocs', action='store_true',
+                    help="Lire les données par blocs au lieu de les charger entièrement en mémoire.")
+parser.add_argument('--taille-bloc', type=int, default=1_000_000,
+                    help="Nombre de lignes par bloc avec --par-blocs (défaut : 1 000 000).")
+parser.add_argument('--seuil-points', type=int, default=50_000,
+                    help="Nombre maximal de playlists tracées point par point (défaut : 50 000).")
+parser.add_argument('--rendu', choices=['echantillon', 'densite'], default='echantillon',
+                    help="Rendu du pairplot et du nuage de points au-delà du seuil (défaut : echantillon).")
+parser.add_argument('--ponderation-mots', choices=['playlist', 'piste'], default='playlist',
+                    help="Poids de chaque nom de playlist dans le nuage de mots : une fois par playlist "
+                         "ou une fois par piste (défaut : playlist).")
+parser.add_argument('--top-classements', action='store_true',
+                    help="Lire le Top 20 des artistes et albums dans les classements mensuels (alcrowd/classements/).")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Nombre de processus de rendu des graphiques (défaut : tous les cœurs ; 1 = séquentiel).")
+parser.add_argument('--rapport', default=None,
+                    help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+args = parser.parse_args()
+instrumentation = Instrumentation('analyse_exploratoire.py', vars(args), args.rapport)
 
 
 print("Débutons notre analyse exploratoire")
@@ -28,17 +83,45 @@ print("Importation des bibliothèques terminée.")
 
 # Chargement des données
 base_dir = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(base_dir, 'alcrowd', 'alcrowd_cleaned.csv')
 # Création d'un dossier de sortie dédié pour les graphiques
 output_dir = os.path.join(base_dir, 'alcrowd', 'analyse_exploratoire_plots')
 os.makedirs(output_dir, exist_ok=True)
 
-if not os.path.exists(data_path):
-    raise FileNotFoundError(f"Le fichier de données nettoyées n'a pas été trouvé : {data_path}\n"
-                            "Pensez à dans un premier temps, exécuter le script 'de nettoyage des données.")
-
-df = pd.read_csv(data_path)
-print(f"Données chargées depuis '{data_path}'.")
+# Seules les colonnes utilisées par l'analyse (COLONNES_EDA, statistiques_exploratoire.py) sont lues
+# (Parquet si disponible, sinon CSV)
+
+if args.par_blocs:
+    # Un seul passage sur les données : chaque bloc met à jour les accumulateurs puis est libéré
+    moments = AccumulateurMoments(COLONNES_NUMERIQUES)
+    comptages = {col: ComptageValeurs()
+                 for col in COLONNES_NUMERIQUES + ([] if args.top_classements else COLONNES_TOP)}
+    parties_points = []
+    mots = ComptageMots(args.ponderation_mots)
+    with instrumentation.etape('lecture_par_blocs') as etape:
+        for bloc in iterer_donnees_nettoyees(COLONNES_EDA, taille_bloc=args.taille_bloc):
+            moments.ajouter(bloc)
+            for col, comptage in comptages.items():
+                comptage.ajouter(bloc[col])
+            parties_points.append(premiere_ligne_par_playlist(bloc[COLONNES_POINTS].dropna()))
+            mots.ajouter(bloc[['pid', 'name']])
+        etape['lignes_sortie'] = moments.n
+    print(f"{moments.n} lignes résumées.")
+    with instrumentation.etape('frequences_mots'):
+        frequences_mots = mots.frequences()
+    # Une playlist coupée entre deux blocs apparaît deux fois : on garde sa première ligne
+    with instrumentation.etape('points_playlists') as etape:
+        points_playlists = pd.concat(parties_points, ignore_index=True)
+        etape['lignes_entree'] = len(points_playlists)
+        points_playlists = points_playlists.drop_duplicates('pid').reset_index(drop=True)
+        etape['lignes_sortie'] = len(points_playlists)
+    del parties_points
+else:
+    with instrumentation.etape('chargement') as etape:
+        df = charger_donnees_nettoyees(COLONNES_EDA)
+        etape['lignes_sortie'] = len(df)
+    with instrumentation.etape('points_playlists', lignes_entree=len(df)) as etape:
+        points_playlists = premiere_ligne_par_playlist(df[COLONNES_POINTS].dropna())
+        etape['lignes_sortie'] = len(points_playlists)
 
 #################################################################################################
 
@@ -49,119 +132,69 @@ print("\nDébut de l'analyse exploratoire.")
 
 # A. Analyse univariée
 print("\nStatistiques descriptives des colonnes numériques :")
-print(df.describe())
-
-#################################################################################################
-
-# Visualisation des distributions
-numeric_cols_to_plot = ['num_followers', 'num_tracks', 'playlist_duration_ms', 'track_duration_ms', 'num_artists', 'num_albums']
-plt.figure(figsize=(15, 12))
-plt.suptitle('Analyse univariée - Distributions des variables numériques', fontsize=16)
-for i, col in enumerate(numeric_cols_to_plot, 1):
-    plt.subplot(3, 2, i)
-    sns.histplot(df[col], kde=True, bins=50)
-    plt.title(f'Distribution de {col}')
-    # L'échelle log est utile pour les données très asymétriques
-    if df[col].max() > 1000 and df[col].min() >= 0:
-        plt.xscale('log')
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-univariate_plot_path = os.path.join(output_dir, 'univar_1_distributions_numeriques.png')
-plt.savefig(univariate_plot_path)
-print(f"Graphiques des distributions univariées sauvegardés : {univariate_plot_path}")
-plt.close()
+with instrumentation.etape('statistiques_descriptives'):
+    if args.par_blocs:
+        print(decrire(moments, comptages))
+    else:
+        print(df.describe())
 
 #################################################################################################
 
-# Boxplots pour les variables numériques
-plt.figure(figsize=(15, 10))
-plt.suptitle('Analyse univariée - Boxplots des variables numériques', fontsize=16)
-for i, col in enumerate(numeric_cols_to_plot, 1):
-    plt.subplot(2, 3, i)
-    sns.boxplot(y=df[col])
-    plt.title(f'Boxplot de {col}')
-    plt.yscale('log')
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-univariate_box_path = os.path.join(output_dir, 'univar_2_boxplots_numeriques.png')
-plt.savefig(univariate_box_path)
-print(f"Boxplots sauvegardés : {univariate_box_path}")
-plt.close()
+# Précalcul des résumés de distribution (classes, quantiles, moustaches, densité sur grille)
+with instrumentation.etape('resumes_distributions'):
+    resumes = resumer_colonnes(comptages) if args.par_blocs else resumer_colonnes(df=df)
+resumes_path = os.path.join(output_dir, 'resumes_distributions.json')
+sauvegarder_resumes(resumes, resumes_path)
+print(f"Résumés des distributions sauvegardés : {resumes_path}")
 
 #################################################################################################
 
 # Analyse des variables catégorielles (Top 20)
-def plot_top_n(data, column, n, title, path):
-    plt.figure(figsize=(12, 8))
-    top_n = data[column].value_counts().nlargest(n)
-    sns.barplot(x=top_n.values, y=top_n.index, palette='viridis')
-    plt.title(title)
-    plt.xlabel("Nombre d'apparitions")
-    plt.ylabel(column.replace('_', ' ').title())
-    plt.tight_layout()
-    plt.savefig(path)
-    print(f"Graphique '{title}' sauvegardé : {path}")
-    plt.close()
-
-plot_top_n(df, 'artist_name', 20, 'Top 20 des artistes les plus fréquents', os.path.join(output_dir, 'univar_3_top20_artistes.png'))
-plot_top_n(df, 'album_name', 20, 'Top 20 des albums les plus fréquents', os.path.join(output_dir, 'univar_4_top20_albums.png'))
-
+tops = {}
+with instrumentation.etape('top20'):
+    classements = ClassementsMensuels.charger() if args.top_classements else None
+    if args.top_classements and classements is None:
+        raise FileNotFoundError("Aucun classement enregistré : exécutez nettoyage.py sans --sans-classements "
+                                "ou classements_frequents.py --reconstruire.")
+    for col in COLONNES_TOP:
+        if classements is not None:
+            tops[col] = classements.top_valeurs(col)
+        else:
+            tops[col] = top_valeurs(comptages[col].serie() if args.par_blocs else df[col].value_counts())
 
 #################################################################################################
 
-# Nuage de mots pour les noms de playlists
-playlist_names = ' '.join(df['name'].dropna().astype(str))
-wordcloud = WordCloud(width=800, height=400, background_color='white').generate(playlist_names)
-plt.figure(figsize=(10, 5))
-plt.imshow(wordcloud, interpolation='bilinear')
-plt.axis('off')
-plt.title('Nuage de mots des noms de playlists')
-wordcloud_path = os.path.join(output_dir, 'univar_5_wordcloud_noms_playlist.png')
-plt.savefig(wordcloud_path)
-print(f"Nuage de mots sauvegardé : {wordcloud_path}")
-plt.close()
+# Fréquences des mots des noms de playlists pour le nuage de mots
+if not args.par_blocs:
+    with instrumentation.etape('frequences_mots', lignes_entree=len(df)):
+        frequences_mots = compter_mots(df, args.ponderation_mots)
 
 #################################################################################################
 
 # B. Analyse bivariée
 # Matrice de corrélation
-numeric_cols = df.select_dtypes(include=np.number).columns
-corr_matrix = df[numeric_cols].corr()
-
-plt.figure(figsize=(12, 10))
-sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap='coolwarm', linewidths=.5)
-plt.title('Analyse bivariée - Matrice de corrélation')
-bivariate_plot_path = os.path.join(output_dir, 'bivar_1_matrice_correlation.png')
-plt.savefig(bivariate_plot_path)
-print(f"Matrice de corrélation sauvegardée : {bivariate_plot_path}")
-plt.close()
+with instrumentation.etape('correlation'):
+    if args.par_blocs:
+        corr_matrix = moments.correlation()
+    else:
+        corr_matrix = matrice_correlation(df)
 
 #################################################################################################
 
-# Pairplot pour les variables clés
-pairplot_cols = ['num_followers', 'num_tracks', 'track_duration_ms', 'num_artists']
-sns.pairplot(df[pairplot_cols].dropna())
-plt.suptitle('Analyse bivariée - Pairplot des variables clés', y=1.02)
-pairplot_path = os.path.join(output_dir, 'bivar_2_pairplot.png')
-plt.savefig(pairplot_path)
-print(f"Pairplot sauvegardé : {pairplot_path}")
-plt.close()
+# Points tracés : toutes les playlists sous le seuil, sinon un échantillon uniforme ou une densité 2D
+points_traces, densite = selectionner_points(points_playlists, args.seuil_points, args.rendu)
 
 #################################################################################################
 
-# Scatter plot spécifique
-plt.figure(figsize=(10, 6))
-sns.scatterplot(data=df, x='num_tracks', y='num_followers', alpha=0.5)
-plt.title('Relation entre le nombre de pistes et le nombre de followers')
-plt.xlabel('Nombre de pistes')
-plt.ylabel('Nombre de followers')
-plt.xscale('log')
-plt.yscale('log')
-plt.grid(True)
-scatter_path = os.path.join(output_dir, 'bivar_3_scatter_pistes_followers.png')
-plt.savefig(scatter_path)
-print(f"Nuage de points sauvegardé : {scatter_path}")
-plt.close()
+# Rendu des graphiques en parallèle, à partir des résumés calculés ci-dessus
+print("\nRendu des graphiques :")
+taches = taches_figures(resumes, tops, frequences_mots, corr_matrix, points_traces, COLONNES_PAIRPLOT, densite,
+                        output_dir)
+with instrumentation.etape('rendu_figures', lignes_entree=len(points_traces)):
+    executer_rendus(taches, workers=args.workers)
 
 print("\n--- Analyse exploratoire terminée ---")
 print(f"Tous les graphiques ont été sauvegardés dans : {output_dir}")
+instrumentation.terminer()
 
-# Fin du script
\ No newline at end of file
+# Fin du script
@@ -0,0 +1,99 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script compare, sur le jeu de données nettoyé complet, deux calculs de `playlists_stats` :
+# - groupby : df.groupby(['name', 'pid']).agg(...) avec trois 'nunique' (méthode historique) ;
+# - codes : agreger_playlists (agregation_playlists.py), un tri de couples (pid, code) par colonne.
+# Il mesure le temps et le pic de mémoire (tracemalloc) de chaque méthode et vérifie que les deux
+# tableaux sont identiques.
+#
+# Utilisation : python benchmarks/benchmark_agregation.py [--repetitions 3] [--texte]
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from chargement_donnees import charger_donnees_nettoyees
+from agregation_playlists import agreger_playlists
+
+COLONNES_DISPERSION = ['name', 'pid', 'num_albums', 'num_artists', 'num_tracks',
+                       'artist_name', 'album_name', 'track_name']
+
+#################################################################################################
+
+# Méthode historique de album_unique_artistes.py
+def agreger_groupby(df):
+    playlists_stats = df.groupby(['name', 'pid'], observed=True).agg({
+        'num_albums': 'first',
+        'num_artists': 'first',
+        'num_tracks': 'first',
+        'artist_name': 'nunique',
+        'album_name': 'nunique',
+        'track_name': 'nunique'
+    }).reset_index()
+    return playlists_stats.rename(columns={
+        'artist_name': 'artistes_uniques_reels',
+        'album_name': 'albums_uniques_reels',
+        'track_name': 'tracks_uniques_reels'
+    })
+
+
+# Meilleur temps sur plusieurs répétitions, puis pic mémoire sur une exécution supplémentaire
+def mesurer(fonction, df, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction(df)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    tracemalloc.start()
+    fonction(df)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return meilleur, pic, resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark groupby/nunique contre agrégation sur codes entiers.")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--texte', action='store_true',
+                        help="Convertir les noms en chaînes (object) comme lors d'une lecture du CSV sans schéma compact.")
+    args = parser.parse_args()
+
+    df = charger_donnees_nettoyees(COLONNES_DISPERSION)
+    if args.texte:
+        df = df.astype({col: object for col in ['name', 'artist_name', 'album_name', 'track_name']})
+    print(f"{len(df)} lignes, {df['pid'].nunique()} playlists")
+
+    resultats = []
+    sorties = {}
+    for nom, fonction in [('groupby', agreger_groupby), ('codes', agreger_playlists)]:
+        temps, pic, sorties[nom] = mesurer(fonction, df, args.repetitions)
+        resultats.append({'methode': nom, 'temps_s': round(temps, 3), 'pic_memoire_mo': round(pic / 1024**2, 1)})
+
+    try:
+        pd.testing.assert_frame_equal(sorties['groupby'], sorties['codes'], check_dtype=False)
+        identiques = True
+    except AssertionError as erreur:
+        print(f"Différence détectée : {erreur}")
+        identiques = False
+
+    print(pd.DataFrame(resultats).to_string(index=False))
+    print(f"Accélération : x{resultats[0]['temps_s'] / resultats[1]['temps_s']:.1f} - résultats identiques : {identiques}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script compare les deux méthodes d'aplatissement de `nettoyage.py` :
+# - explode : mpd_df.explode('tracks') puis ['tracks'].apply(pd.Series) (méthode historique) ;
+# - columns : construction directe des colonnes de pistes.
+# Les mesures sont faites sur 1, 10 et 100 slices (option --slices) et le résultat des deux
+# méthodes est comparé après nettoyage pour vérifier qu'elles produisent les mêmes données.
+#
+# Utilisation : python benchmarks/benchmark_aplatissement.py [--dossier alcrowd] [--slices 1 10 100]
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from nettoyage import lister_slices, charger_playlists, aplatir_playlists
+
+#################################################################################################
+
+# Chronométrage d'une méthode (meilleur temps sur plusieurs répétitions)
+def chronometrer(playlists, methode, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        df = aplatir_playlists(playlists, methode)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, df
+
+
+# Les deux méthodes doivent donner le même tableau une fois les lignes sans piste supprimées
+def comparer(df_explode, df_colonnes):
+    df_explode = df_explode.dropna(subset=['track_uri']).drop(columns=[0, '0'], errors='ignore')
+    df_colonnes = df_colonnes.dropna(subset=['track_uri'])
+    try:
+        pd.testing.assert_frame_equal(df_explode.reset_index(drop=True), df_colonnes.reset_index(drop=True),
+                                      check_dtype=False)
+        return True
+    except AssertionError as erreur:
+        print(f"Différence détectée : {erreur}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark explode/apply contre aplatissement par colonnes.")
+    parser.add_argument('--dossier', default=os.path.join(base_dir, 'alcrowd'),
+                        help="Dossier contenant les fichiers mpd.slice.*.json.")
+    parser.add_argument('--slices', type=int, nargs='+', default=[1, 10, 100],
+                        help="Nombres de slices à aplatir.")
+    parser.add_argument('--repetitions', type=int, default=1)
+    args = parser.parse_args()
+
+    fichiers = lister_slices(args.dossier)
+    if not fichiers:
+        raise FileNotFoundError(f"Aucun fichier mpd.slice.*.json dans {args.dossier}")
+
+    resultats = []
+    for nb_slices in args.slices:
+        if nb_slices > len(fichiers):
+            print(f"{nb_slices} slices demandées mais seulement {len(fichiers)} disponibles : mesure ignorée.")
+            continue
+        playlists = charger_playlists(fichiers[:nb_slices])
+        temps_explode, df_explode = chronometrer(playlists, 'explode', args.repetitions)
+        temps_colonnes, df_colonnes = chronometrer(playlists, 'columns', args.repetitions)
+        identiques = comparer(df_explode, df_colonnes)
+        resultats.append({
+            'slices': nb_slices,
+            'playlists': len(playlists),
+            'lignes': len(df_colonnes),
+            'explode_s': round(temps_explode, 3),
+            'columns_s': round(temps_colonnes, 3),
+            'acceleration': round(temps_explode / temps_colonnes, 1),
+            'identiques': identiques,
+        })
+        del playlists, df_explode, df_colonnes
+
+    print(pd.DataFrame(resultats).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
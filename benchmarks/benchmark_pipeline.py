@@ -0,0 +1,264 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script mesure le pipeline sur des slices synthétiques (`generer_slices.py`) à plusieurs échelles
+# (10 000, 100 000 et 1 000 000 de playlists par défaut) :
+# - nettoyage : lecture, aplatissement, nettoyage, déduplication et écriture CSV/Parquet (nettoyage.py) ;
+# - statistiques_eda : statistiques de l'analyse exploratoire par blocs (describe, résumés de
+#   distribution, corrélation, Top 20) ;
+# - agregation_dispersion : chargement et agrégation par playlist de album_unique_artistes.py.
+# Chaque étape est exécutée dans un processus séparé et mesurée par `instrumentation.py` (durée,
+# temps CPU, pic RSS) ; le débit est rapporté en lignes, playlists et Mo de JSON par seconde.
+#
+# Les données générées sont conservées dans --dossier-donnees et réutilisées tant que les paramètres
+# de génération sont identiques. Les résultats sont enregistrés dans benchmarks/resultats/ et peuvent
+# être comparés à une exécution précédente :
+#   python benchmarks/benchmark_pipeline.py [--echelles 10000 100000] [--comparer ANCIEN.json]
+#   python benchmarks/benchmark_pipeline.py --comparer ANCIEN.json NOUVEAU.json   (sans exécution)
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+import pandas as pd
+
+dossier_benchmarks = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(dossier_benchmarks)
+sys.path.insert(0, base_dir)
+
+from generer_slices import generer_slices, parametres_generation, PARAMETRES_DEFAUT
+from instrumentation import Instrumentation
+from nettoyage import ExecutionNettoyage, lister_slices, nettoyage_complet
+from chargement_donnees import charger_donnees_nettoyees, iterer_donnees_nettoyees
+from statistiques_flux import AccumulateurMoments, ComptageValeurs, decrire
+from resume_distributions import resumer_distribution
+from agregation_playlists import agreger_playlists
+
+ETAPES = ['nettoyage', 'statistiques_eda', 'agregation_dispersion']
+DOSSIER_RESULTATS = os.path.join(dossier_benchmarks, 'resultats')
+
+# Colonnes lues par les scripts d'analyse
+COLONNES_NUMERIQUES = ['pid', 'num_tracks', 'num_albums', 'num_followers', 'num_edits',
+                       'playlist_duration_ms', 'num_artists', 'pos', 'track_duration_ms']
+COLONNES_DISTRIBUTIONS = ['num_followers', 'num_tracks', 'playlist_duration_ms', 'track_duration_ms',
+                          'num_artists', 'num_albums']
+COLONNES_DISPERSION = ['name', 'pid', 'num_albums', 'num_artists', 'num_tracks',
+                       'artist_name', 'album_name', 'track_name']
+
+# Sorties du nettoyage supprimées avant chaque mesure pour partir d'un dossier identique
+SORTIES_NETTOYAGE = ['alcrowd_cleaned.csv', 'alcrowd_cleaned.parquet', 'dictionnaires_uri']
+
+#################################################################################################
+
+# Étapes mesurées, exécutées dans le processus fils
+
+def mesurer_nettoyage(dossier, instrumentation, taille_lot):
+    for nom in SORTIES_NETTOYAGE:
+        chemin = os.path.join(dossier, nom)
+        if os.path.isdir(chemin):
+            shutil.rmtree(chemin)
+        elif os.path.exists(chemin):
+            os.remove(chemin)
+    json_files = lister_slices(dossier)
+    with instrumentation.etape('nettoyage') as etape:
+        execution = ExecutionNettoyage(dossier, instrumentation)
+        nettoyage_complet(json_files, execution, taille_lot)
+        etape['lignes_sortie'] = execution.nb_lignes
+    etape['octets_entree'] = sum(os.path.getsize(chemin) for chemin in json_files)
+
+
+def mesurer_statistiques_eda(dossier, instrumentation, taille_lot):
+    with instrumentation.etape('statistiques_eda') as etape:
+        moments = AccumulateurMoments(COLONNES_NUMERIQUES)
+        comptages = {col: ComptageValeurs() for col in COLONNES_NUMERIQUES + ['artist_name', 'album_name']}
+        with instrumentation.etape('lecture_par_blocs'):
+            for bloc in iterer_donnees_nettoyees(COLONNES_NUMERIQUES + ['artist_name', 'album_name'], dossier=dossier):
+                moments.ajouter(bloc)
+                for col, comptage in comptages.items():
+                    comptage.ajouter(bloc[col])
+        with instrumentation.etape('describe'):
+            decrire(moments, comptages)
+        with instrumentation.etape('resumes_distributions'):
+            for col in COLONNES_DISTRIBUTIONS:
+                resumer_distribution(comptages[col])
+        with instrumentation.etape('correlation'):
+            moments.correlation()
+        with instrumentation.etape('top20'):
+            for col in ['artist_name', 'album_name']:
+                comptages[col].serie().nlargest(20)
+        etape['lignes_entree'] = moments.n
+
+
+def mesurer_agregation_dispersion(dossier, instrumentation, taille_lot):
+    with instrumentation.etape('agregation_dispersion') as etape:
+        with instrumentation.etape('chargement'):
+            df = charger_donnees_nettoyees(COLONNES_DISPERSION, dossier=dossier)
+        with instrumentation.etape('agregation'):
+            playlists_stats = agreger_playlists(df)
+        etape['lignes_entree'] = len(df)
+        etape['lignes_sortie'] = len(playlists_stats)
+
+
+MESURES = {
+    'nettoyage': mesurer_nettoyage,
+    'statistiques_eda': mesurer_statistiques_eda,
+    'agregation_dispersion': mesurer_agregation_dispersion,
+}
+
+#################################################################################################
+
+# Données synthétiques d'une échelle, générées seulement si absentes ou générées avec d'autres paramètres
+def preparer_donnees(dossier_donnees, nb_playlists, graine):
+    dossier = os.path.join(dossier_donnees, f'mpd-{nb_playlists}')
+    attendus = dict(PARAMETRES_DEFAUT, graine=graine, playlists=nb_playlists)
+    if parametres_generation(dossier) != attendus:
+        shutil.rmtree(dossier, ignore_errors=True)
+        print(f"Génération de {nb_playlists} playlists dans {dossier}...")
+        generer_slices(dossier, nb_playlists, graine=graine)
+    return dossier
+
+
+# Exécution d'une étape dans un processus séparé (pic mémoire propre à l'étape) ; renvoie son rapport
+def executer_etape(etape, dossier, taille_lot, dossier_execution, verbeux):
+    chemin_rapport = os.path.join(dossier_execution, f'{os.path.basename(dossier)}-{etape}.json')
+    commande = [sys.executable, os.path.abspath(__file__), '--etape', etape, '--dossier', dossier,
+                '--batch-size', str(taille_lot), '--rapport', chemin_rapport]
+    with open(chemin_rapport[:-len('.json')] + '.log', 'w', encoding='utf-8') as journal:
+        subprocess.run(commande, check=True, stdout=None if verbeux else journal, stderr=subprocess.STDOUT)
+    with open(chemin_rapport, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Ligne de résultat d'une étape : durée, débits et pic mémoire de l'étape principale du rapport
+def resumer_rapport(rapport, etape, nb_playlists):
+    principale = next(e for e in rapport['etapes'] if e['nom'] == etape and e['parent'] is None)
+    lignes = principale['lignes_entree'] or principale['lignes_sortie']
+    duree = principale['duree_s']
+    resultat = {
+        'echelle': nb_playlists,
+        'etape': etape,
+        'lignes': lignes,
+        'duree_s': round(duree, 3),
+        'cpu_s': round(principale['cpu_s'], 3),
+        'lignes_par_s': round(lignes / duree) if lignes and duree else None,
+        'playlists_par_s': round(nb_playlists / duree) if duree else None,
+        'mo_json_par_s': (round(principale['octets_entree'] / 2**20 / duree, 1)
+                          if principale.get('octets_entree') and duree else None),
+        'pic_rss_mo': rapport['pic_rss_mo'],
+        'sous_etapes': {e['nom']: round(e['duree_s'], 3) for e in rapport['etapes']
+                        if e['parent'] == etape and e['processus'] == 'principal'},
+    }
+    return resultat
+
+
+def commit_git():
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=base_dir, capture_output=True, text=True)
+        return sortie.stdout.strip() or None
+    except OSError:
+        return None
+
+#################################################################################################
+
+# Comparaison de deux fichiers de résultats : rapports des durées et des pics mémoire (nouveau / ancien)
+def comparer(chemin_ancien, chemin_nouveau):
+    tables = []
+    for chemin in (chemin_ancien, chemin_nouveau):
+        with open(chemin, 'r', encoding='utf-8') as f:
+            tables.append(pd.DataFrame(json.load(f)['resultats']).set_index(['echelle', 'etape']))
+    ancien, nouveau = tables
+    comparaison = pd.DataFrame({
+        'duree_ancienne_s': ancien['duree_s'],
+        'duree_nouvelle_s': nouveau['duree_s'],
+        'rapport_duree': nouveau['duree_s'] / ancien['duree_s'],
+        'pic_ancien_mo': ancien['pic_rss_mo'],
+        'pic_nouveau_mo': nouveau['pic_rss_mo'],
+        'rapport_pic': nouveau['pic_rss_mo'] / ancien['pic_rss_mo'],
+    }).dropna(subset=['rapport_duree'])
+    print(f"\nComparaison {os.path.basename(chemin_nouveau)} / {os.path.basename(chemin_ancien)} :")
+    print(comparaison.round(3).to_string())
+    return comparaison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline sur des slices MPD synthétiques.")
+    parser.add_argument('--echelles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Nombres de playlists générées (défaut : 10000 100000 1000000).")
+    parser.add_argument('--etapes', nargs='+', choices=ETAPES, default=ETAPES)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help="Slices par lot pour le nettoyage (0 = tout en mémoire ; défaut : 100).")
+    parser.add_argument('--dossier-donnees', default=os.path.join(dossier_benchmarks, 'donnees'),
+                        help="Dossier des slices synthétiques (défaut : benchmarks/donnees).")
+    parser.add_argument('--comparer', nargs='+', metavar='RESULTATS',
+                        help="Résultats précédents à comparer ; avec deux fichiers, compare sans exécuter.")
+    parser.add_argument('--verbeux', action='store_true', help="Afficher la sortie des étapes.")
+    # Exécution d'une seule étape (processus fils)
+    parser.add_argument('--etape', choices=ETAPES, help=argparse.SUPPRESS)
+    parser.add_argument('--dossier', help=argparse.SUPPRESS)
+    parser.add_argument('--rapport', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.etape:
+        instrumentation = Instrumentation('benchmark_pipeline.py', {'etape': args.etape, 'dossier': args.dossier},
+                                          args.rapport)
+        MESURES[args.etape](args.dossier, instrumentation, args.batch_size)
+        instrumentation.terminer()
+        return
+
+    if args.comparer and len(args.comparer) == 2:
+        comparer(*args.comparer)
+        return
+
+    horodatage = datetime.now()
+    dossier_execution = os.path.join(DOSSIER_RESULTATS, f'pipeline-{horodatage:%Y%m%d-%H%M%S}')
+    os.makedirs(dossier_execution, exist_ok=True)
+
+    resultats = []
+    for nb_playlists in args.echelles:
+        dossier = preparer_donnees(args.dossier_donnees, nb_playlists, args.graine)
+        # Les statistiques et l'agrégation lisent les sorties du nettoyage : il est exécuté (sans être
+        # rapporté) s'il n'est pas demandé et que ses sorties sont absentes
+        etapes = [etape for etape in ETAPES if etape in args.etapes]
+        if 'nettoyage' not in etapes and not os.path.exists(os.path.join(dossier, 'alcrowd_cleaned.csv')):
+            etapes.insert(0, 'nettoyage')
+        for etape in etapes:
+            print(f"{nb_playlists} playlists : {etape}...")
+            rapport = executer_etape(etape, dossier, args.batch_size, dossier_execution, args.verbeux)
+            if etape in args.etapes:
+                resultats.append(resumer_rapport(rapport, etape, nb_playlists))
+
+    tableau = pd.DataFrame(resultats).drop(columns=['sous_etapes'])
+    print("\n" + tableau.to_string(index=False))
+
+    chemin_resultats = dossier_execution + '.json'
+    with open(chemin_resultats, 'w', encoding='utf-8') as f:
+        json.dump({
+            'date': horodatage.isoformat(timespec='seconds'),
+            'commit': commit_git(),
+            'environnement': {'python': platform.python_version(), 'plateforme': platform.platform(),
+                              'processeurs': os.cpu_count(), 'pandas': pd.__version__},
+            'parametres': {'echelles': args.echelles, 'graine': args.graine, 'batch_size': args.batch_size,
+                           'generation': PARAMETRES_DEFAUT},
+            'resultats': resultats,
+        }, f, indent=2)
+    print(f"\nRésultats sauvegardés : {chemin_resultats} (rapports détaillés dans {dossier_execution})")
+
+    if args.comparer:
+        comparer(args.comparer[0], chemin_resultats)
+
+
+if __name__ == "__main__":
+    main()
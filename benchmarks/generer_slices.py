@@ -0,0 +1,221 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script génère des fichiers mpd.slice.*.json synthétiques au format du Million Playlist Dataset,
+# pour mesurer le pipeline sans le jeu de données réel. Les distributions imitent celles du MPD :
+# - nombre de pistes par playlist log-normal (médiane ≈ 49), borné à [5, 250] ;
+# - popularité des pistes selon une loi de Zipf sur un catalogue artistes > albums > pistes dont la
+#   taille croît comme (nombre de playlists)^0,6 et atteint celle du MPD à 1M playlists
+#   (≈ 296 000 artistes, 2,5 albums par artiste, 3 pistes par album) ;
+# - réutilisation des artistes dans une playlist : une piste sur trois environ reprend un artiste
+#   déjà présent, souvent sur le même album ;
+# - followers (Zipf, médiane 1, moyenne ≈ 2,6), modifications (géométrique), 2 % de playlists collaboratives,
+#   2 % de descriptions ;
+# - doublons : une fraction des playlists d'une slice est réémise telle quelle dans la slice suivante
+#   (mêmes clés (pid, pos, track_uri), retirées par le nettoyage), et une fraction des pistes est
+#   répétée dans sa playlist à une autre position.
+# La génération est déterministe pour une graine donnée.
+#
+# Utilisation : python benchmarks/generer_slices.py DOSSIER --playlists 10000 [--taille-slice 1000] [--graine 0]
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import argparse
+import numpy as np
+
+# Noms de playlists les plus fréquents du MPD, tirés selon une loi de Zipf
+NOMS_PLAYLISTS = ['country', 'chill', 'rap', 'workout', 'oldies', 'christmas', 'rock', 'party', 'throwback',
+                  'jams', 'worship', 'summer', 'feels', 'new', 'disney', 'lit', 'throwbacks', 'music', 'sleep',
+                  'vibes', 'gym', 'road trip', 'Country', 'Chill', 'Rap', 'Workout', 'Party', 'summer 2017',
+                  'chill vibes', 'Throwback Thursday', 'love', 'running', 'study', 'hype', 'edm', 'indie',
+                  'relax', 'Summer', 'good vibes', 'slow jams']
+MOTS_DESCRIPTIONS = ['best', 'songs', 'for', 'the', 'road', 'my', 'favorite', 'tracks', 'of', 'all', 'time',
+                     'late', 'night', 'drive', 'music', 'to', 'study']
+
+DEBUT_MODIFICATIONS = 1262304000  # 2010-01-01
+FIN_MODIFICATIONS = 1509494400    # 2017-11-01
+
+PARAMETRES_DEFAUT = {
+    'taille_slice': 1000,
+    'graine': 0,
+    'taux_doublons': 0.01,
+    'taux_repetitions': 0.02,
+    'taux_meme_artiste': 0.35,
+    'exposant_zipf': 1.0,
+}
+
+#################################################################################################
+
+# Catalogue : artistes, albums répartis entre artistes, pistes réparties entre albums.
+# Les pistes d'un album, et celles d'un artiste, sont contiguës : de debut_pistes_album[b] à
+# debut_pistes_album[b + 1] (respectivement debut_pistes_artiste).
+class Catalogue:
+    def __init__(self, nb_playlists, rng, exposant_zipf):
+        nb_artistes = max(50, int(296_000 * (nb_playlists / 1_000_000) ** 0.6))
+        albums_par_artiste = rng.geometric(0.4, nb_artistes)
+        self.artiste_album = np.repeat(np.arange(nb_artistes), albums_par_artiste)
+        pistes_par_album = 1 + rng.poisson(2.1, len(self.artiste_album))
+        self.album_piste = np.repeat(np.arange(len(self.artiste_album)), pistes_par_album)
+        self.artiste_piste = self.artiste_album[self.album_piste]
+        self.debut_pistes_artiste = np.searchsorted(self.artiste_piste, np.arange(nb_artistes + 1))
+        self.debut_pistes_album = np.searchsorted(self.album_piste, np.arange(len(self.artiste_album) + 1))
+        self.duree_piste = np.clip(rng.normal(225_000, 60_000, len(self.album_piste)), 30_000, 900_000).astype(np.int64)
+
+        # Popularité : poids de Zipf attribués aux pistes dans un ordre aléatoire
+        poids = 1.0 / np.arange(1, len(self.album_piste) + 1) ** exposant_zipf
+        self.cumul_popularite = np.cumsum(rng.permutation(poids))
+        self.cumul_popularite /= self.cumul_popularite[-1]
+
+    def __len__(self):
+        return len(self.album_piste)
+
+    def tirer_pistes(self, rng, nb):
+        return np.minimum(np.searchsorted(self.cumul_popularite, rng.random(nb)), len(self) - 1)
+
+
+def uri(genre, identifiant):
+    return f'spotify:{genre}:{identifiant:022x}'
+
+#################################################################################################
+
+# Pistes d'une slice : `longueurs` pistes par playlist, en un tirage vectorisé
+def tirer_pistes_slice(catalogue, longueurs, rng, parametres):
+    total = int(longueurs.sum())
+    debuts = np.repeat(np.cumsum(longueurs) - longueurs, longueurs)
+    position = np.arange(total) - debuts
+    pistes = catalogue.tirer_pistes(rng, total)
+
+    # Reprise d'un artiste déjà présent : une piste du même artiste qu'une piste antérieure de la
+    # playlist, une fois sur deux sur le même album
+    reprise = (position > 0) & (rng.random(total) < parametres['taux_meme_artiste'])
+    source = debuts[reprise] + (rng.random(reprise.sum()) * position[reprise]).astype(np.int64)
+    pistes_source = pistes[source]
+    albums, artistes = catalogue.album_piste[pistes_source], catalogue.artiste_piste[pistes_source]
+    meme_album = rng.random(len(pistes_source)) < 0.5
+    debut = np.where(meme_album, catalogue.debut_pistes_album[albums], catalogue.debut_pistes_artiste[artistes])
+    fin = np.where(meme_album, catalogue.debut_pistes_album[albums + 1], catalogue.debut_pistes_artiste[artistes + 1])
+    pistes[reprise] = debut + (rng.random(len(debut)) * (fin - debut)).astype(np.int64)
+
+    # Répétition d'une piste déjà présente à une autre position
+    repetition = (position > 0) & (rng.random(total) < parametres['taux_repetitions'])
+    source = debuts[repetition] + (rng.random(repetition.sum()) * position[repetition]).astype(np.int64)
+    pistes[repetition] = pistes[source]
+    return pistes, position
+
+
+def generer_playlists(catalogue, premier_pid, nb, rng, parametres):
+    longueurs = np.clip(np.rint(rng.lognormal(np.log(49), 0.75, nb)), 5, 250).astype(np.int64)
+    pistes, positions = tirer_pistes_slice(catalogue, longueurs, rng, parametres)
+    noms = rng.zipf(1.6, nb) - 1
+    followers = rng.zipf(2.3, nb)
+    modifications = rng.geometric(0.08, nb)
+    dates = rng.integers(DEBUT_MODIFICATIONS, FIN_MODIFICATIONS, nb)
+    collaboratives = rng.random(nb) < 0.02
+    descriptions = rng.random(nb) < 0.02
+
+    playlists = []
+    fin = 0
+    for i in range(nb):
+        debut, fin = fin, fin + longueurs[i]
+        ids = pistes[debut:fin]
+        tracks = [{
+            'pos': int(positions[j]),
+            'artist_name': f'Artist {catalogue.artiste_piste[t]}',
+            'track_uri': uri('track', t),
+            'artist_uri': uri('artist', catalogue.artiste_piste[t]),
+            'track_name': f'Track {t}',
+            'album_uri': uri('album', catalogue.album_piste[t]),
+            'duration_ms': int(catalogue.duree_piste[t]),
+            'album_name': f'Album {catalogue.album_piste[t]}',
+        } for j, t in zip(range(debut, fin), ids)]
+        playlist = {
+            'name': NOMS_PLAYLISTS[noms[i] % len(NOMS_PLAYLISTS)],
+            'collaborative': 'true' if collaboratives[i] else 'false',
+            'pid': premier_pid + i,
+            'modified_at': int(dates[i]),
+            'num_tracks': len(tracks),
+            'num_albums': len(np.unique(catalogue.album_piste[ids])),
+            'num_followers': int(followers[i]),
+            'num_edits': int(modifications[i]),
+            'duration_ms': int(catalogue.duree_piste[ids].sum()),
+            'num_artists': len(np.unique(catalogue.artiste_piste[ids])),
+        }
+        if descriptions[i]:
+            playlist['description'] = ' '.join(rng.choice(MOTS_DESCRIPTIONS, rng.integers(2, 8)))
+        playlist['tracks'] = tracks
+        playlists.append(playlist)
+    return playlists
+
+#################################################################################################
+
+# Génération de `nb_playlists` playlists en slices de `taille_slice` dans `dossier`.
+# Renvoie le nombre de playlists écrites (doublons compris) et le nombre de pistes.
+def generer_slices(dossier, nb_playlists, **parametres):
+    parametres = dict(PARAMETRES_DEFAUT, **parametres)
+    os.makedirs(dossier, exist_ok=True)
+    rng = np.random.default_rng(parametres['graine'])
+    catalogue = Catalogue(nb_playlists, rng, parametres['exposant_zipf'])
+    taille_slice = parametres['taille_slice']
+
+    ecrites = pistes = 0
+    precedentes = []
+    for premier_pid in range(0, nb_playlists, taille_slice):
+        nb = min(taille_slice, nb_playlists - premier_pid)
+        playlists = generer_playlists(catalogue, premier_pid, nb, rng, parametres)
+        # Doublons entre slices : des playlists de la slice précédente sont réémises
+        nb_doublons = rng.binomial(len(precedentes), parametres['taux_doublons']) if precedentes else 0
+        doublons = [precedentes[i] for i in sorted(rng.choice(len(precedentes), nb_doublons, replace=False))]
+        nom = f'mpd.slice.{premier_pid}-{premier_pid + taille_slice - 1}'
+        with open(os.path.join(dossier, f'{nom}.json'), 'w', encoding='utf-8') as f:
+            json.dump({'info': {'generated_on': '2017-12-03 08:41:42.057563', 'slice': nom[len('mpd.slice.'):],
+                                'version': 'v1'},
+                       'playlists': playlists + doublons}, f, indent=2)
+        ecrites += len(playlists) + len(doublons)
+        pistes += sum(len(playlist['tracks']) for playlist in playlists + doublons)
+        precedentes = playlists
+
+    with open(os.path.join(dossier, 'parametres_generation.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(parametres, playlists=nb_playlists), f, indent=2, sort_keys=True)
+    return ecrites, pistes
+
+
+# Paramètres de la génération présente dans `dossier`, ou None
+def parametres_generation(dossier):
+    chemin = os.path.join(dossier, 'parametres_generation.json')
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de slices MPD synthétiques.")
+    parser.add_argument('dossier', help="Dossier de sortie des fichiers mpd.slice.*.json.")
+    parser.add_argument('--playlists', type=int, default=10_000, help="Nombre de playlists (défaut : 10 000).")
+    parser.add_argument('--taille-slice', type=int, default=PARAMETRES_DEFAUT['taille_slice'])
+    parser.add_argument('--graine', type=int, default=PARAMETRES_DEFAUT['graine'])
+    parser.add_argument('--taux-doublons', type=float, default=PARAMETRES_DEFAUT['taux_doublons'],
+                        help="Fraction des playlists réémises dans la slice suivante (défaut : 0.01).")
+    parser.add_argument('--taux-repetitions', type=float, default=PARAMETRES_DEFAUT['taux_repetitions'],
+                        help="Fraction des pistes répétées dans leur playlist (défaut : 0.02).")
+    parser.add_argument('--taux-meme-artiste', type=float, default=PARAMETRES_DEFAUT['taux_meme_artiste'],
+                        help="Fraction des pistes reprenant un artiste déjà présent (défaut : 0.35).")
+    parser.add_argument('--exposant-zipf', type=float, default=PARAMETRES_DEFAUT['exposant_zipf'],
+                        help="Exposant de la loi de popularité des pistes (défaut : 1.0).")
+    args = parser.parse_args()
+
+    parametres = {cle: getattr(args, cle) for cle in PARAMETRES_DEFAUT}
+    ecrites, pistes = generer_slices(args.dossier, args.playlists, **parametres)
+    print(f"{ecrites} playlists ({pistes} pistes) écrites dans {args.dossier}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module calcule les intervalles de confiance bootstrap des indicateurs de l'hypothèse de
+# dispersion album/artiste, par catégorie de taille de playlist et sur toutes les playlists :
+# - ratio moyen albums/artistes (playlists sans artiste exclues : leur ratio n'est pas défini) ;
+# - pourcentage de playlists avec plus d'albums que d'artistes (toutes les playlists, comme
+#   `statistiques_dispersion.calculer_resultats` et le cube) ;
+# - tailles d'effet de la différence albums - artistes : d de Cohen apparié (d_z, moyenne des
+#   différences / écart-type des différences) et corrélation rang-bisériale appariée
+#   ((W+ - W-) / (W+ + W-), W+ et W- étant les sommes de rangs du test de Wilcoxon).
+# Sur des millions de playlists, la p-value de Wilcoxon est toujours ~0 : les intervalles et les
+# tailles d'effet disent de combien les playlists ont plus d'albums que d'artistes, et avec quelle précision.
+#
+# Un tirage bootstrap (n playlists tirées avec remise) ne dépend que du nombre de fois où chaque playlist
+# est tirée ; toutes les statistiques ci-dessus ne dépendent que du couple (albums, artistes) de chaque
+# playlist. Les playlists sont donc regroupées par couple distinct, et le nombre de tirages de chaque
+# couple suit une loi multinomiale (n, fréquences des couples) : les rééchantillons sont tirés par lots
+# avec rng.multinomial, puis toutes les statistiques sont des produits matriciels sur les comptes.
+# Le coût est en O(rééchantillons x couples distincts), indépendant du nombre de playlists et sans boucle
+# Python par rééchantillon ; la mémoire est bornée par CELLULES_MAX comptes par lot.
+#
+# Les catégories sont traitées en parallèle (un processus par catégorie) ; chacune a son propre flux
+# aléatoire dérivé de la graine (SeedSequence.spawn) : les résultats ne dépendent pas du nombre de processus.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from statistiques_dispersion import categoriser_taille
+
+# Nombre maximal de comptes (rééchantillons x couples distincts) tirés par lot
+CELLULES_MAX = 4_000_000
+
+# Statistiques estimées, dans l'ordre des colonnes du tableau
+STATISTIQUES = ['ratio_moyen', 'pct_plus_albums', 'd_z', 'rang_biserial']
+
+#################################################################################################
+
+# Couples (albums, artistes) distincts et leur nombre de playlists. Les playlists sans artiste sont
+# gardées : seul leur ratio n'est pas défini (`Couples`).
+def couples_distincts(albums, artistes):
+    albums = np.asarray(albums, dtype=np.float64)
+    artistes = np.asarray(artistes, dtype=np.float64)
+    valides = np.isfinite(albums) & np.isfinite(artistes)
+    couples, comptes = np.unique(np.column_stack([albums[valides], artistes[valides]]), axis=0, return_counts=True)
+    return couples[:, 0], couples[:, 1], comptes
+
+
+# Préparation des valeurs par couple : ratio (0 et non défini sans artiste), différence, indicateur
+# "plus d'albums" et groupes de rangs de |différence| (différences nulles exclues, comme stats.wilcoxon par
+# défaut). Les couples sont triés par |différence| pour que chaque groupe d'ex aequo soit un intervalle
+# contigu de colonnes. Seul le ratio moyen écarte les playlists sans artiste.
+class Couples:
+    def __init__(self, albums, artistes, comptes):
+        diff = albums - artistes
+        ordre = np.argsort(np.abs(diff), kind='stable')
+        self.comptes = comptes[ordre]
+        definis = artistes[ordre] > 0
+        self.ratio_defini = definis.astype(np.float64)
+        self.ratio = np.where(definis, albums[ordre] / np.where(definis, artistes[ordre], 1), 0)
+        self.diff = diff[ordre]
+        self.plus = (self.diff > 0).astype(np.float64)
+        self.moins = (self.diff < 0).astype(np.float64)
+        abs_diff = np.abs(self.diff)
+        # Premier couple de chaque groupe de |différence| non nulle
+        self.debut_rangs = int(np.searchsorted(abs_diff, 0, side='right'))
+        non_nuls = abs_diff[self.debut_rangs:]
+        self.groupes = self.debut_rangs + np.flatnonzero(np.r_[True, non_nuls[1:] != non_nuls[:-1]]) \
+            if len(non_nuls) else np.array([], dtype=np.int64)
+
+    # Statistiques d'un lot de vecteurs de comptes (une ligne par rééchantillon, une colonne par couple)
+    def statistiques(self, comptes):
+        comptes = np.atleast_2d(comptes).astype(np.float64)
+        n = comptes.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio_moyen = comptes @ self.ratio / (comptes @ self.ratio_defini)
+            pct_plus = comptes @ self.plus / n * 100
+            moyenne = comptes @ self.diff / n
+            variance = (comptes @ self.diff ** 2 - n * moyenne ** 2) / (n - 1)
+            d_z = moyenne / np.sqrt(np.maximum(variance, 0))
+            rang_biserial = self.rang_biserial(comptes)
+        return np.column_stack([ratio_moyen, pct_plus, d_z, rang_biserial])
+
+    # Corrélation rang-bisériale appariée : chaque groupe d'ex aequo de |différence| reçoit le rang moyen
+    # des positions qu'il occupe, calculé pour tous les rééchantillons à la fois
+    def rang_biserial(self, comptes):
+        if not len(self.groupes):
+            return np.full(len(comptes), np.nan)
+        par_groupe = np.add.reduceat(comptes, self.groupes, axis=1)
+        plus = np.add.reduceat(comptes * self.plus, self.groupes, axis=1)
+        moins = np.add.reduceat(comptes * self.moins, self.groupes, axis=1)
+        rangs = np.cumsum(par_groupe, axis=1) - (par_groupe - 1) / 2
+        somme_plus = (plus * rangs).sum(axis=1)
+        somme_moins = (moins * rangs).sum(axis=1)
+        return (somme_plus - somme_moins) / (somme_plus + somme_moins)
+
+
+# Intervalles de confiance percentiles d'une catégorie : valeurs observées, bornes basse et haute
+def intervalles_categorie(albums, artistes, comptes, resamples, niveau, graine):
+    couples = Couples(albums, artistes, comptes)
+    n = int(couples.comptes.sum())
+    observees = couples.statistiques(couples.comptes)[0]
+    if n == 0:
+        return n, observees, np.full(len(STATISTIQUES), np.nan), np.full(len(STATISTIQUES), np.nan)
+    rng = np.random.default_rng(graine)
+    frequences = couples.comptes / n
+    taille_lot = max(1, CELLULES_MAX // len(frequences))
+    tirages = []
+    for debut in range(0, resamples, taille_lot):
+        lot = rng.multinomial(n, frequences, size=min(taille_lot, resamples - debut))
+        tirages.append(couples.statistiques(lot))
+    tirages = np.concatenate(tirages)
+    alpha = (1 - niveau) / 2
+    bas, haut = np.nanquantile(tirages, [alpha, 1 - alpha], axis=0)
+    return n, observees, bas, haut
+
+
+def executer_categorie(arguments):
+    return intervalles_categorie(**arguments)
+
+#################################################################################################
+
+# Tableau des intervalles bootstrap par catégorie de taille (et 'Total') : nombre de playlists, puis
+# pour chaque statistique sa valeur observée et les bornes de son intervalle au niveau `niveau`.
+# Les catégories sont traitées dans un pool de `workers` processus (tous les cœurs par défaut).
+def intervalles_bootstrap(playlists_stats, resamples=2000, niveau=0.95, graine=0, workers=None):
+    categories = categoriser_taille(playlists_stats['num_tracks'])
+    albums = playlists_stats['albums_uniques_reels'].to_numpy()
+    artistes = playlists_stats['artistes_uniques_reels'].to_numpy()
+    groupes = [(str(categorie), (categories == categorie).to_numpy()) for categorie in categories.cat.categories]
+    groupes.append(('Total', np.ones(len(playlists_stats), dtype=bool)))
+    graines = np.random.SeedSequence(graine).spawn(len(groupes))
+    taches = []
+    for (_, masque), graine_categorie in zip(groupes, graines):
+        albums_couples, artistes_couples, comptes = couples_distincts(albums[masque], artistes[masque])
+        taches.append({'albums': albums_couples, 'artistes': artistes_couples, 'comptes': comptes,
+                       'resamples': resamples, 'niveau': niveau, 'graine': graine_categorie})
+
+    workers = min(workers or os.cpu_count() or 1, len(taches))
+    if workers <= 1:
+        sorties = [executer_categorie(tache) for tache in taches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            sorties = list(executor.map(executer_categorie, taches))
+
+    lignes = []
+    for n, observees, bas, haut in sorties:
+        ligne = {'nb_playlists': n}
+        for i, statistique in enumerate(STATISTIQUES):
+            ligne.update({statistique: observees[i], f'{statistique}_bas': bas[i], f'{statistique}_haut': haut[i]})
+        lignes.append(ligne)
+    tableau = pd.DataFrame(lignes, index=pd.Index([nom for nom, _ in groupes], name='categorie_taille'))
+    tableau.attrs.update(resamples=resamples, niveau=niveau, graine=graine)
+    return tableau
+
+
+# Affichage du tableau : une ligne par catégorie, chaque statistique avec son intervalle
+def formater_intervalles(tableau, niveau):
+    formats = {'ratio_moyen': '{:.3f}', 'pct_plus_albums': '{:.1f}', 'd_z': '{:.3f}', 'rang_biserial': '{:.3f}'}
+    affichage = pd.DataFrame(index=tableau.index)
+    affichage['playlists'] = tableau['nb_playlists']
+    for statistique, fmt in formats.items():
+        affichage[statistique] = [
+            f"{fmt.format(valeur)} [{fmt.format(bas)} ; {fmt.format(haut)}]"
+            for valeur, bas, haut in tableau[[statistique, f'{statistique}_bas', f'{statistique}_haut']].to_numpy()]
+    return f"Intervalles de confiance bootstrap à {niveau:.0%} :\n{affichage.to_string()}"
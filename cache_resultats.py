@@ -0,0 +1,215 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module gère le cache des résultats des scripts d'analyse (`album_unique_artistes.py`) :
+# Une entrée est adressée par une clé SHA-256 calculée à partir de l'empreinte du contenu des données
+# nettoyées, des sources des modules qui produisent les résultats et des paramètres de la commande.
+# Elle contient les tables intermédiaires (pickle pandas), les valeurs (JSON) et une copie des
+# fichiers produits (figures, CSV) : sur un succès, le script saute calcul et rendu.
+# La taille totale est bornée : les entrées les moins récemment utilisées sont supprimées (LRU).
+#
+# L'empreinte SHA-256 d'un fichier de données n'est recalculée que si sa taille ou sa date de
+# modification a changé (mémorisée dans l'index du cache, comme pour le manifeste des slices). L'index en
+# garde une par chemin, remplacée quand le fichier change ; celles des fichiers supprimés (partitions
+# Parquet de slices disparues) sont retirées à l'éviction.
+#
+# Utilisation en ligne de commande :
+#   python cache_resultats.py lister
+#   python cache_resultats.py invalider            (toutes les entrées)
+#   python cache_resultats.py invalider --cle 3fa2  (entrées dont la clé commence par 3fa2)
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import pandas as pd
+
+from manifeste_slices import sha256_fichier
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DOSSIER_CACHE = os.path.join(base_dir, 'alcrowd', 'cache_resultats')
+TAILLE_MAX_MO = 500
+
+#################################################################################################
+
+# Empreinte du contenu d'un script et des modules dont dépendent ses résultats
+def empreinte_sources(modules):
+    empreinte = hashlib.sha256()
+    for module in sorted(modules):
+        empreinte.update(module.encode())
+        with open(os.path.join(base_dir, module), 'rb') as f:
+            empreinte.update(f.read())
+    return empreinte.hexdigest()
+
+
+def taille_dossier(dossier):
+    return sum(os.path.getsize(os.path.join(racine, nom))
+               for racine, _, noms in os.walk(dossier) for nom in noms)
+
+
+class CacheResultats:
+    def __init__(self, dossier=DOSSIER_CACHE, taille_max_mo=TAILLE_MAX_MO):
+        self.dossier = dossier
+        self.taille_max = taille_max_mo * 1024 * 1024
+        self.chemin_index = os.path.join(dossier, 'index.json')
+        self.index = self.charger_index()
+
+    def charger_index(self):
+        if not os.path.exists(self.chemin_index):
+            return {'entrees': {}, 'empreintes_fichiers': {}}
+        with open(self.chemin_index, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def sauvegarder_index(self):
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin_temporaire = self.chemin_index + '.tmp'
+        with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(chemin_temporaire, self.chemin_index)
+
+    #############################################################################################
+
+    # Empreinte SHA-256 d'un fichier, mémorisée tant que sa taille et sa date de modification ne changent pas
+    def empreinte_fichier(self, chemin):
+        stat = os.stat(chemin)
+        memo = self.index['empreintes_fichiers'].get(chemin)
+        if memo is not None and memo['taille'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['sha256']
+        sha256 = sha256_fichier(chemin)
+        self.index['empreintes_fichiers'][chemin] = {'taille': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                                     'sha256': sha256}
+        return sha256
+
+    # Empreinte du contenu des données : un fichier ou tous les fichiers d'un dossier (Parquet partitionné)
+    def empreinte_donnees(self, chemin):
+        if os.path.isdir(chemin):
+            fichiers = sorted(os.path.join(racine, nom) for racine, _, noms in os.walk(chemin) for nom in noms)
+        else:
+            fichiers = [chemin]
+        empreinte = hashlib.sha256()
+        for fichier in fichiers:
+            empreinte.update(os.path.relpath(fichier, chemin).encode())
+            empreinte.update(self.empreinte_fichier(fichier).encode())
+        return empreinte.hexdigest()
+
+    # Clé d'une entrée : données, version des sources et paramètres
+    def cle(self, chemin_donnees, modules, parametres):
+        contenu = {
+            'donnees': self.empreinte_donnees(chemin_donnees),
+            'sources': empreinte_sources(modules),
+            'parametres': parametres,
+        }
+        cle = hashlib.sha256(json.dumps(contenu, sort_keys=True).encode()).hexdigest()
+        self.sauvegarder_index()
+        return cle
+
+    #############################################################################################
+
+    # Contenu d'une entrée ({'tables', 'valeurs'}) ou None. Sur un succès, les fichiers produits sont
+    # restaurés à leur emplacement d'origine et l'entrée devient la plus récemment utilisée.
+    def lire(self, cle):
+        entree = self.index['entrees'].get(cle)
+        dossier_entree = os.path.join(self.dossier, cle)
+        if entree is None or not os.path.isdir(dossier_entree):
+            return None
+        try:
+            tables = {nom: pd.read_pickle(os.path.join(dossier_entree, f'{nom}.pkl')) for nom in entree['tables']}
+            with open(os.path.join(dossier_entree, 'valeurs.json'), 'r', encoding='utf-8') as f:
+                valeurs = json.load(f)
+            for nom, destination in entree['fichiers'].items():
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copyfile(os.path.join(dossier_entree, 'fichiers', nom), destination)
+        except (OSError, ValueError) as erreur:
+            print(f"Entrée de cache {cle[:12]} illisible ({erreur}) : elle est supprimée.")
+            self.supprimer(cle)
+            return None
+        entree['dernier_acces'] = time.time()
+        self.sauvegarder_index()
+        return {'tables': tables, 'valeurs': valeurs}
+
+    # Enregistrement d'une entrée : tables pandas, valeurs sérialisables en JSON et fichiers produits
+    def enregistrer(self, cle, tables, valeurs, fichiers):
+        dossier_entree = os.path.join(self.dossier, cle)
+        dossier_temporaire = dossier_entree + '.tmp'
+        shutil.rmtree(dossier_temporaire, ignore_errors=True)
+        os.makedirs(os.path.join(dossier_temporaire, 'fichiers'))
+        for nom, table in tables.items():
+            table.to_pickle(os.path.join(dossier_temporaire, f'{nom}.pkl'))
+        with open(os.path.join(dossier_temporaire, 'valeurs.json'), 'w', encoding='utf-8') as f:
+            json.dump(valeurs, f, indent=2)
+        noms_fichiers = {}
+        for chemin in fichiers:
+            noms_fichiers[os.path.basename(chemin)] = chemin
+            shutil.copyfile(chemin, os.path.join(dossier_temporaire, 'fichiers', os.path.basename(chemin)))
+        shutil.rmtree(dossier_entree, ignore_errors=True)
+        os.replace(dossier_temporaire, dossier_entree)
+
+        self.index['entrees'][cle] = {
+            'tables': sorted(tables), 'fichiers': noms_fichiers,
+            'taille': taille_dossier(dossier_entree), 'cree': time.time(), 'dernier_acces': time.time(),
+        }
+        self.evincer()
+        self.sauvegarder_index()
+
+    # Éviction LRU : suppression des entrées les moins récemment utilisées au-delà de la taille maximale,
+    # et des empreintes mémorisées de fichiers qui n'existent plus
+    def evincer(self):
+        empreintes = self.index['empreintes_fichiers']
+        for chemin in [chemin for chemin in empreintes if not os.path.exists(chemin)]:
+            del empreintes[chemin]
+        entrees = sorted(self.index['entrees'].items(), key=lambda item: item[1]['dernier_acces'])
+        total = sum(entree['taille'] for _, entree in entrees)
+        for cle, entree in entrees:
+            if total <= self.taille_max:
+                break
+            print(f"Cache plein : suppression de l'entrée {cle[:12]} ({entree['taille'] / 2**20:.1f} Mo).")
+            self.supprimer(cle)
+            total -= entree['taille']
+
+    def supprimer(self, cle):
+        shutil.rmtree(os.path.join(self.dossier, cle), ignore_errors=True)
+        self.index['entrees'].pop(cle, None)
+        self.sauvegarder_index()
+
+    # Suppression des entrées dont la clé commence par `prefixe` (toutes sans préfixe) ; renvoie leur nombre
+    def invalider(self, prefixe=''):
+        cles = [cle for cle in self.index['entrees'] if cle.startswith(prefixe)]
+        for cle in cles:
+            self.supprimer(cle)
+        if not prefixe:
+            self.index['empreintes_fichiers'] = {}
+            self.sauvegarder_index()
+        return len(cles)
+
+#################################################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gestion du cache des résultats d'analyse.")
+    parser.add_argument('--dossier', default=DOSSIER_CACHE, help="Dossier du cache.")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    commandes.add_parser('lister', help="Afficher les entrées du cache.")
+    invalider = commandes.add_parser('invalider', help="Supprimer des entrées du cache.")
+    invalider.add_argument('--cle', default='', help="Préfixe des clés à supprimer (défaut : toutes).")
+    args = parser.parse_args()
+
+    cache = CacheResultats(args.dossier)
+    if args.commande == 'lister':
+        entrees = sorted(cache.index['entrees'].items(), key=lambda item: item[1]['dernier_acces'], reverse=True)
+        for cle, entree in entrees:
+            acces = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entree['dernier_acces']))
+            print(f"{cle[:12]}  {entree['taille'] / 2**20:8.1f} Mo  dernier accès {acces}  "
+                  f"{len(entree['fichiers'])} fichier(s)")
+        total = sum(entree['taille'] for entree in cache.index['entrees'].values())
+        print(f"{len(entrees)} entrée(s), {total / 2**20:.1f} Mo sur {cache.taille_max / 2**20:.0f} Mo.")
+    else:
+        print(f"{cache.invalider(args.cle)} entrée(s) supprimée(s).")
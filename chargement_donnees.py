@@ -0,0 +1,124 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe le chargement des données nettoyées utilisé par les scripts d'analyse :
+# Privilégier la version colonnaire typée (`alcrowd_cleaned.parquet`) produite par `nettoyage.py`.
+# Revenir au CSV (`alcrowd_cleaned.csv`) si le Parquet est absent, plus ancien que le CSV ou si pyarrow n'est pas installé.
+# Ne lire que les colonnes utiles à chaque script (projection de colonnes), éventuellement par blocs.
+# Appliquer le schéma compact de `schema_donnees.py` (URIs et noms en catégories, entiers réduits).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import pandas as pd
+
+from schema_donnees import COLONNES_URI, DictionnaireUri, appliquer_schema, chemin_dictionnaire
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DOSSIER_DONNEES = os.path.join(base_dir, 'alcrowd')
+
+#################################################################################################
+
+# Chemin du fichier à lire : le Parquet s'il est disponible et à jour, sinon le CSV
+def chemin_donnees_nettoyees(dossier=DOSSIER_DONNEES):
+    csv_path = os.path.join(dossier, 'alcrowd_cleaned.csv')
+    parquet_path = os.path.join(dossier, 'alcrowd_cleaned.parquet')
+
+    if PYARROW_DISPONIBLE and os.path.exists(parquet_path):
+        if not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            return parquet_path
+    if os.path.exists(csv_path):
+        return csv_path
+    raise FileNotFoundError(f"Le fichier de données nettoyées n'a pas été trouvé : {csv_path}\n"
+                            "Pensez à dans un premier temps, exécuter le script de nettoyage des données.")
+
+
+# Masque des lignes satisfaisant tous les filtres [(colonne, '==' ou 'in', valeur), ...]
+def masque_filtres(df, filtres):
+    masque = pd.Series(True, index=df.index)
+    for col, operateur, valeur in filtres:
+        if operateur == '==':
+            masque &= df[col] == valeur
+        elif operateur == 'in':
+            masque &= df[col].isin(list(valeur))
+        else:
+            raise ValueError(f"Opérateur de filtre non pris en charge : {operateur}")
+    return masque
+
+
+# Chargement des données nettoyées, limité aux colonnes demandées (toutes si colonnes=None).
+# Avec compact=True, le schéma compact est appliqué (les codes d'URIs du Parquet sont décodés
+# en catégories grâce aux tables de correspondance).
+# Les filtres sont appliqués à la lecture du Parquet (seuls les groupes de lignes utiles sont lus) ;
+# les colonnes filtrées doivent figurer dans `colonnes`.
+def charger_donnees_nettoyees(colonnes=None, dossier=DOSSIER_DONNEES, compact=True, filtres=None):
+    data_path = chemin_donnees_nettoyees(dossier)
+
+    if data_path.endswith('.parquet'):
+        df = pd.read_parquet(data_path, columns=colonnes, filters=filtres)
+    else:
+        df = pd.read_csv(data_path, usecols=colonnes, parse_dates=colonnes_dates(colonnes))
+        if filtres:
+            df = df[masque_filtres(df, filtres)].reset_index(drop=True)
+
+    df = preparer_donnees(df, colonnes, dossier, compact)
+    print(f"Données chargées depuis '{data_path}'.")
+    return df
+
+
+# Lecture par blocs d'au plus `taille_bloc` lignes, pour les traitements qui ne peuvent pas charger
+# toute la table en mémoire. Chaque bloc est préparé comme par `charger_donnees_nettoyees`.
+def iterer_donnees_nettoyees(colonnes=None, taille_bloc=1_000_000, dossier=DOSSIER_DONNEES, compact=True):
+    data_path = chemin_donnees_nettoyees(dossier)
+    print(f"Lecture par blocs de {taille_bloc} lignes depuis '{data_path}'.")
+    dictionnaires = {}
+
+    if data_path.endswith('.parquet'):
+        import pyarrow.dataset as ds
+        for lot in ds.dataset(data_path, format='parquet').to_batches(columns=colonnes, batch_size=taille_bloc):
+            if lot.num_rows:
+                yield preparer_donnees(lot.to_pandas(), colonnes, dossier, compact, dictionnaires)
+    else:
+        for df in pd.read_csv(data_path, usecols=colonnes, parse_dates=colonnes_dates(colonnes),
+                              chunksize=taille_bloc):
+            yield preparer_donnees(df, colonnes, dossier, compact, dictionnaires)
+
+
+def colonnes_dates(colonnes):
+    return ['modified_at'] if colonnes is None or 'modified_at' in colonnes else None
+
+
+# Mise en forme commune aux lectures complètes et par blocs : ordre des colonnes, décodage des URIs
+# du Parquet, schéma compact et catégories triées
+def preparer_donnees(df, colonnes, dossier, compact, dictionnaires=None):
+    if dictionnaires is None:
+        dictionnaires = {}
+    if colonnes is not None:
+        # usecols conserve l'ordre du fichier : on rétablit l'ordre demandé
+        df = df[colonnes]
+    for col in COLONNES_URI:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            if col not in dictionnaires:
+                dictionnaires[col] = DictionnaireUri.charger(chemin_dictionnaire(dossier, col))
+            df[col] = dictionnaires[col].decoder(df[col].to_numpy())
+
+    if compact:
+        df = appliquer_schema(df)
+
+    # Catégories triées comme le texte : les groupby/tris donnent le même ordre qu'avec le CSV
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df
@@ -0,0 +1,352 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module tient à jour les classements des artistes et des albums les plus fréquents (nombre de
+# pistes), par mois de `modified_at`, sans relire l'historique :
+# - un résumé des valeurs fréquentes par mois et par colonne (Space-Saving sous sa forme Misra-Gries,
+#   fusionnable) : au plus `capacite` compteurs. Fusionner deux résumés additionne leurs compteurs puis,
+#   au-delà de `capacite`, retire à tous la valeur du (capacite+1)-ième compteur et ne garde que les
+#   compteurs positifs. Le total retiré `delta` borne l'erreur : pour toute valeur, compte réel - delta
+#   <= compteur <= compte réel, avec delta <= (N - somme des compteurs) / (capacite + 1). Toute valeur
+#   dont le compte réel dépasse delta est donc dans le résumé ;
+# - un sketch Count-Min par mois et par colonne (profondeur x largeur compteurs) : son estimation
+#   majore le compte réel et le dépasse d'au plus e / largeur * N avec une probabilité d'au moins
+#   1 - exp(-profondeur). Il resserre la borne haute des valeurs du classement.
+# Les résumés et les sketches des mois d'une période (un trimestre par exemple) se fusionnent pour donner
+# son classement, avec les mêmes garanties rapportées au nombre de pistes de la période.
+#
+# `nettoyage.py` ajoute chaque lot nettoyé aux classements et les enregistre dans `alcrowd/classements/`.
+# Les résumés ne savent pas retirer une slice : si une slice déjà comptée est modifiée ou supprimée,
+# les classements sont reconstruits à partir des données nettoyées.
+#
+# Utilisation :
+#   python classements_frequents.py --colonne artist_name --trimestre 2017-T1 [--n 20] [--figure]
+#   python classements_frequents.py --colonne album_name --debut 2016-06 --fin 2016-12
+#   python classements_frequents.py --mois                  (mois couverts et nombre de pistes)
+#   python classements_frequents.py --reconstruire          (à partir des données nettoyées)
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from chargement_donnees import DOSSIER_DONNEES, iterer_donnees_nettoyees
+
+DOSSIER_CLASSEMENTS = os.path.join(DOSSIER_DONNEES, 'classements')
+VERSION_CLASSEMENTS = 1
+
+# Colonnes classées (celles du Top 20 de l'analyse exploratoire)
+COLONNES_CLASSEES = ['artist_name', 'album_name']
+
+# Nombre de compteurs par résumé et dimensions des sketches Count-Min (erreur e / 2719 ~ 0.1 % des
+# pistes du mois, probabilité d'échec exp(-5) ~ 0.7 %)
+CAPACITE = 1000
+LARGEUR_COUNTMIN = 2719
+PROFONDEUR_COUNTMIN = 5
+
+#################################################################################################
+
+# Résumé des valeurs fréquentes : compteurs (minorants des comptes réels), total des poids ajoutés
+# et erreur maximale `delta`
+class ResumeFrequents:
+    def __init__(self, capacite=CAPACITE, comptes=None, n=0, delta=0):
+        self.capacite = capacite
+        self.comptes = comptes if comptes is not None else pd.Series(dtype=np.int64)
+        self.n = int(n)
+        self.delta = int(delta)
+
+    # Ajout de comptes exacts (Series valeur -> nombre de pistes)
+    def ajouter(self, comptes):
+        return self.fusionner(ResumeFrequents(self.capacite, comptes.astype(np.int64), comptes.sum()))
+
+    def fusionner(self, autre):
+        # Somme des compteurs par valeur (factorize + bincount, plus rapide que l'alignement d'index)
+        valeurs = np.concatenate([self.comptes.index.to_numpy(dtype=object),
+                                  autre.comptes.index.to_numpy(dtype=object)])
+        codes, distinctes = pd.factorize(valeurs)
+        sommes = np.bincount(codes, weights=np.concatenate([self.comptes.to_numpy(), autre.comptes.to_numpy()]),
+                             minlength=len(distinctes))
+        comptes = pd.Series(sommes.astype(np.int64), index=distinctes)
+        self.n += autre.n
+        self.delta += autre.delta
+        if len(comptes) > self.capacite:
+            seuil = int(np.partition(comptes.to_numpy(), len(comptes) - self.capacite - 1)[
+                len(comptes) - self.capacite - 1])
+            comptes = comptes[comptes > seuil] - seuil
+            self.delta += seuil
+        self.comptes = comptes
+        return self
+
+    def copier(self):
+        return ResumeFrequents(self.capacite, self.comptes.copy(), self.n, self.delta)
+
+
+# Hachages 64 bits des valeurs (ne dépendent que du texte, comme hyperloglog.hacher_valeurs)
+def hacher(valeurs):
+    return pd.util.hash_array(np.asarray(valeurs, dtype=object))
+
+
+class CountMin:
+    def __init__(self, largeur=LARGEUR_COUNTMIN, profondeur=PROFONDEUR_COUNTMIN, tables=None):
+        self.tables = tables if tables is not None else np.zeros((profondeur, largeur), dtype=np.int64)
+
+    # Colonne de chaque valeur dans chaque ligne : double hachage (h1 + i * h2) modulo la largeur
+    def positions(self, hachages):
+        profondeur, largeur = self.tables.shape
+        h1 = hachages & np.uint64(0xFFFFFFFF)
+        h2 = (hachages >> np.uint64(32)) | np.uint64(1)
+        lignes = np.arange(profondeur, dtype=np.uint64)[:, np.newaxis]
+        return ((h1 + lignes * h2) % np.uint64(largeur)).astype(np.int64)
+
+    def ajouter(self, hachages, poids):
+        positions = self.positions(hachages)
+        for ligne in range(len(self.tables)):
+            np.add.at(self.tables[ligne], positions[ligne], poids)
+
+    def estimer(self, hachages):
+        positions = self.positions(hachages)
+        return self.tables[np.arange(len(self.tables))[:, np.newaxis], positions].min(axis=0)
+
+    def fusionner(self, autre):
+        self.tables += autre.tables
+        return self
+
+    def copier(self):
+        return CountMin(tables=self.tables.copy())
+
+#################################################################################################
+
+# Mois d'une colonne de dates, en entiers AAAAMM (NaN pour une date manquante), et leur libellé 'AAAA-MM'
+def mois_dates(dates):
+    dates = pd.to_datetime(dates)
+    return dates.dt.year * 100 + dates.dt.month
+
+
+def libelle_mois(mois):
+    return f"{int(mois) // 100:04d}-{int(mois) % 100:02d}"
+
+
+# Premier et dernier mois d'un trimestre 'AAAA-Tn'
+def mois_trimestre(trimestre):
+    annee, numero = trimestre.upper().split('-T')
+    if int(numero) not in (1, 2, 3, 4):
+        raise ValueError(f"Trimestre attendu au format AAAA-T1 à AAAA-T4 : {trimestre}")
+    debut = 3 * int(numero) - 2
+    return f"{int(annee):04d}-{debut:02d}", f"{int(annee):04d}-{debut + 2:02d}"
+
+
+# Classements par mois de chaque colonne de `colonnes`, avec la liste des slices déjà comptées
+class ClassementsMensuels:
+    def __init__(self, colonnes=COLONNES_CLASSEES, capacite=CAPACITE, largeur=LARGEUR_COUNTMIN,
+                 profondeur=PROFONDEUR_COUNTMIN):
+        self.colonnes = list(colonnes)
+        self.capacite = capacite
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.resumes = {col: {} for col in self.colonnes}
+        self.sketches = {col: {} for col in self.colonnes}
+        self.slices = []
+
+    @property
+    def mois(self):
+        return sorted(set().union(*(resumes.keys() for resumes in self.resumes.values())))
+
+    # Ajout des pistes d'un lot nettoyé (colonnes 'modified_at' et `colonnes`) provenant de `slices`.
+    # Les comptes exacts du lot sont calculés par couple (mois, valeur) ; chaque valeur distincte du lot
+    # n'est convertie en texte et hachée qu'une fois.
+    def ajouter(self, df, slices=()):
+        mois = mois_dates(df['modified_at']).to_numpy(dtype=np.float64)
+        for col in self.colonnes:
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codes, distinctes = serie.cat.codes.to_numpy(), serie.cat.categories
+            else:
+                codes, distinctes = pd.factorize(serie)
+            distinctes = np.asarray(distinctes, dtype=object).astype(str).astype(object)
+            hachages = hacher(distinctes)
+            valides = (codes >= 0) & ~np.isnan(mois)
+            cles, comptes = np.unique(mois[valides].astype(np.int64) * len(distinctes) + codes[valides],
+                                      return_counts=True)
+            cles_mois, codes_valeurs = np.divmod(cles, len(distinctes))
+            # Les clés sont triées par mois : un intervalle contigu par mois
+            mois_presents, debuts = np.unique(cles_mois, return_index=True)
+            fins = np.append(debuts[1:], len(cles))
+            for cle_mois, debut, fin in zip(mois_presents, debuts, fins):
+                m = libelle_mois(cle_mois)
+                if m not in self.resumes[col]:
+                    self.resumes[col][m] = ResumeFrequents(self.capacite)
+                    self.sketches[col][m] = CountMin(self.largeur, self.profondeur)
+                codes_mois = codes_valeurs[debut:fin]
+                self.resumes[col][m].ajouter(pd.Series(comptes[debut:fin], index=distinctes[codes_mois]))
+                self.sketches[col][m].ajouter(hachages[codes_mois], comptes[debut:fin])
+        self.enregistrer_slices(slices)
+
+    def enregistrer_slices(self, slices):
+        self.slices.extend(slice_ for slice_ in slices if slice_ not in self.slices)
+
+    # Résumé et sketch fusionnés des mois de [debut, fin] (bornes incluses, None = sans borne)
+    def periode(self, colonne, debut=None, fin=None):
+        resume = ResumeFrequents(self.capacite)
+        sketch = CountMin(self.largeur, self.profondeur)
+        # Fusion dans l'ordre des mois : le résumé obtenu ne dépend pas de l'ordre d'ingestion
+        for m, resume_mois in sorted(self.resumes[colonne].items()):
+            if (debut is None or m >= debut) and (fin is None or m <= fin):
+                resume.fusionner(resume_mois)
+                sketch.fusionner(self.sketches[colonne][m])
+        return resume, sketch
+
+    # Les `n` valeurs les plus fréquentes de la période, avec leurs bornes :
+    # - compte_min, compte_max : bornes garanties du compte réel (résumé) ;
+    # - estimation_countmin : majorant du sketch (compte réel + au plus e / largeur * N, probabilité
+    #   1 - exp(-profondeur)) ; borne_haute est le plus petit des deux majorants ;
+    # - certain : d'après les seules bornes garanties, moins de `n` autres valeurs peuvent la dépasser :
+    #   elle fait partie des `n` plus fréquentes.
+    def classement(self, colonne, n=20, debut=None, fin=None):
+        resume, sketch = self.periode(colonne, debut, fin)
+        # Ordre décroissant des comptes, puis alphabétique à égalité
+        comptes = resume.comptes.sort_index().sort_values(ascending=False, kind='stable')
+        valeurs = comptes.index.to_numpy()
+        compte_min = comptes.to_numpy()
+        estimation = sketch.estimer(hacher(valeurs)) if len(valeurs) else np.empty(0, dtype=np.int64)
+        compte_max = compte_min + resume.delta
+        borne_haute = np.minimum(compte_max, estimation)
+
+        # Nombre de valeurs suivies dont le compte maximal dépasse le compte minimal de chaque valeur
+        # (elle-même exclue) ; une valeur non suivie compte au plus delta
+        hautes = np.sort(compte_max)
+        depassements = len(hautes) - np.searchsorted(hautes, compte_min, side='right')
+        depassements -= compte_max > compte_min
+        certain = (depassements < n) & (resume.delta <= compte_min)
+
+        tableau = pd.DataFrame({
+            colonne: valeurs, 'compte_min': compte_min, 'compte_max': compte_max,
+            'estimation_countmin': estimation, 'borne_haute': borne_haute, 'certain': certain,
+        }).head(n)
+        return tableau, resume
+
+    # Top `n` au format de statistiques_exploratoire.top_valeurs (comptes minimaux garantis)
+    def top_valeurs(self, colonne, n=20, debut=None, fin=None):
+        tableau, _ = self.classement(colonne, n, debut, fin)
+        return pd.Series(tableau['compte_min'].to_numpy(), index=pd.Index(tableau[colonne], name=colonne),
+                         name='count')
+
+    #############################################################################################
+
+    # Enregistrement : paramètres, slices, résumés (JSON) et sketches (un tableau numpy par colonne)
+    def sauvegarder(self, dossier=DOSSIER_CLASSEMENTS):
+        os.makedirs(dossier, exist_ok=True)
+        mois = self.mois
+        etat = {
+            'version': VERSION_CLASSEMENTS, 'colonnes': self.colonnes, 'capacite': self.capacite,
+            'largeur': self.largeur, 'profondeur': self.profondeur, 'slices': self.slices, 'mois': mois,
+            'resumes': {col: {m: {'n': resume.n, 'delta': resume.delta,
+                                  'comptes': {str(valeur): int(compte) for valeur, compte in resume.comptes.items()}}
+                              for m, resume in sorted(self.resumes[col].items())}
+                        for col in self.colonnes},
+        }
+        for col in self.colonnes:
+            tables = np.zeros((len(mois), self.profondeur, self.largeur), dtype=np.int64)
+            for i, m in enumerate(mois):
+                if m in self.sketches[col]:
+                    tables[i] = self.sketches[col][m].tables
+            np.save(os.path.join(dossier, f'{col}.countmin.npy'), tables)
+        with open(os.path.join(dossier, 'classements.json'), 'w', encoding='utf-8') as f:
+            json.dump(etat, f, ensure_ascii=False)
+
+    # Chargement des classements enregistrés, ou None s'ils sont absents ou d'une autre version
+    @classmethod
+    def charger(cls, dossier=DOSSIER_CLASSEMENTS):
+        chemin = os.path.join(dossier, 'classements.json')
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding='utf-8') as f:
+            etat = json.load(f)
+        if etat.get('version') != VERSION_CLASSEMENTS:
+            return None
+        classements = cls(etat['colonnes'], etat['capacite'], etat['largeur'], etat['profondeur'])
+        classements.slices = etat['slices']
+        for col in classements.colonnes:
+            tables = np.load(os.path.join(dossier, f'{col}.countmin.npy'))
+            for i, m in enumerate(etat['mois']):
+                resume = etat['resumes'][col].get(m)
+                if resume is None:
+                    continue
+                comptes = pd.Series(resume['comptes'], dtype=np.int64)
+                classements.resumes[col][m] = ResumeFrequents(classements.capacite, comptes, resume['n'],
+                                                              resume['delta'])
+                classements.sketches[col][m] = CountMin(tables=tables[i])
+        return classements
+
+
+# Classements reconstruits à partir des données nettoyées, lues par blocs
+def construire_classements(slices=(), taille_bloc=1_000_000, dossier=DOSSIER_DONNEES):
+    classements = ClassementsMensuels()
+    for bloc in iterer_donnees_nettoyees(['modified_at'] + classements.colonnes, taille_bloc=taille_bloc,
+                                         dossier=dossier):
+        classements.ajouter(bloc)
+    classements.slices = list(slices)
+    return classements
+
+#################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Classements des artistes et albums les plus fréquents, par mois.")
+    parser.add_argument('--colonne', choices=COLONNES_CLASSEES, default='artist_name',
+                        help="Colonne classée (défaut : artist_name).")
+    parser.add_argument('--n', type=int, default=20, help="Nombre de valeurs du classement (défaut : 20).")
+    parser.add_argument('--trimestre', default=None, help="Trimestre classé, au format AAAA-Tn (ex. 2017-T1).")
+    parser.add_argument('--debut', default=None, help="Premier mois de la période (AAAA-MM).")
+    parser.add_argument('--fin', default=None, help="Dernier mois de la période (AAAA-MM).")
+    parser.add_argument('--mois', action='store_true', help="Lister les mois couverts et leur nombre de pistes.")
+    parser.add_argument('--figure', action='store_true',
+                        help="Tracer le classement (alcrowd/classements/top_<colonne>_<période>.png).")
+    parser.add_argument('--reconstruire', action='store_true',
+                        help="Reconstruire les classements à partir des données nettoyées.")
+    parser.add_argument('--taille-bloc', type=int, default=1_000_000,
+                        help="Nombre de lignes lues par bloc avec --reconstruire (défaut : 1 000 000).")
+    args = parser.parse_args()
+
+    if args.reconstruire:
+        existants = ClassementsMensuels.charger()
+        classements = construire_classements(existants.slices if existants is not None else (), args.taille_bloc)
+        classements.sauvegarder()
+        print(f"Classements reconstruits : {len(classements.mois)} mois, enregistrés dans {DOSSIER_CLASSEMENTS}")
+    else:
+        classements = ClassementsMensuels.charger()
+        if classements is None:
+            raise FileNotFoundError(f"Aucun classement dans {DOSSIER_CLASSEMENTS} : exécutez nettoyage.py "
+                                    "ou ce script avec --reconstruire.")
+
+    if args.mois:
+        for m in classements.mois:
+            resume = classements.resumes[args.colonne].get(m)
+            print(f"{m} : {resume.n if resume is not None else 0} pistes")
+        return
+
+    debut, fin = mois_trimestre(args.trimestre) if args.trimestre else (args.debut, args.fin)
+    tableau, resume = classements.classement(args.colonne, args.n, debut, fin)
+    periode = f"{debut or 'début'} -> {fin or 'fin'}"
+    print(f"Top {args.n} {args.colonne} ({periode}) : {resume.n} pistes, erreur garantie <= {resume.delta} "
+          f"(borne Count-Min : + {np.e / classements.largeur * resume.n:.0f} avec une probabilité "
+          f"de {1 - np.exp(-classements.profondeur):.1%})")
+    print(tableau.to_string(index=False))
+
+    if args.figure:
+        from figures_exploratoire import plot_top_n
+        suffixe = args.trimestre or f"{debut or 'debut'}_{fin or 'fin'}"
+        chemin = os.path.join(DOSSIER_CLASSEMENTS, f'top_{args.colonne}_{suffixe}.png')
+        print(plot_top_n(classements.top_valeurs(args.colonne, args.n, debut, fin), args.colonne,
+                         f"Top {args.n} {args.colonne.replace('_', ' ')} ({periode})", chemin))
+
+
+if __name__ == '__main__':
+    main()
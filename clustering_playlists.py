@@ -0,0 +1,326 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script reprend le clustering des playlists du notebook (`projet_reporting.ipynb`) à l'échelle du MPD :
+# Calculer les caractéristiques par pid (nombre de pistes, d'albums et d'artistes distincts, durée,
+# pistes par album et par artiste) par l'agrégation sur codes entiers (`agregation_playlists.py`),
+# en mémoire ou par blocs de --taille-bloc lignes (--par-blocs).
+# Chercher le nombre de clusters par la méthode du coude (k de --k-min à --k-max) : les valeurs de k
+# sont ajustées en parallèle (--workers processus) à partir d'une même initialisation k-means++
+# calculée une fois pour k max (les k premiers centres d'un tirage k-means++ sont un tirage valide pour k).
+# Ajuster le modèle final (--k, 4 par défaut comme dans le notebook) avec KMeans (--mode complet) ou
+# MiniBatchKMeans (--mode minibatch, lots de --taille-lot playlists) pour des millions de playlists.
+# Enregistrer le modèle (standardisation + centres) dans `alcrowd/clustering/modele_clustering.pkl` :
+# la commande `affecter` place de nouvelles playlists dans les clusters sans réajustement.
+#
+# Utilisation :
+#   python clustering_playlists.py ajuster [--mode minibatch] [--k 4] [--par-blocs]
+#   python clustering_playlists.py affecter                         (données nettoyées)
+#   python clustering_playlists.py affecter --slices mpd.slice.X.json  (slices brutes, sans nettoyage complet)
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import sklearn
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import KMeans, MiniBatchKMeans, kmeans_plusplus
+from threadpoolctl import threadpool_limits
+
+from chargement_donnees import DOSSIER_DONNEES, charger_donnees_nettoyees, iterer_donnees_nettoyees
+from agregation_playlists import agreger_par_pid
+from rendu_figures import executer_rendus
+from instrumentation import Instrumentation
+
+DOSSIER_CLUSTERING = os.path.join(DOSSIER_DONNEES, 'clustering')
+CHEMIN_MODELE = os.path.join(DOSSIER_CLUSTERING, 'modele_clustering.pkl')
+VERSION_MODELE = 1
+
+# Colonnes des données nettoyées lues et caractéristiques utilisées par le clustering (celles du notebook)
+COLONNES_DONNEES = ['pid', 'track_uri', 'album_name', 'artist_name', 'playlist_duration_ms']
+COLONNES_CLUSTERING = ['num_tracks', 'num_albums', 'num_artists', 'duration_ms',
+                       'avg_tracks_per_album', 'avg_tracks_per_artist']
+
+# Taille maximale de l'échantillon sur lequel est tirée l'initialisation k-means++
+TAILLE_ECHANTILLON_INIT = 100_000
+
+#################################################################################################
+
+# Caractéristiques par pid
+
+def completer_caracteristiques(features):
+    features['avg_tracks_per_album'] = features['num_tracks'] / features['num_albums']
+    features['avg_tracks_per_artist'] = features['num_tracks'] / features['num_artists']
+    return features
+
+
+def caracteristiques_playlists(df):
+    return completer_caracteristiques(agreger_par_pid(df))
+
+
+# Lecture par blocs : les lignes d'une playlist sont contiguës (tri par slice puis par pid) ; celles de la
+# dernière playlist d'un bloc sont mises de côté et complétées par le début du bloc suivant.
+def caracteristiques_par_blocs(taille_bloc, dossier=DOSSIER_DONNEES):
+    parties = []
+    reste = None
+    for bloc in iterer_donnees_nettoyees(COLONNES_DONNEES, taille_bloc=taille_bloc, dossier=dossier):
+        pids = bloc['pid'].to_numpy()
+        if reste is not None:
+            # Lignes de début de bloc appartenant encore à la playlist mise de côté
+            autres = np.flatnonzero(pids != reste['pid'].iloc[0])
+            suite = autres[0] if len(autres) else len(pids)
+            reste = pd.concat([reste, bloc.iloc[:suite]], ignore_index=True)
+            if suite == len(pids):
+                continue
+            parties.append(agreger_par_pid(reste))
+            bloc, pids = bloc.iloc[suite:], pids[suite:]
+        autres = np.flatnonzero(pids != pids[-1])
+        coupure = autres[-1] + 1 if len(autres) else 0
+        if coupure:
+            parties.append(agreger_par_pid(bloc.iloc[:coupure]))
+        reste = bloc.iloc[coupure:]
+    if reste is not None:
+        parties.append(agreger_par_pid(reste))
+    if not parties:
+        raise ValueError("Aucune ligne lue dans les données nettoyées.")
+
+    features = pd.concat(parties, ignore_index=True)
+    if features['pid'].duplicated().any():
+        raise ValueError("Les lignes d'une même playlist ne sont pas contiguës : relancer sans --par-blocs.")
+    features = features.sort_values('pid', kind='stable').reset_index(drop=True)
+    return completer_caracteristiques(features)
+
+
+def matrice_caracteristiques(features):
+    return features[COLONNES_CLUSTERING].to_numpy(dtype=np.float64)
+
+#################################################################################################
+
+# Ajustement : méthode du coude et modèle final
+
+# Matrice standardisée partagée par les processus de travail (transmise une fois par processus)
+DONNEES_TRAVAIL = {}
+
+
+def initialiser_travail(X):
+    DONNEES_TRAVAIL['X'] = X
+    # Un seul fil de calcul par processus : le parallélisme vient des processus
+    threadpool_limits(1)
+
+
+def creer_modele(k, centres, mode, graine, taille_lot):
+    if mode == 'minibatch':
+        return MiniBatchKMeans(n_clusters=k, init=centres, n_init=1, batch_size=taille_lot, random_state=graine)
+    return KMeans(n_clusters=k, init=centres, n_init=1, random_state=graine)
+
+
+# Ajustement pour une valeur de k, exécuté dans un processus de travail (fonction de module)
+def ajuster_k(k, centres, mode, graine, taille_lot):
+    return creer_modele(k, centres, mode, graine, taille_lot).fit(DONNEES_TRAVAIL['X'])
+
+
+# Tirage k-means++ de k_max centres, sur un échantillon uniforme si les playlists sont nombreuses
+def centres_initiaux(X, k_max, graine):
+    if len(X) > TAILLE_ECHANTILLON_INIT:
+        rng = np.random.default_rng(graine)
+        X = X[np.sort(rng.choice(len(X), TAILLE_ECHANTILLON_INIT, replace=False))]
+    centres, _ = kmeans_plusplus(X, n_clusters=k_max, random_state=graine)
+    return centres
+
+
+# Modèles ajustés pour chaque k ({k: modèle}), en parallèle sur `workers` processus (tous les cœurs par
+# défaut), tous initialisés à partir du même tirage k-means++
+def recherche_coude(X, valeurs_k, mode, graine, taille_lot, workers=None, centres=None):
+    if centres is None:
+        centres = centres_initiaux(X, max(valeurs_k), graine)
+    arguments = [(k, centres[:k], mode, graine, taille_lot) for k in valeurs_k]
+    workers = min(workers or os.cpu_count() or 1, len(valeurs_k))
+    if workers <= 1:
+        DONNEES_TRAVAIL['X'] = X
+        modeles = [ajuster_k(*argument) for argument in arguments]
+        DONNEES_TRAVAIL.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initialiser_travail, initargs=(X,)) as executor:
+            modeles = list(executor.map(ajuster_k, *zip(*arguments)))
+    return dict(zip(valeurs_k, modeles))
+
+
+def tracer_coude(inerties, chemin):
+    valeurs_k = list(inerties)
+    plt.figure()
+    plt.plot(valeurs_k, [inerties[k] for k in valeurs_k], marker='o')
+    plt.xlabel('Nombre de clusters (k)')
+    plt.ylabel("Inertie (within-cluster sum of squares)")
+    plt.title("Méthode du coude pour déterminer k")
+    plt.savefig(chemin)
+    plt.close()
+    return f"Méthode du coude sauvegardée : {chemin}"
+
+#################################################################################################
+
+# Modèle enregistré : standardisation, modèle de clustering et description de l'ajustement
+
+def sauvegarder_modele(modele, chemin=CHEMIN_MODELE):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_temporaire = chemin + '.tmp'
+    with open(chemin_temporaire, 'wb') as f:
+        pickle.dump(modele, f)
+    os.replace(chemin_temporaire, chemin)
+
+
+def charger_modele(chemin=CHEMIN_MODELE):
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(f"Aucun modèle de clustering enregistré : {chemin}\n"
+                                "Pensez à exécuter d'abord `python clustering_playlists.py ajuster`.")
+    with open(chemin, 'rb') as f:
+        modele = pickle.load(f)
+    if modele.get('version') != VERSION_MODELE:
+        raise ValueError(f"Modèle de clustering au format {modele.get('version')} (attendu : {VERSION_MODELE}) : "
+                         "le réajuster.")
+    if modele['sklearn'] != sklearn.__version__:
+        print(f"Attention : modèle ajusté avec scikit-learn {modele['sklearn']}, "
+              f"version installée {sklearn.__version__}.")
+    return modele
+
+
+# Cluster de chaque playlist d'après le modèle enregistré (sans réajustement)
+def affecter_clusters(features, modele):
+    X = modele['scaler'].transform(features[modele['colonnes']].to_numpy(dtype=np.float64))
+    return modele['kmeans'].predict(X)
+
+
+# Table pid -> cluster : les affectations existantes sont conservées, celles des pid fournis remplacées
+def enregistrer_affectations(features, chemin):
+    affectations = features[['pid', 'cluster']]
+    if os.path.exists(chemin):
+        anciennes = pd.read_csv(chemin)
+        affectations = pd.concat([anciennes[~anciennes['pid'].isin(affectations['pid'])], affectations])
+    affectations.sort_values('pid').to_csv(chemin, index=False)
+    return len(affectations)
+
+#################################################################################################
+
+def ajuster(args, instrumentation):
+    if args.k_min < 1 or args.k_max < args.k_min:
+        raise ValueError("Il faut 1 <= --k-min <= --k-max.")
+    with instrumentation.etape('caracteristiques') as etape:
+        if args.par_blocs:
+            features = caracteristiques_par_blocs(args.taille_bloc)
+        else:
+            features = caracteristiques_playlists(charger_donnees_nettoyees(COLONNES_DONNEES))
+        etape['lignes_sortie'] = len(features)
+    print(f"Caractéristiques calculées pour {len(features)} playlists.")
+
+    with instrumentation.etape('standardisation', lignes_entree=len(features)):
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(matrice_caracteristiques(features))
+
+    # Méthode du coude, puis modèle final : repris de la recherche si k en fait partie
+    valeurs_k = list(range(args.k_min, args.k_max + 1))
+    with instrumentation.etape('recherche_coude', lignes_entree=len(features)):
+        centres = centres_initiaux(X_scaled, max(args.k_max, args.k), args.graine)
+        modeles = recherche_coude(X_scaled, valeurs_k, args.mode, args.graine, args.taille_lot, args.workers,
+                                  centres)
+    inerties = {k: float(modele.inertia_) for k, modele in modeles.items()}
+    for k, inertie in inerties.items():
+        print(f"  k = {k:>2} : inertie {inertie:,.1f}")
+    os.makedirs(DOSSIER_CLUSTERING, exist_ok=True)
+    executer_rendus([(tracer_coude, {'inerties': inerties,
+                                     'chemin': os.path.join(DOSSIER_CLUSTERING, 'kmeans_1_methode_du_coude.png')})],
+                    workers=1)
+
+    with instrumentation.etape('ajustement', lignes_entree=len(features)):
+        if args.k in modeles:
+            kmeans = modeles[args.k]
+        else:
+            kmeans = creer_modele(args.k, centres[:args.k], args.mode, args.graine, args.taille_lot).fit(X_scaled)
+    features['cluster'] = kmeans.labels_
+
+    modele = {
+        'version': VERSION_MODELE, 'colonnes': COLONNES_CLUSTERING, 'scaler': scaler, 'kmeans': kmeans,
+        'k': args.k, 'mode': args.mode, 'graine': args.graine, 'nb_playlists': len(features),
+        'inerties': inerties, 'date': datetime.now().isoformat(timespec='seconds'), 'sklearn': sklearn.__version__,
+    }
+    with instrumentation.etape('sauvegarde_modele'):
+        sauvegarder_modele(modele, args.modele)
+        enregistrer_affectations(features, os.path.join(DOSSIER_CLUSTERING, 'clusters_playlists.csv'))
+    print(f"Modèle ({args.mode}, k = {args.k}) sauvegardé : {args.modele}")
+
+    # Moyennes par cluster
+    cluster_summary = features.drop(columns='pid').groupby('cluster').mean()
+    cluster_summary.insert(0, 'nb_playlists', features['cluster'].value_counts().sort_index())
+    cluster_summary.to_csv(os.path.join(DOSSIER_CLUSTERING, 'resume_clusters.csv'))
+    print(cluster_summary)
+
+
+def affecter(args, instrumentation):
+    modele = charger_modele(args.modele)
+    with instrumentation.etape('caracteristiques') as etape:
+        if args.slices:
+            # Slices brutes : chargement, aplatissement et nettoyage de chaque slice (nettoyage.py)
+            from nettoyage import traiter_slice
+            parties = [traiter_slice(fichier)[0] for fichier in args.slices]
+            df = pd.concat([partie for partie in parties if partie is not None], ignore_index=True)
+        else:
+            df = charger_donnees_nettoyees(COLONNES_DONNEES)
+        features = caracteristiques_playlists(df)
+        etape['lignes_sortie'] = len(features)
+    with instrumentation.etape('affectation', lignes_entree=len(features)):
+        features['cluster'] = affecter_clusters(features, modele)
+        total = enregistrer_affectations(features, os.path.join(DOSSIER_CLUSTERING, 'clusters_playlists.csv'))
+    print(f"{len(features)} playlists affectées aux {modele['k']} clusters du modèle du {modele['date']} "
+          f"({total} affectations enregistrées).")
+    print(features['cluster'].value_counts().sort_index().rename('nb_playlists').to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clustering des playlists (KMeans ou MiniBatchKMeans).")
+    parser.add_argument('--modele', default=CHEMIN_MODELE, help="Chemin du modèle enregistré.")
+    parser.add_argument('--rapport', default=None,
+                        help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    commande_ajuster = commandes.add_parser('ajuster', help="Méthode du coude, ajustement et sauvegarde du modèle.")
+    commande_ajuster.add_argument('--mode', choices=['complet', 'minibatch'], default='complet',
+                                  help="KMeans sur toutes les playlists ou MiniBatchKMeans (défaut : complet).")
+    commande_ajuster.add_argument('--k', type=int, default=4, help="Nombre de clusters du modèle (défaut : 4).")
+    commande_ajuster.add_argument('--k-min', type=int, default=2, help="Plus petit k de la méthode du coude.")
+    commande_ajuster.add_argument('--k-max', type=int, default=10, help="Plus grand k de la méthode du coude.")
+    commande_ajuster.add_argument('--taille-lot', type=int, default=4096,
+                                  help="Playlists par lot de MiniBatchKMeans (défaut : 4096).")
+    commande_ajuster.add_argument('--graine', type=int, default=42, help="Graine aléatoire (défaut : 42).")
+    commande_ajuster.add_argument('--workers', type=int, default=None,
+                                  help="Processus de la méthode du coude "
+                                       "(défaut : tous les cœurs ; 1 = séquentiel).")
+    commande_ajuster.add_argument('--par-blocs', action='store_true',
+                                  help="Lire les données nettoyées par blocs au lieu de les charger entièrement.")
+    commande_ajuster.add_argument('--taille-bloc', type=int, default=1_000_000,
+                                  help="Nombre de lignes par bloc avec --par-blocs (défaut : 1 000 000).")
+
+    commande_affecter = commandes.add_parser('affecter', help="Affecter des playlists aux clusters du modèle.")
+    commande_affecter.add_argument('--slices', nargs='+', default=None,
+                                   help="Fichiers mpd.slice.*.json à affecter (défaut : données nettoyées).")
+    args = parser.parse_args()
+    instrumentation = Instrumentation('clustering_playlists.py', vars(args), args.rapport)
+
+    if args.commande == 'ajuster':
+        ajuster(args, instrumentation)
+    else:
+        affecter(args, instrumentation)
+    instrumentation.terminer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module tient à jour un cube pré-agrégé des résultats de la dispersion album/artiste, pour découper
+# ces résultats sans relire les lignes des données nettoyées. Les dimensions sont :
+# - le mois de `modified_at` (AAAAMM), avec ses regroupements en trimestres et en années ;
+# - la catégorie de taille de la playlist (catégories de `categoriser_taille`, comme dans
+#   `album_unique_artistes.py`) ;
+# - `collaborative`.
+# Chaque cellule (mois, taille, collaborative) ne contient que des agrégats additifs des playlists
+# (groupes (name, pid) d'`agreger_playlists`) :
+# - le nombre de playlists, le nombre de playlists avec plus d'albums que d'artistes et le nombre de
+#   ratios albums/artistes définis ;
+# - la somme et la somme des carrés du nombre de pistes, d'abonnés, d'albums et d'artistes uniques, du
+#   ratio et de la différence albums/artistes (moyennes et écarts-types de n'importe quel regroupement) ;
+# - un sketch HyperLogLog des artistes et un des albums de la cellule (`hyperloglog.py`) : le maximum des
+#   registres donne le nombre approché d'artistes et d'albums distincts d'un regroupement.
+# Un regroupement ou un filtre sur les dimensions additionne quelques centaines de cellules au plus :
+# la réponse prend quelques millisecondes, quelle que soit la taille du corpus.
+#
+# `nettoyage.py` ajoute chaque lot nettoyé au cube et l'enregistre dans `alcrowd/cube/`. Comme pour les
+# classements mensuels (`classements_frequents.py`), le cube ne sait pas retirer une slice : si une slice
+# déjà comptée est modifiée ou supprimée, il est reconstruit à partir des données nettoyées.
+#
+# Utilisation :
+#   python cube_dispersion.py --par categorie_taille collaborative
+#   python cube_dispersion.py --par mois --debut 2016-06 --fin 2016-12 --taille "Grande (51-100)"
+#   python cube_dispersion.py --par trimestre --collaborative true
+#   python cube_dispersion.py --reconstruire           (à partir des données nettoyées)
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from chargement_donnees import DOSSIER_DONNEES, iterer_donnees_nettoyees
+from agregation_playlists import agreger_playlists, coder_colonne, COLONNES_SKETCHES
+from hyperloglog import RegistresHyperLogLog, erreur_relative
+from statistiques_dispersion import categoriser_taille, ajouter_ratios
+from classements_frequents import mois_dates, libelle_mois, mois_trimestre
+
+DOSSIER_CUBE = os.path.join(DOSSIER_DONNEES, 'cube')
+VERSION_CUBE = 1
+
+# Précision des sketches des cellules (erreur relative type 1.6 %, 4 Ko par cellule et par colonne)
+PRECISION_CUBE = 12
+
+# Colonnes des données nettoyées lues pour le cube
+COLONNES_CUBE = ['name', 'pid', 'modified_at', 'collaborative', 'num_tracks', 'num_followers',
+                 'artist_name', 'album_name']
+# Valeurs par playlist dont le cube garde la somme et la somme des carrés
+MESURES = ['num_tracks', 'num_followers', 'albums_uniques_reels', 'artistes_uniques_reels',
+           'ratio_albums_artistes', 'diff_albums_artistes']
+COMPTES = ['nb_playlists', 'plus_albums', 'nb_ratios']
+COLONNES_CELLULES = COMPTES + [f'{prefixe}_{mesure}' for mesure in MESURES for prefixe in ('somme', 'carres')]
+
+# Catégories de taille, dans l'ordre, et regroupements possibles
+TAILLES = list(categoriser_taille(pd.Series([], dtype=np.float64)).cat.categories)
+DIMENSIONS = ['annee', 'trimestre', 'mois', 'categorie_taille', 'collaborative']
+
+#################################################################################################
+
+# Indicateur `collaborative` : booléen (CSV, Parquet) ou texte "true"/"false" (slices JSON).
+# Chaque valeur distincte n'est convertie qu'une fois.
+def est_collaborative(serie):
+    codes, distinctes = coder_colonne(serie)
+    vraies = np.asarray(pd.Index(distinctes).astype(str).str.lower() == 'true')
+    return np.where(codes >= 0, vraies[np.maximum(codes, 0)], False)
+
+
+# Hachages 64 bits de valeurs distinctes, identiques à ceux de hyperloglog.hacher_valeurs
+def hacher_distinctes(distinctes):
+    return pd.util.hash_array(np.asarray(distinctes, dtype=object))
+
+
+# Clé de cellule de chaque ligne : mois * 100 + code de taille * 10 + collaborative (-1 sans mois ou taille)
+def cles_cellules(modified_at, num_tracks, collaborative):
+    mois = mois_dates(pd.Series(modified_at)).to_numpy(dtype=np.float64)
+    tailles = categoriser_taille(pd.Series(num_tracks)).cat.codes.to_numpy().astype(np.int64)
+    collaboratives = est_collaborative(pd.Series(collaborative))
+    cles = np.nan_to_num(mois, nan=0).astype(np.int64) * 100 + tailles * 10 + collaboratives
+    return np.where(np.isnan(mois) | (tailles < 0), -1, cles)
+
+
+# Dimensions des cellules d'après leurs clés
+def dimensions_cellules(cles):
+    cles = np.asarray(cles, dtype=np.int64)
+    mois = cles // 100
+    libelles = [libelle_mois(m) for m in mois]
+    return pd.DataFrame({
+        'annee': [libelle[:4] for libelle in libelles],
+        'trimestre': [f"{m // 100:04d}-T{(m % 100 - 1) // 3 + 1}" for m in mois],
+        'mois': libelles,
+        'categorie_taille': pd.Categorical(np.asarray(TAILLES, dtype=object)[(cles // 10) % 10], categories=TAILLES,
+                                           ordered=True),
+        'collaborative': (cles % 10).astype(bool),
+    }, index=pd.Index(cles, name='cellule'))
+
+
+# Agrégats additifs d'un lot de playlists, par cellule
+def agreger_cellules(playlists, cles):
+    ratio = playlists['ratio_albums_artistes'].to_numpy(dtype=np.float64)
+    definis = np.isfinite(ratio)
+    colonnes = {
+        'nb_playlists': np.ones(len(playlists)),
+        'plus_albums': (playlists['diff_albums_artistes'].to_numpy() > 0).astype(np.float64),
+        'nb_ratios': definis.astype(np.float64),
+    }
+    for mesure in MESURES:
+        valeurs = np.where(definis, ratio, 0) if mesure == 'ratio_albums_artistes' \
+            else playlists[mesure].to_numpy(dtype=np.float64)
+        colonnes[f'somme_{mesure}'] = valeurs
+        colonnes[f'carres_{mesure}'] = valeurs ** 2
+    valides = cles >= 0
+    return pd.DataFrame(colonnes)[valides].groupby(cles[valides]).sum()[COLONNES_CELLULES]
+
+#################################################################################################
+
+# Cube (mois x taille x collaborative) : agrégats par cellule (une ligne par clé de cellule, triées),
+# sketches HyperLogLog alignés sur ces lignes et liste des slices déjà comptées
+class CubeDispersion:
+    def __init__(self, precision=PRECISION_CUBE):
+        self.precision = precision
+        self.cellules = pd.DataFrame(columns=COLONNES_CELLULES, index=pd.Index([], dtype=np.int64, name='cellule'),
+                                     dtype=np.float64)
+        self.sketches = {col: RegistresHyperLogLog(0, precision) for col in COLONNES_SKETCHES}
+        self.slices = []
+        self.dimensions_calculees = None
+
+    # Ajout des pistes d'un lot nettoyé (colonnes COLONNES_CUBE) provenant de `slices`. Les playlists d'un
+    # lot doivent être complètes : les agrégats par playlist (albums et artistes uniques) en dépendent.
+    def ajouter(self, df, slices=()):
+        df = df[df['name'].notna()]
+        playlists = agreger_playlists(df, ['modified_at', 'collaborative', 'num_tracks', 'num_followers'],
+                                      COLONNES_SKETCHES)
+        ajouter_ratios(playlists)
+        cles_playlists = cles_cellules(playlists['modified_at'], playlists['num_tracks'], playlists['collaborative'])
+        lot = agreger_cellules(playlists, cles_playlists)
+
+        # Nouvelles cellules : lignes nulles et registres vides insérés à leur place dans l'ordre des clés
+        index = self.cellules.index.union(lot.index)
+        if len(index) > len(self.cellules):
+            positions = index.get_indexer(self.cellules.index)
+            for col, sketch in self.sketches.items():
+                registres = np.zeros((len(index), 2 ** self.precision), dtype=np.uint8)
+                registres[positions] = sketch.registres
+                self.sketches[col] = RegistresHyperLogLog(len(index), self.precision, registres)
+            self.cellules = self.cellules.reindex(index, fill_value=0.0)
+        self.cellules.loc[lot.index] += lot.to_numpy()
+
+        # Sketches : chaque couple (cellule, valeur) distinct du lot n'est ajouté qu'une fois
+        lignes = index.get_indexer(cles_cellules(df['modified_at'], df['num_tracks'], df['collaborative']))
+        for col in self.sketches:
+            codes, distinctes = coder_colonne(df[col])
+            hachages = hacher_distinctes(distinctes)
+            presentes = (codes >= 0) & (lignes >= 0)
+            couples = np.unique(lignes[presentes] * len(distinctes) + codes[presentes])
+            self.sketches[col].ajouter(couples // len(distinctes), hachages[couples % len(distinctes)])
+        self.enregistrer_slices(slices)
+
+    def enregistrer_slices(self, slices):
+        self.slices.extend(slice_ for slice_ in slices if slice_ not in self.slices)
+
+    # Dimensions de chaque cellule (une ligne par cellule, dans l'ordre des agrégats)
+    # (les cellules ne sont jamais retirées : leur nombre suffit à savoir si le calcul précédent est à jour)
+    def dimensions(self):
+        if self.dimensions_calculees is None or len(self.dimensions_calculees) != len(self.cellules):
+            self.dimensions_calculees = dimensions_cellules(self.cellules.index)
+        return self.dimensions_calculees
+
+    # Indicateurs des playlists regroupées selon les dimensions `par` (toutes les cellules retenues forment
+    # un seul groupe 'Total' sans dimension), après filtre sur les mois [debut, fin] (AAAA-MM, bornes
+    # incluses), les catégories de taille `tailles` et la valeur de `collaborative`.
+    def requete(self, par=(), debut=None, fin=None, tailles=None, collaborative=None):
+        par = list(par)
+        dimensions = self.dimensions()
+        masque = np.ones(len(dimensions), dtype=bool)
+        if debut is not None:
+            masque &= (dimensions['mois'] >= debut).to_numpy()
+        if fin is not None:
+            masque &= (dimensions['mois'] <= fin).to_numpy()
+        if tailles is not None:
+            masque &= dimensions['categorie_taille'].isin(tailles).to_numpy()
+        if collaborative is not None:
+            masque &= (dimensions['collaborative'] == collaborative).to_numpy()
+        dimensions = dimensions[masque]
+        if par:
+            regroupement = dimensions.groupby(par, observed=True, sort=True)
+            groupes = regroupement.ngroup().to_numpy()
+            index = regroupement.size().index
+        else:
+            groupes = np.zeros(len(dimensions), dtype=np.int64)
+            index = pd.Index(['Total'], name='groupe')
+
+        # Cellules triées par groupe : sommes des agrégats et maximum des registres par intervalle contigu
+        ordre = np.argsort(groupes, kind='stable')
+        debuts = np.searchsorted(groupes[ordre], np.arange(len(index)))
+        if len(ordre):
+            sommes = np.add.reduceat(self.cellules.to_numpy()[masque][ordre], debuts, axis=0)
+        else:
+            sommes = np.zeros((len(index), len(COLONNES_CELLULES)))
+        sommes = dict(zip(COLONNES_CELLULES, sommes.T))
+
+        n = sommes['nb_playlists']
+        resultat = {'nb_playlists': n.astype(np.int64)}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resultat['pct_plus_albums'] = sommes['plus_albums'] / n * 100
+            for mesure in MESURES:
+                effectif = sommes['nb_ratios'] if mesure == 'ratio_albums_artistes' else n
+                somme = sommes[f'somme_{mesure}']
+                variance = (sommes[f'carres_{mesure}'] - somme ** 2 / effectif) / (effectif - 1)
+                resultat[f'moyenne_{mesure}'] = somme / effectif
+                resultat[f'ecart_type_{mesure}'] = np.sqrt(np.maximum(variance, 0))
+        for col, nom in COLONNES_SKETCHES.items():
+            registres = np.zeros((len(index), 2 ** self.precision), dtype=np.uint8)
+            if len(ordre):
+                cellules = self.sketches[col].registres[masque][ordre]
+                for groupe, (debut_groupe, fin_groupe) in enumerate(zip(debuts, np.append(debuts[1:], len(ordre)))):
+                    registres[groupe] = cellules[debut_groupe:fin_groupe].max(axis=0)
+            fusion = RegistresHyperLogLog(len(index), self.precision, registres)
+            resultat[nom.replace('_uniques_reels', '_distincts_approx')] = np.rint(fusion.estimer()).astype(np.int64)
+        return pd.DataFrame(resultat, index=index)
+
+    #############################################################################################
+
+    # Enregistrement : paramètres, slices et agrégats (JSON), sketches (un tableau numpy par colonne)
+    def sauvegarder(self, dossier=DOSSIER_CUBE):
+        os.makedirs(dossier, exist_ok=True)
+        etat = {
+            'version': VERSION_CUBE, 'precision': self.precision, 'slices': self.slices,
+            'cellules': [int(cle) for cle in self.cellules.index],
+            'agregats': {col: self.cellules[col].tolist() for col in COLONNES_CELLULES},
+        }
+        for col, sketch in self.sketches.items():
+            np.save(os.path.join(dossier, f'{col}.hll.npy'), sketch.registres)
+        with open(os.path.join(dossier, 'cube.json'), 'w', encoding='utf-8') as f:
+            json.dump(etat, f)
+
+    # Chargement du cube enregistré, ou None s'il est absent ou d'une autre version
+    @classmethod
+    def charger(cls, dossier=DOSSIER_CUBE):
+        chemin = os.path.join(dossier, 'cube.json')
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding='utf-8') as f:
+            etat = json.load(f)
+        if etat.get('version') != VERSION_CUBE:
+            return None
+        cube = cls(etat['precision'])
+        cube.slices = etat['slices']
+        index = pd.Index(etat['cellules'], dtype=np.int64, name='cellule')
+        cube.cellules = pd.DataFrame(etat['agregats'], index=index, columns=COLONNES_CELLULES, dtype=np.float64)
+        for col in COLONNES_SKETCHES:
+            registres = np.load(os.path.join(dossier, f'{col}.hll.npy'))
+            cube.sketches[col] = RegistresHyperLogLog(len(registres), cube.precision, registres)
+        return cube
+
+
+# Cube reconstruit à partir des données nettoyées, lues par blocs. Les lignes d'une playlist sont
+# contiguës : celles de la dernière playlist d'un bloc sont reportées au bloc suivant pour qu'aucune
+# playlist ne soit coupée.
+def construire_cube(slices=(), taille_bloc=1_000_000, dossier=DOSSIER_DONNEES):
+    cube = CubeDispersion()
+    report = None
+    for bloc in iterer_donnees_nettoyees(COLONNES_CUBE, taille_bloc=taille_bloc, dossier=dossier):
+        if report is not None:
+            bloc = pd.concat([report, bloc], ignore_index=True)
+        dernier = bloc['pid'].iloc[-1]
+        fin = len(bloc) - int(np.argmax(bloc['pid'].to_numpy()[::-1] != dernier)) \
+            if (bloc['pid'] != dernier).any() else 0
+        report = bloc.iloc[fin:]
+        if fin:
+            cube.ajouter(bloc.iloc[:fin])
+    if report is not None and len(report):
+        cube.ajouter(report)
+    cube.slices = list(slices)
+    return cube
+
+#################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Cube pré-agrégé de la dispersion album/artiste "
+                                                 "(mois x taille x collaborative).")
+    parser.add_argument('--par', nargs='*', choices=DIMENSIONS, default=[],
+                        help="Dimensions du regroupement (défaut : aucune, un seul total).")
+    parser.add_argument('--trimestre', default=None, help="Trimestre retenu, au format AAAA-Tn (ex. 2017-T1).")
+    parser.add_argument('--debut', default=None, help="Premier mois retenu (AAAA-MM).")
+    parser.add_argument('--fin', default=None, help="Dernier mois retenu (AAAA-MM).")
+    parser.add_argument('--taille', nargs='+', choices=TAILLES, default=None,
+                        help="Catégories de taille retenues (défaut : toutes).")
+    parser.add_argument('--collaborative', choices=['true', 'false'], default=None,
+                        help="Ne retenir que les playlists collaboratives (true) ou non (false).")
+    parser.add_argument('--reconstruire', action='store_true',
+                        help="Reconstruire le cube à partir des données nettoyées.")
+    parser.add_argument('--taille-bloc', type=int, default=1_000_000,
+                        help="Nombre de lignes lues par bloc avec --reconstruire (défaut : 1 000 000).")
+    args = parser.parse_args()
+
+    if args.reconstruire:
+        existant = CubeDispersion.charger()
+        cube = construire_cube(existant.slices if existant is not None else (), args.taille_bloc)
+        cube.sauvegarder()
+        print(f"Cube reconstruit : {len(cube.cellules)} cellules, enregistré dans {DOSSIER_CUBE}")
+    else:
+        cube = CubeDispersion.charger()
+        if cube is None:
+            raise FileNotFoundError(f"Aucun cube dans {DOSSIER_CUBE} : exécutez nettoyage.py "
+                                    "ou ce script avec --reconstruire.")
+
+    debut, fin = mois_trimestre(args.trimestre) if args.trimestre else (args.debut, args.fin)
+    collaborative = None if args.collaborative is None else args.collaborative == 'true'
+    depart = time.perf_counter()
+    resultat = cube.requete(args.par, debut, fin, args.taille, collaborative)
+    duree = time.perf_counter() - depart
+    with pd.option_context('display.max_columns', None, 'display.width', 200, 'display.float_format', '{:.3f}'.format):
+        print(resultat.to_string())
+    print(f"\n{len(cube.cellules)} cellules, {len(resultat)} groupe(s) en {duree * 1000:.1f} ms "
+          f"(artistes et albums distincts : erreur relative type {erreur_relative(cube.precision):.1%}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module décode les slices `mpd.slice.*.json` directement en colonnes typées, sans passer par json.load :
+# le fichier est projeté en mémoire (pa.memory_map) et lu par le lecteur JSON de pyarrow avec un schéma
+# explicite, celui du MPD. Les champs gardés par le nettoyage sont écrits dans des tableaux Arrow (entiers
+# int64, chaînes UTF-8) : aucun dictionnaire n'est construit par playlist ou par piste.
+# L'aplatissement (une ligne par piste) se fait aussi sur les tableaux Arrow : indice de la playlist de
+# chaque piste (list_parent_indices), puis répétition des champs de playlist par `take`.
+# Le résultat est le même DataFrame que `aplatir_playlists_colonnes(charger_playlists([fichier]))`.
+#
+# decoder_slice renvoie None, et `nettoyage.py` repasse par json.load pour la slice, si :
+# - pyarrow n'est pas installé ;
+# - le fichier ne suit pas le schéma : JSON invalide, champ inconnu dans une playlist ou une piste,
+#   valeur manquante ou nulle, type différent (booléen au lieu de "false", nombre décimal...) ;
+# - les clés de la première playlist ou de la première piste ne sont pas dans l'ordre du MPD (l'ordre
+#   des colonnes produites après json.load en dépend) ou n'apparaissent pas dans les 64 premiers Ko.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import re
+import pandas as pd
+
+# pyarrow est optionnel : sans lui, les slices sont toujours décodées par json.load
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Champs des playlists et des pistes, dans l'ordre des fichiers du MPD (colonnes du DataFrame aplati)
+CHAMPS_PLAYLIST = ['name', 'collaborative', 'pid', 'modified_at', 'num_tracks', 'num_albums', 'num_followers',
+                   'num_edits', 'playlist_duration_ms', 'num_artists']
+CHAMPS_PISTE = ['pos', 'artist_name', 'track_uri', 'artist_uri', 'track_name', 'album_uri', 'track_duration_ms',
+                'album_name']
+CHAMPS_TEXTE = {'name', 'collaborative', 'artist_name', 'track_uri', 'artist_uri', 'track_name', 'album_uri',
+                'album_name'}
+# Nom des clés dans le JSON (la durée est renommée à l'aplatissement)
+CLES_JSON = {'playlist_duration_ms': 'duration_ms', 'track_duration_ms': 'duration_ms'}
+
+
+def cle_json(nom):
+    return CLES_JSON.get(nom, nom)
+
+
+# Schéma donné au lecteur JSON (les clés hors "playlists", comme "info", sont inférées puis ignorées)
+def schema_playlists():
+    def champs(noms):
+        return [(cle_json(nom), pa.string() if nom in CHAMPS_TEXTE else pa.int64()) for nom in noms]
+    piste = pa.struct(champs(CHAMPS_PISTE))
+    playlist = pa.struct(champs(CHAMPS_PLAYLIST) + [('description', pa.string()), ('tracks', pa.list_(piste))])
+    return pa.list_(playlist)
+
+#################################################################################################
+
+# Clés (dans l'ordre) de l'en-tête de la première playlist, jusqu'à "tracks", et de la première piste.
+# Les chaînes sont lues comme des jetons entiers : un nom contenant "pos" ou une accolade ne trompe pas le décompte.
+MOTIF_JETON = re.compile(rb'"((?:[^"\\]|\\.)*)"(\s*:)?|[{}]')
+
+
+def cles_premiers_objets(debut):
+    objets = []
+    entete = piste = None
+    for jeton in MOTIF_JETON.finditer(debut):
+        if jeton.group() == b'{':
+            objets.append([])
+        elif jeton.group() == b'}':
+            cles = objets.pop() if objets else []
+            if piste is None and b'pos' in cles:
+                piste = cles
+        elif jeton.group(2) and objets:
+            objets[-1].append(jeton.group(1))
+            if entete is None and jeton.group(1) == b'tracks':
+                entete = objets[-1][:-1]
+        if entete is not None and piste is not None:
+            break
+    return entete, piste
+
+
+# pd.DataFrame(liste de dictionnaires) ordonne ses colonnes d'après le premier dictionnaire : la première
+# playlist et la première piste doivent suivre l'ordre du MPD (description facultative, après num_artists)
+def ordre_attendu(debut):
+    entete, piste = cles_premiers_objets(debut)
+    cles_playlist = [cle_json(nom).encode() for nom in CHAMPS_PLAYLIST]
+    return entete in (cles_playlist, cles_playlist + [b'description']) \
+        and piste == [cle_json(nom).encode() for nom in CHAMPS_PISTE]
+
+#################################################################################################
+
+# Décodage d'une slice : (DataFrame aplati, une ligne par piste ; nombre de playlists), ou None si elle
+# doit passer par json.load
+def decoder_slice(fichier):
+    if pa is None:
+        return None
+    taille = os.path.getsize(fichier)
+    schema = pa.schema([('playlists', schema_playlists())])
+    try:
+        with pa.memory_map(fichier) as source:
+            # Un seul bloc : le fichier entier est un unique objet JSON
+            table = pa_json.read_json(
+                source,
+                read_options=pa_json.ReadOptions(block_size=taille + 1, use_threads=False),
+                parse_options=pa_json.ParseOptions(explicit_schema=schema, newlines_in_values=True,
+                                                   unexpected_field_behavior='infer'))
+    except (pa.ArrowInvalid, OSError):
+        return None
+    # Un champ inconnu dans une playlist ou une piste est ajouté au type inféré
+    if table.num_rows != 1 or table.schema.field('playlists').type != schema_playlists():
+        return None
+    listes = table.column('playlists').combine_chunks()
+    if listes.null_count:
+        return None
+
+    playlists = pc.list_flatten(listes)
+    pistes_par_playlist = pc.struct_field(playlists, 'tracks')
+    pistes = pc.list_flatten(pistes_par_playlist)
+    # Valeurs manquantes ou nulles : json.load les rend autrement (NaN, colonnes float). Une slice sans
+    # pistes passe aussi par json.load, qui fixe seul les colonnes d'un DataFrame vide.
+    if len(pistes) == 0 or pistes_par_playlist.null_count \
+            or any(pc.struct_field(playlists, cle_json(nom)).null_count for nom in CHAMPS_PLAYLIST) \
+            or any(pc.struct_field(pistes, cle_json(nom)).null_count for nom in CHAMPS_PISTE):
+        return None
+    with open(fichier, 'rb') as f:
+        debut = f.read(1 << 16)
+    if not ordre_attendu(debut):
+        return None
+
+    index_pistes = pc.list_parent_indices(pistes_par_playlist)
+    colonnes = {nom: pc.struct_field(playlists, cle_json(nom)).take(index_pistes) for nom in CHAMPS_PLAYLIST}
+    description = pc.struct_field(playlists, 'description')
+    if description.null_count < len(description):
+        colonnes['description'] = description.take(index_pistes)
+    for nom in CHAMPS_PISTE:
+        colonnes[nom] = pc.struct_field(pistes, cle_json(nom))
+    df = pa.table(colonnes).to_pandas()
+    df.index = pd.Index(index_pistes.to_numpy(), dtype='int64')
+    return df, len(playlists)
@@ -0,0 +1,80 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module gère la suppression des doublons du nettoyage (`nettoyage.py`) :
+# Une ligne est identifiée par sa clé (pid, pos, track_uri) et non par l'ensemble de ses colonnes.
+# Contrairement à l'ancien df.drop_duplicates() sur toutes les colonnes, deux lignes de même clé qui
+# diffèrent par ailleurs (playlist réémise avec un autre `modified_at` ou `num_followers`) sont des
+# doublons : seule la première occurrence, dans l'ordre des slices puis des lignes, est conservée.
+# Cette clé est résumée par un hachage 64 bits calculé de façon vectorisée (pd.util.hash_pandas_object).
+# Un ensemble des hachages déjà vus, partagé par tous les lots d'une exécution, permet de retirer les
+# doublons répartis sur deux slices (mode flux ou parallèle) sans conserver la table complète en mémoire :
+# 8 octets par ligne. D'une exécution à l'autre, le nettoyage incrémental le recharge à partir des
+# hachages enregistrés avec les partitions de chaque slice (`nettoyage.py`).
+#
+# Avec 64 bits, la probabilité d'une collision sur les ~66 millions de pistes du MPD est de l'ordre de 1e-4.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import numpy as np
+import pandas as pd
+
+# Clé d'identité d'une ligne de la table des pistes
+CLE_IDENTITE = ['pid', 'pos', 'track_uri']
+
+#################################################################################################
+
+# Hachage 64 bits de la clé d'identité de chaque ligne
+def hacher_identite(df, cle=CLE_IDENTITE):
+    return pd.util.hash_pandas_object(df[cle], index=False).to_numpy()
+
+
+# Masque des premières occurrences de chaque clé à l'intérieur d'un DataFrame
+def premieres_occurrences(hachages):
+    return ~pd.Index(hachages).duplicated(keep='first')
+
+#################################################################################################
+
+# Ensemble des hachages déjà vus, stocké en blocs triés de tailles décroissantes :
+# un nouveau lot ajoute un petit bloc, fusionné avec le précédent dès que celui-ci n'est plus au moins
+# deux fois plus grand (comme un arbre LSM). Le nombre de blocs reste logarithmique et chaque hachage
+# n'est recopié qu'un nombre logarithmique de fois.
+class EnsembleHachages:
+    def __init__(self, hachages=None):
+        self.blocs = []
+        if hachages is not None and len(hachages):
+            self.blocs.append(np.unique(np.asarray(hachages, dtype=np.uint64)))
+
+    def __len__(self):
+        return sum(len(bloc) for bloc in self.blocs)
+
+    # Masque des hachages déjà présents dans l'ensemble
+    def contient(self, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        presents = np.zeros(len(hachages), dtype=bool)
+        for bloc in self.blocs:
+            positions = np.searchsorted(bloc, hachages)
+            positions[positions == len(bloc)] = 0
+            presents |= bloc[positions] == hachages
+        return presents
+
+    def ajouter(self, hachages):
+        nouveaux = np.unique(np.asarray(hachages, dtype=np.uint64))
+        if not len(nouveaux):
+            return
+        self.blocs.append(nouveaux)
+        while len(self.blocs) > 1 and len(self.blocs[-2]) <= 2 * len(self.blocs[-1]):
+            dernier = self.blocs.pop()
+            self.blocs[-1] = np.union1d(self.blocs[-1], dernier)
+
+    # Masque des lignes à conserver (clé jamais vue, première occurrence dans le lot) et mise à jour
+    def filtrer(self, hachages):
+        garder = premieres_occurrences(hachages) & ~self.contient(hachages)
+        self.ajouter(hachages[garder])
+        return garder
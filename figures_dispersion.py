@@ -0,0 +1,316 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe les figures de l'analyse de la dispersion album/artiste (`album_unique_artistes.py`) :
+# la figure technique à six panneaux et les quatre graphiques du dashboard grand public.
+# Chaque figure est une fonction indépendante qui reçoit des statistiques déjà calculées et enregistre
+# son fichier : les figures peuvent ainsi être rendues en parallèle (`rendu_figures.py`).
+# `taches_technique` et `taches_dashboards` préparent ces tâches pour le script et le pipeline
+# (`pipeline.py`), qui peut ne rendre que les dashboards.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import warnings
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Couleurs corporate et modernes
+colors_primary = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
+colors_accent = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+
+
+# Configuration pour l'affichage (processus principal et processus de rendu)
+def configurer_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+
+#################################################################################################
+
+# Figure technique : `stats` contient une ligne par playlist (albums/artistes uniques, ratio, différence)
+def figure_analyse_technique(stats, ratio_moyen, ratio_par_taille, chemin):
+    # Configuration de la figure avec espacement optimisé
+    fig, axes = plt.subplots(2, 3, figsize=(20, 14))
+    fig.suptitle('Analyse de la Dispersion Album/Artiste dans les Playlists', 
+                 fontsize=16, fontweight='bold', y=0.98)
+
+    # 1. Distribution des albums et artistes uniques
+    axes[0, 0].hist(stats['albums_uniques_reels'], bins=30, alpha=0.7, 
+                   label='Albums uniques', color='skyblue')
+    axes[0, 0].hist(stats['artistes_uniques_reels'], bins=30, alpha=0.7, 
+                   label='Artistes uniques', color='lightcoral')
+    axes[0, 0].set_xlabel('Nombre')
+    axes[0, 0].set_ylabel('Fréquence')
+    axes[0, 0].set_title('Distribution Albums vs Artistes Uniques')
+    axes[0, 0].legend()
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # 2. Scatter plot Albums vs Artistes
+    axes[0, 1].scatter(stats['artistes_uniques_reels'], 
+                      stats['albums_uniques_reels'], 
+                      alpha=0.6, s=30)
+    # Ligne y=x pour référence
+    max_val = max(stats['artistes_uniques_reels'].max(), 
+                  stats['albums_uniques_reels'].max())
+    axes[0, 1].plot([0, max_val], [0, max_val], 'r--', alpha=0.8, linewidth=2, 
+                   label='Ligne d\'égalité (y=x)')
+    axes[0, 1].set_xlabel('Artistes uniques')
+    axes[0, 1].set_ylabel('Albums uniques')
+    axes[0, 1].set_title('Relation Albums vs Artistes')
+    axes[0, 1].legend()
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # 3. Distribution du ratio Albums/Artistes
+    axes[0, 2].hist(stats['ratio_albums_artistes'], bins=30, 
+                   alpha=0.7, color='green', edgecolor='black')
+    axes[0, 2].axvline(x=1, color='red', linestyle='--', linewidth=2, 
+                      label='Ratio = 1')
+    axes[0, 2].axvline(x=ratio_moyen, color='blue', linestyle='-', 
+                      linewidth=2, label=f'Moyenne = {ratio_moyen:.2f}')
+    axes[0, 2].set_xlabel('Ratio Albums/Artistes')
+    axes[0, 2].set_ylabel('Fréquence')
+    axes[0, 2].set_title('Distribution du Ratio Albums/Artistes')
+    axes[0, 2].legend()
+    axes[0, 2].grid(True, alpha=0.3)
+
+    # 4. Distribution de la différence
+    axes[1, 0].hist(stats['diff_albums_artistes'], bins=30, 
+                   alpha=0.7, color='purple', edgecolor='black')
+    axes[1, 0].axvline(x=0, color='red', linestyle='--', linewidth=2, 
+                      label='Différence = 0')
+    axes[1, 0].set_xlabel('Différence (Albums - Artistes)')
+    axes[1, 0].set_ylabel('Fréquence')
+    axes[1, 0].set_title('Distribution de la Différence Albums - Artistes')
+    axes[1, 0].legend()
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # 5. Box plot comparatif
+    data_boxplot = [stats['artistes_uniques_reels'], 
+                    stats['albums_uniques_reels']]
+    axes[1, 1].boxplot(data_boxplot, labels=['Artistes', 'Albums'])
+    axes[1, 1].set_ylabel('Nombre d\'éléments uniques')
+    axes[1, 1].set_title('Comparaison Box Plot')
+    axes[1, 1].grid(True, alpha=0.3)
+
+    # 6. Analyse par taille de playlist
+    axes[1, 2].bar(range(len(ratio_par_taille)), ratio_par_taille.values, 
+                  color=['lightblue', 'lightgreen', 'lightyellow', 'lightpink'])
+    axes[1, 2].set_xticks(range(len(ratio_par_taille)))
+    axes[1, 2].set_xticklabels(ratio_par_taille.index, rotation=45, ha='right')
+    axes[1, 2].axhline(y=1, color='red', linestyle='--', alpha=0.8)
+    axes[1, 2].set_ylabel('Ratio moyen Albums/Artistes')
+    axes[1, 2].set_title('Ratio par Taille de Playlist')
+    axes[1, 2].grid(True, alpha=0.3)
+
+    # Ajustement de l'espacement pour éviter la superposition des titres
+    plt.subplots_adjust(top=0.93, bottom=0.08, left=0.08, right=0.95, 
+                        hspace=0.35, wspace=0.25)
+    plt.savefig(chemin, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    return f"Visualisations techniques sauvegardées : {chemin}"
+
+#################################################################################################
+
+# VISUALISATIONS POUR DASHBOARD GRAND PUBLIC
+
+def dashboard_message_principal(pct_plus_albums, chemin):
+    # 1. GRAPHIQUE PRINCIPAL : Message percutant
+    fig1, ax1 = plt.subplots(figsize=(12, 8))
+
+    # Données pour le graphique en secteurs
+    labels = [f'Plus d\'albums\n({pct_plus_albums:.1f}%)', 
+              f'Plus d\'artistes\n({100-pct_plus_albums:.1f}%)']
+    sizes = [pct_plus_albums, 100-pct_plus_albums]
+    colors = ['#4ECDC4', '#FF6B6B']
+    explode = (0.1, 0)  # Mise en avant du secteur principal
+
+    wedges, texts, autotexts = ax1.pie(sizes, explode=explode, labels=labels, colors=colors,
+                                       autopct='%1.1f%%', startangle=90, 
+                                       textprops={'fontsize': 14, 'fontweight': 'bold'})
+
+    ax1.set_title('🎵 Les playlists Spotify privilégient la DIVERSITÉ des ALBUMS\n'
+                  f'Sur 10 000 playlists analysées', 
+                  fontsize=18, fontweight='bold', pad=20)
+
+    # Ajout d'un message central
+    circle = plt.Circle((0,0), 0.4, fc='white', linewidth=2, edgecolor='gray')
+    fig1.gca().add_artist(circle)
+    ax1.text(0, 0, f'{pct_plus_albums:.0f}%\nConfirmé', 
+             horizontalalignment='center', verticalalignment='center',
+             fontsize=20, fontweight='bold', color='#2c3e50')
+
+    plt.tight_layout()
+    plt.savefig(chemin, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig1)
+    return f"Graphique principal sauvegardé : {chemin}"
+
+
+# `moyennes` : [artistes uniques moyens, albums uniques moyens] par playlist
+def dashboard_comparaison_moyennes(moyennes, chemin):
+    # 2. COMPARAISON SIMPLE : Barres horizontales
+    fig2, ax2 = plt.subplots(figsize=(12, 6))
+
+    categories = ['Artistes uniques\npar playlist', 'Albums uniques\npar playlist']
+    colors_bars = ['#FF6B6B', '#4ECDC4']
+
+    bars = ax2.barh(categories, moyennes, color=colors_bars, height=0.6)
+
+    # Ajout des valeurs sur les barres
+    for i, (bar, value) in enumerate(zip(bars, moyennes)):
+        ax2.text(value + 1, bar.get_y() + bar.get_height()/2, 
+                 f'{value:.1f}', ha='left', va='center', 
+                 fontsize=16, fontweight='bold')
+
+    ax2.set_xlabel('Nombre moyen par playlist', fontsize=14, fontweight='bold')
+    ax2.set_title('📊 En moyenne, chaque playlist contient plus d\'albums que d\'artistes\n'
+                  'Les utilisateurs explorent en profondeur les catalogues', 
+                  fontsize=16, fontweight='bold', pad=20)
+
+    ax2.grid(axis='x', alpha=0.3)
+    ax2.set_xlim(0, max(moyennes) * 1.2)
+
+    # Ajout d'une flèche et annotation
+    ax2.annotate('10,5 albums de plus\nen moyenne !', 
+                 xy=(moyennes[1], 1), xytext=(moyennes[1]+5, 0.3),
+                 arrowprops=dict(arrowstyle='->', color='green', lw=2),
+                 fontsize=12, fontweight='bold', color='green')
+
+    plt.tight_layout()
+    plt.savefig(chemin, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig2)
+    return f"Graphique de comparaison sauvegardé : {chemin}"
+
+
+# `ratios_moyens` : ratio moyen albums/artistes des quatre catégories de taille
+def dashboard_tendance_taille(ratios_moyens, chemin):
+    # 3. TENDANCE PAR TAILLE : Message comportemental
+    fig3, ax3 = plt.subplots(figsize=(12, 7))
+
+    # Données par taille avec messages clairs
+    tailles_labels = ['Courtes\n(≤20 titres)', 'Moyennes\n(21-50 titres)', 
+                      'Longues\n(51-100 titres)', 'Très longues\n(>100 titres)']
+
+    bars = ax3.bar(tailles_labels, ratios_moyens, 
+                   color=['#FFE5B4', '#FFCC99', '#FFB366', '#FF9933'], 
+                   edgecolor='white', linewidth=2)
+
+    # Ligne de référence
+    ax3.axhline(y=1, color='red', linestyle='--', linewidth=3, alpha=0.8, 
+               label='Égalité albums = artistes')
+
+    # Ajout des valeurs sur les barres
+    for bar, value in zip(bars, ratios_moyens):
+        ax3.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.02,
+                 f'{value:.2f}', ha='center', va='bottom', 
+                 fontsize=14, fontweight='bold')
+
+    ax3.set_ylabel('Ratio Albums/Artistes', fontsize=14, fontweight='bold')
+    ax3.set_title('🎯 Plus la playlist est longue, plus la diversité d\'albums augmente\n'
+                  'Comportement constant quelque soit la taille de playlist', 
+                  fontsize=16, fontweight='bold', pad=20)
+
+    ax3.grid(axis='y', alpha=0.3)
+    ax3.legend(fontsize=12)
+    ax3.set_ylim(0, max(ratios_moyens) * 1.1)
+
+    plt.tight_layout()
+    plt.savefig(chemin, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig3)
+    return f"Graphique de tendance sauvegardé : {chemin}"
+
+
+def dashboard_infographie_synthese(pct_plus_albums, ratio_moyen, diff_moyenne, chemin):
+    # 4. INFOGRAPHIE DE SYNTHÈSE
+    fig4, ((ax4a, ax4b), (ax4c, ax4d)) = plt.subplots(2, 2, figsize=(16, 12))
+    fig4.suptitle('🎵 DÉCOUVERTE MUSICALE : Les utilisateurs Spotify explorent en PROFONDEUR', 
+                  fontsize=20, fontweight='bold', y=0.95)
+
+    # 4a. Statistique clé
+    ax4a.text(0.5, 0.5, f'{pct_plus_albums:.0f}%', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=60, fontweight='bold', color='#4ECDC4',
+              transform=ax4a.transAxes)
+    ax4a.text(0.5, 0.2, 'des playlists ont plus\nd\'albums que d\'artistes', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=16, fontweight='bold', transform=ax4a.transAxes)
+    ax4a.set_xlim(0, 1)
+    ax4a.set_ylim(0, 1)
+    ax4a.axis('off')
+
+    # 4b. Ratio moyen
+    ax4b.text(0.5, 0.5, f'{ratio_moyen:.2f}', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=50, fontweight='bold', color='#FF6B6B',
+              transform=ax4b.transAxes)
+    ax4b.text(0.5, 0.2, 'albums par artiste\nen moyenne', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=16, fontweight='bold', transform=ax4b.transAxes)
+    ax4b.set_xlim(0, 1)
+    ax4b.set_ylim(0, 1)
+    ax4b.axis('off')
+
+    # 4c. Différence moyenne
+    ax4c.text(0.5, 0.5, f'+{diff_moyenne:.1f}', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=50, fontweight='bold', color='#45B7D1',
+              transform=ax4c.transAxes)
+    ax4c.text(0.5, 0.2, 'albums de plus\nque d\'artistes', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=16, fontweight='bold', transform=ax4c.transAxes)
+    ax4c.set_xlim(0, 1)
+    ax4c.set_ylim(0, 1)
+    ax4c.axis('off')
+
+    # 4d. Conclusion métier
+    ax4d.text(0.5, 0.6, '💡 INSIGHT MÉTIER', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=18, fontweight='bold', color='#2c3e50',
+              transform=ax4d.transAxes)
+    ax4d.text(0.5, 0.4, 'Les utilisateurs préfèrent\nEXPLORER EN PROFONDEUR\nles catalogues d\'artistes\nplutôt que découvrir\nsuperficiellement', 
+              horizontalalignment='center', verticalalignment='center',
+              fontsize=14, fontweight='bold', transform=ax4d.transAxes)
+    ax4d.set_xlim(0, 1)
+    ax4d.set_ylim(0, 1)
+    ax4d.axis('off')
+
+    plt.tight_layout()
+    plt.savefig(chemin, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig4)
+    return f"Infographie de synthèse sauvegardée : {chemin}"
+
+#################################################################################################
+
+# Tâches de rendu (fonction, arguments) de la figure technique, à partir des statistiques par playlist.
+# `resultats` vient de statistiques_dispersion.calculer_resultats, `ratio_par_taille` de ratio_par_categorie.
+def taches_technique(playlists_stats, resultats, ratio_par_taille, output_dir):
+    colonnes_figure = ['albums_uniques_reels', 'artistes_uniques_reels', 'ratio_albums_artistes',
+                       'diff_albums_artistes']
+    return [
+        (figure_analyse_technique, {'stats': playlists_stats[colonnes_figure],
+                                    'ratio_moyen': resultats['ratio_moyen'],
+                                    'ratio_par_taille': ratio_par_taille,
+                                    'chemin': os.path.join(output_dir, 'analyse_dispersion_album_artiste.png')}),
+    ]
+
+
+# Tâches de rendu des quatre graphiques du dashboard : seuls les résultats agrégés sont nécessaires
+def taches_dashboards(resultats, ratio_par_taille, output_dir):
+    return [
+        (dashboard_message_principal, {'pct_plus_albums': resultats['pct_plus_albums'],
+                                       'chemin': os.path.join(output_dir, 'dashboard_1_message_principal.png')}),
+        (dashboard_comparaison_moyennes, {'moyennes': resultats['moyennes'],
+                                          'chemin': os.path.join(output_dir, 'dashboard_2_comparaison_moyennes.png')}),
+        (dashboard_tendance_taille, {'ratios_moyens': ratio_par_taille.values,
+                                     'chemin': os.path.join(output_dir, 'dashboard_3_tendance_taille.png')}),
+        (dashboard_infographie_synthese, {'pct_plus_albums': resultats['pct_plus_albums'],
+                                          'ratio_moyen': resultats['ratio_moyen'],
+                                          'diff_moyenne': resultats['diff_moyenne'],
+                                          'chemin': os.path.join(output_dir, 'dashboard_4_infographie_synthese.png')}),
+    ]
@@ -0,0 +1,153 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe les graphiques de l'analyse exploratoire (`analyse_exploratoire.py`).
+# Chaque graphique est une fonction indépendante qui reçoit des données déjà résumées (résumés de
+# distribution, Top 20, fréquences de mots, matrice de corrélation, points par playlist), enregistre
+# son fichier et renvoie un message : les graphiques sont rendus en parallèle (`rendu_figures.py`).
+# `taches_figures` prépare ces tâches pour le script et le pipeline (`pipeline.py`).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import matplotlib.pyplot as plt
+import seaborn as sns
+from wordcloud import WordCloud
+
+from resume_distributions import tracer_histogramme, tracer_boite
+
+#################################################################################################
+
+# A. Analyse univariée
+
+# Visualisation des distributions
+def tracer_distributions(resumes, chemin):
+    plt.figure(figsize=(15, 12))
+    plt.suptitle('Analyse univariée - Distributions des variables numériques', fontsize=16)
+    for i, (col, resume) in enumerate(resumes.items(), 1):
+        # L'échelle log (classes espacées logarithmiquement) est utile pour les données très asymétriques
+        tracer_histogramme(plt.subplot(3, 2, i), resume, col)
+        plt.title(f'Distribution de {col}')
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.savefig(chemin)
+    plt.close()
+    return f"Graphiques des distributions univariées sauvegardés : {chemin}"
+
+
+# Boxplots pour les variables numériques
+def tracer_boxplots(resumes, chemin):
+    plt.figure(figsize=(15, 10))
+    plt.suptitle('Analyse univariée - Boxplots des variables numériques', fontsize=16)
+    for i, (col, resume) in enumerate(resumes.items(), 1):
+        tracer_boite(plt.subplot(2, 3, i), resume, col)
+        plt.title(f'Boxplot de {col}')
+        plt.yscale('log')
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.savefig(chemin)
+    plt.close()
+    return f"Boxplots sauvegardés : {chemin}"
+
+
+# Analyse des variables catégorielles : `top_n` contient déjà les n valeurs les plus fréquentes
+def plot_top_n(top_n, column, title, chemin):
+    plt.figure(figsize=(12, 8))
+    sns.barplot(x=top_n.values, y=top_n.index, palette='viridis')
+    plt.title(title)
+    plt.xlabel("Nombre d'apparitions")
+    plt.ylabel(column.replace('_', ' ').title())
+    plt.tight_layout()
+    plt.savefig(chemin)
+    plt.close()
+    return f"Graphique '{title}' sauvegardé : {chemin}"
+
+
+# Nuage de mots à partir des fréquences des mots des noms de playlists
+def tracer_nuage_mots(frequences_mots, chemin):
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequences_mots)
+    plt.figure(figsize=(10, 5))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.title('Nuage de mots des noms de playlists')
+    plt.savefig(chemin)
+    plt.close()
+    return f"Nuage de mots sauvegardé : {chemin}"
+
+#################################################################################################
+
+# B. Analyse bivariée
+
+# Matrice de corrélation
+def tracer_correlation(corr_matrix, chemin):
+    plt.figure(figsize=(12, 10))
+    sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap='coolwarm', linewidths=.5)
+    plt.title('Analyse bivariée - Matrice de corrélation')
+    plt.savefig(chemin)
+    plt.close()
+    return f"Matrice de corrélation sauvegardée : {chemin}"
+
+
+# Pairplot pour les variables clés, un point par playlist. Dans les deux rendus, chaque playlist compte une
+# fois, dans les histogrammes de la diagonale comme dans les panneaux croisés (points ou densité 2D).
+def tracer_pairplot(points, colonnes, densite, chemin):
+    if densite:
+        sns.pairplot(points[colonnes], kind='hist')
+    else:
+        sns.pairplot(points[colonnes])
+    plt.suptitle('Analyse bivariée - Pairplot des variables clés', y=1.02)
+    plt.savefig(chemin)
+    plt.close()
+    return f"Pairplot sauvegardé : {chemin}"
+
+
+# Scatter plot spécifique
+def tracer_scatter(points, densite, chemin):
+    plt.figure(figsize=(10, 6))
+    if densite:
+        # Hexagones en échelle log, couleur selon le nombre de playlists
+        plt.hexbin(points['num_tracks'], points['num_followers'], xscale='log', yscale='log',
+                   gridsize=60, mincnt=1, bins='log', cmap='Blues')
+        plt.colorbar(label='Nombre de playlists')
+    else:
+        sns.scatterplot(data=points, x='num_tracks', y='num_followers', alpha=0.5)
+    plt.title('Relation entre le nombre de pistes et le nombre de followers')
+    plt.xlabel('Nombre de pistes')
+    plt.ylabel('Nombre de followers')
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.grid(True)
+    plt.savefig(chemin)
+    plt.close()
+    return f"Nuage de points sauvegardé : {chemin}"
+
+#################################################################################################
+
+# Tâches de rendu (fonction, arguments) de tous les graphiques, enregistrés dans `output_dir`.
+# `tops` associe chaque colonne catégorielle à son Top 20 (statistiques_exploratoire.top_valeurs).
+def taches_figures(resumes, tops, frequences_mots, corr_matrix, points_traces, colonnes_pairplot, densite,
+                   output_dir):
+    return [
+        (tracer_distributions, {'resumes': resumes,
+                                'chemin': os.path.join(output_dir, 'univar_1_distributions_numeriques.png')}),
+        (tracer_boxplots, {'resumes': resumes,
+                           'chemin': os.path.join(output_dir, 'univar_2_boxplots_numeriques.png')}),
+        (plot_top_n, {'top_n': tops['artist_name'], 'column': 'artist_name',
+                      'title': 'Top 20 des artistes les plus fréquents',
+                      'chemin': os.path.join(output_dir, 'univar_3_top20_artistes.png')}),
+        (plot_top_n, {'top_n': tops['album_name'], 'column': 'album_name',
+                      'title': 'Top 20 des albums les plus fréquents',
+                      'chemin': os.path.join(output_dir, 'univar_4_top20_albums.png')}),
+        (tracer_nuage_mots, {'frequences_mots': frequences_mots,
+                             'chemin': os.path.join(output_dir, 'univar_5_wordcloud_noms_playlist.png')}),
+        (tracer_correlation, {'corr_matrix': corr_matrix,
+                              'chemin': os.path.join(output_dir, 'bivar_1_matrice_correlation.png')}),
+        (tracer_pairplot, {'points': points_traces, 'colonnes': colonnes_pairplot, 'densite': densite,
+                           'chemin': os.path.join(output_dir, 'bivar_2_pairplot.png')}),
+        (tracer_scatter, {'points': points_traces, 'densite': densite,
+                          'chemin': os.path.join(output_dir, 'bivar_3_scatter_pistes_followers.png')}),
+    ]
@@ -0,0 +1,133 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module implémente des sketches HyperLogLog vectorisés pour estimer des nombres de valeurs distinctes :
+# Un tableau de registres uint8 de forme (nombre de sketches, 2**precision) : un sketch par ligne
+# (par exemple un par playlist), mis à jour en une seule opération numpy pour toutes les lignes.
+# Les sketches sont fusionnables : le sketch d'une union est le maximum des registres, ce qui permet
+# de passer des playlists aux tailles de playlist ou au corpus entier sans relire les données.
+#
+# L'erreur relative type d'un sketch est 1.04 / sqrt(2**precision).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import numpy as np
+import pandas as pd
+
+PRECISION_MIN = 4
+PRECISION_MAX = 16
+
+#################################################################################################
+
+# Erreur relative type d'un sketch de précision donnée
+def erreur_relative(precision):
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+# Plus petite précision dont l'erreur relative type ne dépasse pas `erreur`
+def precision_pour_erreur(erreur):
+    if not 0 < erreur < 1:
+        raise ValueError(f"Erreur relative attendue dans ]0, 1[ : {erreur}")
+    precision = int(np.ceil(np.log2((1.04 / erreur) ** 2)))
+    return min(max(precision, PRECISION_MIN), PRECISION_MAX)
+
+
+# Hachages 64 bits des valeurs d'une colonne et masque des valeurs présentes.
+# Chaque valeur distincte n'est hachée qu'une fois ; le hachage ne dépend que de la valeur
+# (et non de son code de catégorie), les sketches de lots différents restent donc fusionnables.
+def hacher_valeurs(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codes, distinctes = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codes, distinctes = pd.factorize(serie)
+    hachages_distincts = pd.util.hash_array(np.asarray(distinctes, dtype=object))
+    presentes = codes >= 0
+    return hachages_distincts[np.where(presentes, codes, 0)], presentes
+
+#################################################################################################
+
+# Constante de correction du biais de l'estimateur
+def alpha(m):
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+class RegistresHyperLogLog:
+    def __init__(self, nb_sketches, precision, registres=None):
+        if not PRECISION_MIN <= precision <= PRECISION_MAX:
+            raise ValueError(f"Précision attendue entre {PRECISION_MIN} et {PRECISION_MAX} : {precision}")
+        self.precision = int(precision)
+        if registres is None:
+            registres = np.zeros((nb_sketches, 2 ** self.precision), dtype=np.uint8)
+        elif registres.shape != (nb_sketches, 2 ** self.precision):
+            raise ValueError(f"Registres de forme {registres.shape}, attendu ({nb_sketches}, {2 ** self.precision}).")
+        self.registres = registres
+
+    def __len__(self):
+        return len(self.registres)
+
+    @property
+    def erreur(self):
+        return erreur_relative(self.precision)
+
+    # Ajout de hachages 64 bits : `sketches[i]` est la ligne (sketch) qui reçoit `hachages[i]`.
+    # Les `precision` bits de poids faible choisissent le registre, le rang du premier bit à 1
+    # des bits restants est conservé s'il dépasse la valeur du registre.
+    def ajouter(self, sketches, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        registres = (hachages & np.uint64(2 ** self.precision - 1)).astype(np.int64)
+        reste = hachages >> np.uint64(self.precision)
+        bit_faible = reste & (np.uint64(0) - reste)
+        rangs = np.where(reste == 0, 64 - self.precision + 1,
+                         np.log2(np.maximum(bit_faible, 1).astype(np.float64)) + 1).astype(np.uint8)
+        np.maximum.at(self.registres, (np.asarray(sketches, dtype=np.int64), registres), rangs)
+
+    # Union sketch à sketch avec d'autres registres de même forme
+    def fusionner(self, autre):
+        if autre.precision != self.precision or len(autre) != len(self):
+            raise ValueError("Sketches de précisions ou de tailles différentes.")
+        np.maximum(self.registres, autre.registres, out=self.registres)
+        return self
+
+    # Union des sketches par groupe : la ligne g du résultat fusionne les sketches d'étiquette g
+    def regrouper(self, etiquettes, nb_groupes):
+        resultat = RegistresHyperLogLog(nb_groupes, self.precision)
+        etiquettes = np.asarray(etiquettes, dtype=np.int64)
+        presents = etiquettes >= 0
+        np.maximum.at(resultat.registres, etiquettes[presents], self.registres[presents])
+        return resultat
+
+    # Sélection d'un sous-ensemble de sketches (indices ou masque)
+    def selectionner(self, lignes):
+        registres = self.registres[lignes]
+        return RegistresHyperLogLog(len(registres), self.precision, registres)
+
+    @classmethod
+    def concatener(cls, liste, precision):
+        liste = list(liste)
+        if not liste:
+            return cls(0, precision)
+        registres = np.concatenate([sketch.registres for sketch in liste])
+        return cls(len(registres), precision, registres)
+
+    # Nombre estimé de valeurs distinctes de chaque sketch
+    # (comptage linéaire pour les petites cardinalités, aucune correction haute avec 64 bits)
+    def estimer(self):
+        m = 2 ** self.precision
+        somme = np.ldexp(1.0, -self.registres.astype(np.int64)).sum(axis=1)
+        estimation = alpha(m) * m * m / somme
+        vides = (self.registres == 0).sum(axis=1)
+        petites = (estimation <= 2.5 * m) & (vides > 0)
+        estimation[petites] = m * np.log(m / vides[petites])
+        return estimation
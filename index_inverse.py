@@ -0,0 +1,355 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module construit et interroge un index inversé des données nettoyées (`alcrowd/index_inverse/`),
+# pour répondre à « quelles playlists contiennent l'artiste X / l'album Y » ou « quels artistes
+# apparaissent le plus souvent avec X » sans recharger ni filtrer toute la table.
+# L'index est construit à la fin du nettoyage (`nettoyage.py`) à partir des codes int32 des URIs du Parquet :
+# - listes de playlists : pour chaque artist_uri, album_uri et track_uri, les pid qui le contiennent, triés,
+#   codés par différences successives en entiers de longueur variable (varint, 1 octet pour un écart < 128) ;
+# - index direct : pour chaque pid, ses lignes dans la table (début, fin) et les codes de ses pistes,
+#   avec l'artiste et l'album de chaque piste (pour les co-occurrences) ;
+# - URIs de chaque colonne en octets de largeur fixe, avec leur ordre de tri (URI -> code par dichotomie).
+# Tous les tableaux sont des .npy ouverts en mémoire projetée (mmap) : une requête ne lit que les
+# listes dont elle a besoin et répond en quelques millisecondes.
+#
+# Utilisation :
+#   python index_inverse.py construire                          (depuis le Parquet existant)
+#   python index_inverse.py playlists --artiste URI [--album URI] [--piste URI]
+#   python index_inverse.py cooccurrences --artiste URI [--cible artiste|album] [--n 20]
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from chargement_donnees import DOSSIER_DONNEES, chemin_donnees_nettoyees
+from schema_donnees import COLONNES_URI, charger_dictionnaires
+
+VERSION_INDEX = 1
+
+# Noms courts des colonnes indexées (ligne de commande)
+TYPES_URI = {'artiste': 'artist_uri', 'album': 'album_uri', 'piste': 'track_uri'}
+
+# Nombre maximal d'octets d'un varint : 5 suffisent pour les pid et écarts (int32 positifs)
+OCTETS_VARINT_MAX = 5
+
+
+def dossier_index(dossier=DOSSIER_DONNEES):
+    return os.path.join(dossier, 'index_inverse')
+
+
+# État (taille, date de modification) des fichiers des données nettoyées, pour détecter un index périmé
+def etat_donnees(chemin):
+    if os.path.isdir(chemin):
+        fichiers = sorted(os.path.join(racine, nom) for racine, _, noms in os.walk(chemin) for nom in noms)
+    else:
+        fichiers = [chemin]
+    return [[os.path.relpath(fichier, chemin), os.stat(fichier).st_size, os.stat(fichier).st_mtime_ns]
+            for fichier in fichiers]
+
+#################################################################################################
+
+# Codage varint : 7 bits par octet, bit de poids fort à 1 si la valeur continue sur l'octet suivant
+
+def encoder_varint(valeurs):
+    valeurs = np.asarray(valeurs, dtype=np.uint64)
+    nb_octets = np.ones(len(valeurs), dtype=np.int64)
+    for k in range(1, OCTETS_VARINT_MAX):
+        nb_octets += valeurs >= (1 << (7 * k))
+    debuts = np.concatenate([[0], np.cumsum(nb_octets)[:-1]])
+    octets = np.empty(int(nb_octets.sum()), dtype=np.uint8)
+    for k in range(OCTETS_VARINT_MAX):
+        presents = nb_octets > k
+        suite = np.where(nb_octets[presents] > k + 1, 0x80, 0).astype(np.uint64)
+        octets[debuts[presents] + k] = ((valeurs[presents] >> np.uint64(7 * k)) & np.uint64(0x7F)) | suite
+    return octets, nb_octets
+
+
+def decoder_varint(octets):
+    octets = np.asarray(octets)
+    fins = np.flatnonzero(octets < 0x80)
+    debuts = np.concatenate([[0], fins[:-1] + 1])
+    valeurs = np.zeros(len(fins), dtype=np.int64)
+    for k in range(OCTETS_VARINT_MAX):
+        presents = debuts + k <= fins
+        if not presents.any():
+            break
+        valeurs[presents] |= (octets[debuts[presents] + k].astype(np.int64) & 0x7F) << (7 * k)
+    return valeurs
+
+#################################################################################################
+
+# Construction
+
+# Listes de playlists d'une colonne d'URIs : couples (code, pid) distincts triés, puis écarts codés en varint.
+# Renvoie les octets, le début de la liste de chaque code dans les octets et le nombre de playlists par code.
+def listes_playlists(codes, pids, nb_codes):
+    presents = codes >= 0
+    codes, pids = codes[presents], pids[presents]
+    ordre = np.lexsort((pids, codes))
+    codes, pids = codes[ordre], pids[ordre]
+    distincts = np.ones(len(codes), dtype=bool)
+    distincts[1:] = (codes[1:] != codes[:-1]) | (pids[1:] != pids[:-1])
+    codes, pids = codes[distincts], pids[distincts]
+
+    # Premier pid de chaque liste codé tel quel, les suivants par écart au précédent
+    ecarts = pids.astype(np.int64)
+    nouvelle_liste = np.ones(len(codes), dtype=bool)
+    nouvelle_liste[1:] = codes[1:] != codes[:-1]
+    ecarts[1:] = np.where(nouvelle_liste[1:], pids[1:], np.diff(pids.astype(np.int64)))
+    octets, nb_octets = encoder_varint(ecarts)
+
+    effectifs = np.bincount(codes, minlength=nb_codes).astype(np.int32)
+    debuts_couples = np.concatenate([[0], np.cumsum(effectifs)])
+    octets_cumules = np.concatenate([[0], np.cumsum(nb_octets)])
+    return octets, octets_cumules[debuts_couples], effectifs
+
+
+# URIs en octets de largeur fixe (ordre des codes) et leur ordre de tri
+def table_uris(valeurs):
+    uris = np.array([valeur.encode('utf-8') for valeur in valeurs], dtype=bytes)
+    if len(uris) == 0:
+        uris = np.empty(0, dtype='S1')
+    return uris, np.argsort(uris, kind='stable').astype(np.int32)
+
+
+def lire_colonnes(chemin, colonnes):
+    import pyarrow.dataset as ds
+    table = ds.dataset(chemin, format='parquet').to_table(columns=colonnes)
+    return {col: table.column(col).to_numpy() for col in colonnes}
+
+
+# Écriture atomique d'un tableau : l'index en cours d'écriture n'est jamais lu à moitié
+def sauvegarder_tableau(dossier, nom, tableau):
+    chemin = os.path.join(dossier, f'{nom}.npy')
+    with open(chemin + '.tmp', 'wb') as f:
+        np.save(f, tableau)
+    os.replace(chemin + '.tmp', chemin)
+
+
+# Construction complète de l'index depuis le Parquet des données nettoyées (fichier ou dossier de partitions)
+# et les tables d'URIs (code -> URI) du nettoyage. Les colonnes sont traitées une à une pour borner la mémoire.
+def construire_index(dossier=DOSSIER_DONNEES, dictionnaires=None):
+    chemin_parquet = chemin_donnees_nettoyees(dossier)
+    if not chemin_parquet.endswith('.parquet'):
+        raise ValueError("L'index inversé se construit à partir du Parquet (pyarrow nécessaire).")
+    if dictionnaires is None:
+        dictionnaires = charger_dictionnaires(dossier)
+    sortie = dossier_index(dossier)
+    os.makedirs(sortie, exist_ok=True)
+    debut = time.perf_counter()
+
+    # Index direct : lignes de chaque pid (contiguës) et pistes dans l'ordre de la table
+    colonnes = lire_colonnes(chemin_parquet, ['pid', 'track_uri', 'artist_uri', 'album_uri'])
+    pids = colonnes['pid'].astype(np.int32)
+    changements = np.flatnonzero(np.diff(pids)) + 1
+    debuts = np.concatenate([[0], changements]).astype(np.int64)
+    fins = np.concatenate([changements, [len(pids)]]).astype(np.int64)
+    pids_distincts = pids[debuts]
+    if len(np.unique(pids_distincts)) != len(pids_distincts):
+        raise ValueError("Les lignes d'une même playlist ne sont pas contiguës dans les données nettoyées.")
+    lignes_pid = np.zeros((int(pids.max()) + 1 if len(pids) else 0, 2), dtype=np.int64)
+    lignes_pid[pids_distincts, 0] = debuts
+    lignes_pid[pids_distincts, 1] = fins
+    sauvegarder_tableau(sortie, 'pid_lignes', lignes_pid)
+    sauvegarder_tableau(sortie, 'pistes', colonnes['track_uri'].astype(np.int32))
+
+    # Artiste et album de chaque piste (un seul par URI de piste dans le MPD)
+    nb_pistes = len(dictionnaires['track_uri'])
+    for col, nom in (('artist_uri', 'piste_artiste'), ('album_uri', 'piste_album')):
+        correspondance = np.full(nb_pistes, -1, dtype=np.int32)
+        presents = (colonnes['track_uri'] >= 0) & (colonnes[col] >= 0)
+        correspondance[colonnes['track_uri'][presents]] = colonnes[col][presents]
+        sauvegarder_tableau(sortie, nom, correspondance)
+
+    description = {'version': VERSION_INDEX, 'nb_lignes': int(len(pids)), 'nb_playlists': int(len(pids_distincts)),
+                   'donnees': etat_donnees(chemin_parquet), 'colonnes': {}}
+    for col in COLONNES_URI:
+        octets, debuts_listes, effectifs = listes_playlists(colonnes[col], pids, len(dictionnaires[col]))
+        sauvegarder_tableau(sortie, f'{col}.octets', octets)
+        sauvegarder_tableau(sortie, f'{col}.debuts', debuts_listes)
+        sauvegarder_tableau(sortie, f'{col}.effectifs', effectifs)
+        uris, ordre = table_uris(dictionnaires[col].valeurs)
+        sauvegarder_tableau(sortie, f'{col}.uris', uris)
+        sauvegarder_tableau(sortie, f'{col}.ordre', ordre)
+        description['colonnes'][col] = {'nb_uris': len(uris), 'nb_couples': int(effectifs.sum()),
+                                        'octets_listes': int(len(octets))}
+        del colonnes[col]
+
+    with open(os.path.join(sortie, 'index.json'), 'w') as f:
+        json.dump(description, f, indent=2)
+    print(f"Index inversé construit en {time.perf_counter() - debut:.1f} s : {sortie}")
+    for col, infos in description['colonnes'].items():
+        print(f"  - {col:<11} {infos['nb_uris']:>9} URIs, {infos['nb_couples']:>10} couples (URI, playlist), "
+              f"{infos['octets_listes'] / max(infos['nb_couples'], 1):.2f} octets par couple")
+    return description
+
+#################################################################################################
+
+# Interrogation
+
+class IndexInverse:
+    def __init__(self, dossier=DOSSIER_DONNEES):
+        self.dossier = dossier_index(dossier)
+        chemin_description = os.path.join(self.dossier, 'index.json')
+        if not os.path.exists(chemin_description):
+            raise FileNotFoundError(f"Aucun index inversé : {self.dossier}\n"
+                                    "Pensez à exécuter d'abord `python nettoyage.py` ou "
+                                    "`python index_inverse.py construire`.")
+        with open(chemin_description) as f:
+            self.description = json.load(f)
+        if self.description.get('version') != VERSION_INDEX:
+            raise ValueError(f"Index inversé au format {self.description.get('version')} "
+                             f"(attendu : {VERSION_INDEX}) : le reconstruire.")
+        try:
+            if etat_donnees(chemin_donnees_nettoyees(dossier)) != self.description['donnees']:
+                print("Attention : les données nettoyées ont changé depuis la construction de l'index.")
+        except FileNotFoundError:
+            pass
+        self.tableaux = {}
+
+    def tableau(self, nom):
+        if nom not in self.tableaux:
+            self.tableaux[nom] = np.load(os.path.join(self.dossier, f'{nom}.npy'), mmap_mode='r')
+        return self.tableaux[nom]
+
+    # Code d'une URI (None si elle est absente), par dichotomie sur les URIs triées
+    def code(self, colonne, uri):
+        uris, ordre = self.tableau(f'{colonne}.uris'), self.tableau(f'{colonne}.ordre')
+        cible = uri.encode('utf-8')
+        bas, haut = 0, len(ordre)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if uris[ordre[milieu]] < cible:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        if bas < len(ordre) and uris[ordre[bas]] == cible:
+            return int(ordre[bas])
+        return None
+
+    def uri(self, colonne, code):
+        return self.tableau(f'{colonne}.uris')[code].decode('utf-8')
+
+    # Nombre de playlists contenant une URI
+    def effectif(self, colonne, uri):
+        code = self.code(colonne, uri)
+        return 0 if code is None else int(self.tableau(f'{colonne}.effectifs')[code])
+
+    # pid (triés) des playlists contenant une URI
+    def playlists(self, colonne, uri):
+        code = self.code(colonne, uri)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        debuts = self.tableau(f'{colonne}.debuts')
+        return np.cumsum(decoder_varint(self.tableau(f'{colonne}.octets')[debuts[code]:debuts[code + 1]]))
+
+    def contient(self, pid, colonne, uri):
+        pids = self.playlists(colonne, uri)
+        position = np.searchsorted(pids, pid)
+        return bool(position < len(pids) and pids[position] == pid)
+
+    # Playlists contenant toutes les URIs demandées ([(colonne, uri), ...]), en partant de la liste la plus courte
+    def playlists_communes(self, criteres):
+        criteres = sorted(criteres, key=lambda critere: self.effectif(*critere))
+        resultat = None
+        for colonne, uri in criteres:
+            pids = self.playlists(colonne, uri)
+            resultat = pids if resultat is None else np.intersect1d(resultat, pids, assume_unique=True)
+            if len(resultat) == 0:
+                break
+        return resultat if resultat is not None else np.empty(0, dtype=np.int64)
+
+    # Codes des pistes d'une playlist, dans l'ordre de la table (pos croissant)
+    def pistes(self, pid):
+        lignes_pid = self.tableau('pid_lignes')
+        if pid < 0 or pid >= len(lignes_pid):
+            return np.empty(0, dtype=np.int32)
+        debut, fin = lignes_pid[pid]
+        return np.asarray(self.tableau('pistes')[debut:fin])
+
+    # Les `n` artistes (ou albums) présents dans le plus de playlists contenant l'URI demandée
+    def cooccurrences(self, colonne, uri, cible='artist_uri', n=20):
+        pids = self.playlists(colonne, uri)
+        lignes = np.asarray(self.tableau('pid_lignes')[pids]) if len(pids) else np.empty((0, 2), dtype=np.int64)
+        longueurs = lignes[:, 1] - lignes[:, 0]
+        # Positions de toutes les lignes des playlists retenues, sans boucle Python sur les playlists
+        positions = np.repeat(lignes[:, 0] - np.concatenate([[0], np.cumsum(longueurs)[:-1]]), longueurs)
+        positions += np.arange(len(positions))
+        pistes = np.asarray(self.tableau('pistes')[positions])
+        if cible == 'track_uri':
+            codes = pistes
+        else:
+            codes = np.asarray(self.tableau('piste_artiste' if cible == 'artist_uri' else 'piste_album')[pistes])
+        playlists = np.repeat(np.arange(len(pids), dtype=np.int64), longueurs)
+        presents = codes >= 0
+        playlists, codes = playlists[presents], codes[presents].astype(np.int64)
+        # Un couple (playlist, URI) compte une fois, quel que soit le nombre de pistes concernées
+        nb_codes = int(codes.max()) + 1 if len(codes) else 1
+        comptes = np.bincount(np.unique(playlists * nb_codes + codes) % nb_codes, minlength=nb_codes)
+        exclu = self.code(cible, uri) if cible == colonne else None
+        if exclu is not None and exclu < len(comptes):
+            comptes[exclu] = 0
+        meilleurs = np.argsort(-comptes, kind='stable')[:n]
+        meilleurs = meilleurs[comptes[meilleurs] > 0]
+        return pd.DataFrame({cible: [self.uri(cible, code) for code in meilleurs],
+                             'nb_playlists': comptes[meilleurs]})
+
+#################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Index inversé URIs -> playlists des données nettoyées.")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    commandes.add_parser('construire', help="Construire l'index depuis le Parquet des données nettoyées.")
+
+    commande_playlists = commandes.add_parser('playlists', help="Playlists contenant toutes les URIs données.")
+    commande_cooccurrences = commandes.add_parser('cooccurrences',
+                                                  help="URIs les plus souvent présentes avec une URI donnée.")
+    for commande in (commande_playlists, commande_cooccurrences):
+        for nom in TYPES_URI:
+            commande.add_argument(f'--{nom}', default=None, help=f"URI ({TYPES_URI[nom]}).")
+    commande_playlists.add_argument('--afficher', type=int, default=20,
+                                    help="Nombre de pid affichés (défaut : 20).")
+    commande_cooccurrences.add_argument('--cible', choices=sorted(TYPES_URI), default='artiste',
+                                        help="Type des URIs comptées (défaut : artiste).")
+    commande_cooccurrences.add_argument('--n', type=int, default=20, help="Nombre de résultats (défaut : 20).")
+    args = parser.parse_args()
+
+    if args.commande == 'construire':
+        construire_index()
+        return
+
+    criteres = [(TYPES_URI[nom], getattr(args, nom)) for nom in TYPES_URI if getattr(args, nom)]
+    if not criteres:
+        parser.error("Indiquer au moins une URI (--artiste, --album ou --piste).")
+    index = IndexInverse()
+    debut = time.perf_counter()
+    if args.commande == 'playlists':
+        pids = index.playlists_communes(criteres)
+        duree = time.perf_counter() - debut
+        print(f"{len(pids)} playlist(s) trouvée(s) en {duree * 1000:.1f} ms.")
+        if len(pids):
+            print(', '.join(str(pid) for pid in pids[:args.afficher]) + (' ...' if len(pids) > args.afficher else ''))
+    else:
+        if len(criteres) > 1:
+            parser.error("Les co-occurrences portent sur une seule URI.")
+        resultat = index.cooccurrences(*criteres[0], cible=TYPES_URI[args.cible], n=args.n)
+        duree = time.perf_counter() - debut
+        print(f"Co-occurrences de {criteres[0][1]} calculées en {duree * 1000:.1f} ms "
+              f"({index.effectif(*criteres[0])} playlist(s)) :")
+        print(resultat.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module mesure les étapes des scripts (`nettoyage.py`, `analyse_exploratoire.py`,
+# `album_unique_artistes.py`) et produit un rapport d'exécution JSON :
+# Pour chaque étape nommée : durée réelle, temps CPU (du processus et des processus fils terminés),
+# pic de mémoire résidente (RSS) et nombre de lignes en entrée et en sortie.
+# Le rapport est écrit dans `alcrowd/rapports_execution/<script>-<horodatage>.json` (ou --rapport),
+# y compris si le script s'arrête sur une erreur, pour être suivi par le job de nuit.
+#
+# Sous Linux, le pic RSS est remis à zéro au début de chaque étape (/proc/self/clear_refs) : il est
+# donc propre à l'étape. Ailleurs, c'est le pic du processus depuis son lancement (getrusage).
+# Les étapes exécutées dans des processus de travail sont mesurées dans ces processus puis
+# fusionnées (cumulées par nom) dans l'étape parente (`fusionner`).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import sys
+import json
+import time
+import atexit
+import platform
+from datetime import datetime
+from contextlib import contextmanager
+
+# resource n'existe pas sous Windows : pas de temps CPU des processus fils ni de pic RSS hors Linux
+try:
+    import resource
+except ImportError:
+    resource = None
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DOSSIER_RAPPORTS = os.path.join(base_dir, 'alcrowd', 'rapports_execution')
+
+#################################################################################################
+
+# Pic de mémoire résidente du processus en octets (VmHWM sous Linux, getrusage ailleurs)
+def lire_pic_rss():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for ligne in f:
+                if ligne.startswith('VmHWM:'):
+                    return int(ligne.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pic if sys.platform == 'darwin' else pic * 1024
+    return None
+
+
+# Sous Linux, écrire 5 dans clear_refs ramène VmHWM à la mémoire résidente courante
+def reinitialiser_pic_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# Temps CPU (utilisateur + système) des processus fils terminés, par exemple un pool arrêté
+def temps_cpu_enfants():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def en_mo(octets):
+    return None if octets is None else round(octets / 2**20, 1)
+
+#################################################################################################
+
+class Instrumentation:
+    # Sans `script`, l'instrumentation ne fait que collecter des étapes (processus de travail) :
+    # aucun rapport n'est écrit.
+    def __init__(self, script=None, parametres=None, chemin_rapport=None):
+        self.script = script
+        self.parametres = parametres or {}
+        self.chemin_rapport = chemin_rapport
+        self.etapes = []
+        self.pile = []
+        self.horodatage = datetime.now()
+        self.debut = time.perf_counter()
+        self.debut_cpu = time.process_time()
+        self.debut_cpu_enfants = temps_cpu_enfants()
+        self.pic_par_etape = reinitialiser_pic_rss()
+        self.pic_rss = lire_pic_rss()
+        self.termine = False
+        if script is not None:
+            atexit.register(self.terminer_a_la_sortie)
+
+    # Relevé du pic RSS, reporté sur toutes les étapes ouvertes avant une éventuelle remise à zéro
+    def relever_pic(self):
+        pic = lire_pic_rss()
+        if pic is None:
+            return
+        self.pic_rss = max(self.pic_rss or 0, pic)
+        for etape in self.pile:
+            etape['pic_rss_octets'] = max(etape['pic_rss_octets'] or 0, pic)
+
+    # Étape nommée. Le dictionnaire renvoyé permet de renseigner les lignes en entrée et en sortie :
+    #     with instrumentation.etape('agregation', lignes_entree=len(df)) as etape:
+    #         stats = agreger(df)
+    #         etape['lignes_sortie'] = len(stats)
+    # Une étape répétée (par exemple une fois par lot) est cumulée dans une seule entrée du rapport.
+    @contextmanager
+    def etape(self, nom, lignes_entree=None):
+        self.relever_pic()
+        etape = {
+            'nom': nom, 'parent': self.pile[-1]['nom'] if self.pile else None, 'processus': 'principal',
+            'debut_s': time.perf_counter() - self.debut, 'duree_s': None, 'cpu_s': None, 'cpu_enfants_s': None,
+            'pic_rss_octets': None, 'lignes_entree': lignes_entree, 'lignes_sortie': None, 'occurrences': 1,
+        }
+        self.pile.append(etape)
+        reinitialiser_pic_rss()
+        debut, debut_cpu, debut_cpu_enfants = time.perf_counter(), time.process_time(), temps_cpu_enfants()
+        try:
+            yield etape
+        finally:
+            etape['duree_s'] = time.perf_counter() - debut
+            etape['cpu_s'] = time.process_time() - debut_cpu
+            etape['cpu_enfants_s'] = temps_cpu_enfants() - debut_cpu_enfants
+            self.relever_pic()
+            self.pile.pop()
+            self.cumuler(etape)
+
+    # Ajout d'une étape terminée, cumulée avec l'entrée de même nom, parent et processus si elle existe :
+    # durées, temps CPU et lignes s'additionnent, le pic RSS est le maximum.
+    def cumuler(self, etape):
+        cumul = next((e for e in self.etapes if (e['nom'], e['parent'], e['processus'])
+                      == (etape['nom'], etape['parent'], etape['processus'])), None)
+        if cumul is None:
+            self.etapes.append(etape)
+            return
+        for cle in ('duree_s', 'cpu_s', 'cpu_enfants_s', 'lignes_entree', 'lignes_sortie', 'occurrences'):
+            if etape[cle] is not None:
+                cumul[cle] = (cumul[cle] or 0) + etape[cle]
+        if etape['pic_rss_octets'] is not None:
+            cumul['pic_rss_octets'] = max(cumul['pic_rss_octets'] or 0, etape['pic_rss_octets'])
+
+    # Fusion des étapes mesurées dans un processus de travail : ses étapes de premier niveau sont
+    # rattachées à l'étape ouverte courante et cumulées par nom (processus 'travail').
+    def fusionner(self, etapes):
+        parent = self.pile[-1]['nom'] if self.pile else None
+        for etape in etapes:
+            self.cumuler(dict(etape, parent=etape['parent'] or parent, processus='travail', debut_s=None))
+
+    #############################################################################################
+
+    def rapport(self, statut='ok', erreur=None):
+        self.relever_pic()
+        pic_enfants = None
+        if resource is not None:
+            pic_enfants = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            pic_enfants = pic_enfants if sys.platform == 'darwin' else pic_enfants * 1024
+        etapes = []
+        for etape in self.etapes:
+            etape = dict(etape, pic_rss_mo=en_mo(etape['pic_rss_octets']))
+            del etape['pic_rss_octets']
+            etapes.append(etape)
+        return {
+            'script': self.script,
+            'statut': statut,
+            'erreur': erreur,
+            'debut': self.horodatage.isoformat(timespec='seconds'),
+            'duree_s': time.perf_counter() - self.debut,
+            'cpu_s': time.process_time() - self.debut_cpu,
+            'cpu_enfants_s': temps_cpu_enfants() - self.debut_cpu_enfants,
+            'pic_rss_mo': en_mo(self.pic_rss),
+            'pic_rss_enfants_mo': en_mo(pic_enfants),
+            'pic_rss_par_etape': self.pic_par_etape,
+            'parametres': self.parametres,
+            'environnement': {'python': platform.python_version(), 'plateforme': platform.platform(),
+                              'processeurs': os.cpu_count()},
+            'etapes': etapes,
+        }
+
+    # Écriture du rapport JSON et résumé des étapes principales à la console
+    def terminer(self, statut='ok', erreur=None):
+        self.termine = True
+        rapport = self.rapport(statut, erreur)
+        chemin = self.chemin_rapport
+        if chemin is None:
+            nom = os.path.splitext(self.script)[0]
+            chemin = os.path.join(DOSSIER_RAPPORTS, f"{nom}-{self.horodatage:%Y%m%d-%H%M%S}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        chemin_temporaire = chemin + '.tmp'
+        with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2)
+        os.replace(chemin_temporaire, chemin)
+
+        print(f"\nMesures par étape ({rapport['duree_s']:.1f} s, pic RSS {rapport['pic_rss_mo']} Mo) :")
+        for etape in rapport['etapes']:
+            if etape['parent'] is None:
+                print(f"  - {etape['nom']:<28} {etape['duree_s']:8.2f} s  CPU {etape['cpu_s']:8.2f} s  "
+                      f"pic RSS {etape['pic_rss_mo']} Mo")
+        print(f"Rapport d'exécution sauvegardé : {chemin}")
+        return chemin
+
+    # Sortie sans appel à terminer() : erreur non rattrapée ou arrêt anticipé
+    def terminer_a_la_sortie(self):
+        if self.termine:
+            return
+        erreur = getattr(sys, 'last_value', None)
+        self.terminer('erreur' if erreur is not None else 'interrompu',
+                      repr(erreur) if erreur is not None else None)
@@ -0,0 +1,122 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module gère le manifeste des slices utilisé par le nettoyage incrémental (`nettoyage.py --incremental`) :
+# Enregistrer pour chaque fichier mpd.slice.*.json sa taille, sa date de modification, son empreinte SHA-256
+# et le nombre de lignes nettoyées qu'il a produites.
+# Comparer les fichiers présents au manifeste pour ne traiter que les slices nouvelles ou modifiées, et
+# les slices suivantes dont les doublons en dépendent : celles dont une clé (pid, pos, track_uri) figure
+# dans l'ancienne ou la nouvelle version d'une slice modifiée, nouvelle ou disparue (`ClesModifiees`).
+#
+# L'empreinte SHA-256 n'est recalculée que si la taille ou la date de modification a changé : une
+# exécution sans modification ne relit donc aucun fichier JSON.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import hashlib
+
+from deduplication import EnsembleHachages
+
+# À incrémenter lorsque le nettoyage change : toutes les partitions sont alors reconstruites
+VERSION_NETTOYAGE = 1
+
+#################################################################################################
+
+# Empreinte SHA-256 du contenu d'un fichier, lu par blocs
+def sha256_fichier(chemin, taille_bloc=1 << 20):
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def manifeste_vide():
+    return {'version': VERSION_NETTOYAGE, 'colonnes': None, 'slices': {}}
+
+
+def charger_manifeste(chemin):
+    if not os.path.exists(chemin):
+        return manifeste_vide()
+    with open(chemin, 'r', encoding='utf-8') as f:
+        manifeste = json.load(f)
+    if manifeste.get('version') != VERSION_NETTOYAGE:
+        print("Manifeste d'une autre version du nettoyage : reconstruction complète.")
+        return manifeste_vide()
+    return manifeste
+
+
+def sauvegarder_manifeste(manifeste, chemin):
+    chemin_temporaire = chemin + '.tmp'
+    with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=2, sort_keys=True)
+    os.replace(chemin_temporaire, chemin)
+
+#################################################################################################
+
+# Comparaison des fichiers présents au manifeste.
+# Renvoie (slices nouvelles ou modifiées, slices inchangées, noms des slices disparues).
+# `partitions_presentes(nom)` indique si les sorties d'une slice existent encore sur le disque.
+def comparer_slices(fichiers, manifeste, partitions_presentes):
+    a_traiter, inchangees = [], []
+    for chemin in fichiers:
+        nom = os.path.basename(chemin)
+        entree = manifeste['slices'].get(nom)
+        stat = os.stat(chemin)
+        if entree is None or not partitions_presentes(nom):
+            a_traiter.append(chemin)
+            continue
+        if entree['taille'] == stat.st_size and entree['mtime_ns'] == stat.st_mtime_ns:
+            inchangees.append(chemin)
+            continue
+        # Taille ou date différente : seul le contenu fait foi
+        if entree['taille'] == stat.st_size and entree['sha256'] == sha256_fichier(chemin):
+            entree['mtime_ns'] = stat.st_mtime_ns
+            inchangees.append(chemin)
+        else:
+            a_traiter.append(chemin)
+
+    presents = {os.path.basename(chemin) for chemin in fichiers}
+    disparues = [nom for nom in manifeste['slices'] if nom not in presents]
+    return a_traiter, inchangees, disparues
+
+# Entrée du manifeste d'une slice qui vient d'être nettoyée. `cles` est l'empreinte des hachages des
+# lignes conservées : elle change si les doublons retirés changent, même quand le fichier est identique.
+def entree_slice(chemin, lignes, octets_csv, hachages=b''):
+    stat = os.stat(chemin)
+    return {
+        'taille': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256_fichier(chemin),
+        'lignes': int(lignes),
+        'octets_csv': int(octets_csv),
+        'cles': hashlib.sha256(bytes(hachages)).hexdigest(),
+    }
+
+
+# Clés brutes (hachages des clés d'une slice avant le dédoublonnage entre slices) des anciennes et
+# nouvelles versions des slices modifiées, nouvelles ou disparues déjà rencontrées dans l'ordre des slices.
+# Les lignes gardées d'une slice sont ses clés brutes absentes des slices précédentes : une slice inchangée
+# dont aucune clé brute n'est concernée garde les mêmes lignes qu'une reconstruction complète, elle n'est
+# pas retraitée. Des clés inconnues (partition sans clés brutes) concernent toutes les slices suivantes.
+class ClesModifiees:
+    def __init__(self):
+        self.cles = EnsembleHachages()
+        self.inconnues = False
+
+    def ajouter(self, hachages):
+        if hachages is None:
+            self.inconnues = True
+        else:
+            self.cles.ajouter(hachages)
+
+    def concernent(self, hachages):
+        return self.inconnues or bool(self.cles.contient(hachages).any())
@@ -10,47 +10,135 @@
 # Charger les fichiers de données brutes (JSON du MPD).
 # Aplatir la structure pour avoir une ligne par piste de playlist.
 # Nettoyer les données (gestion des valeurs nulles, des doublons, conversion des types).
+# Les doublons sont définis par la clé (pid, pos, track_uri) et retirés y compris entre slices (`deduplication.py`).
 # Sauvegarder le jeu de données propre dans un fichier CSV (`alcrowd_cleaned.csv`) qui servira de base pour toutes les analyses futures.
+# Si pyarrow est disponible, une version colonnaire typée (`alcrowd_cleaned.parquet`) est écrite en plus,
+# au schéma compact de `schema_donnees.py` : compteurs sur le plus petit entier suffisant, `collaborative`
+# en booléen, noms en catégories, URIs en codes int32 avec leurs tables de correspondance
+# (`alcrowd/dictionnaires_uri/`), et l'indice de la slice d'origine. L'empreinte mémoire avant/après
+# est ajoutée à `alcrowd/empreinte_memoire.jsonl` pour pouvoir la suivre d'une version à l'autre.
+#
+# Deux modes de traitement sont disponibles :
+# - en mémoire (par défaut) : toutes les slices sont chargées puis nettoyées en une fois ;
+# - en flux (--batch-size N) : les slices sont traitées par lots de N fichiers, chaque lot étant
+#   chargé, aplati, nettoyé puis ajouté au CSV de sortie. La mémoire consommée dépend alors de la
+#   taille du lot et non plus de la taille du corpus. Le CSV produit est identique dans les deux modes.
+# Avec --incremental, un manifeste (`alcrowd/manifeste_slices.json`) permet de ne traiter que les slices
+# nouvelles ou modifiées, ainsi que les slices suivantes qui partagent une clé avec elles (leurs doublons en
+# dépendent), et de raccorder leurs lignes aux sorties existantes (`manifeste_slices.py`) : le résultat est
+# celui d'une reconstruction complète.
+# Chaque lot nettoyé met à jour les classements mensuels des artistes et albums les plus fréquents
+# (`classements_frequents.py`, dossier `alcrowd/classements/`), sauf avec --sans-classements ; en mode
+# incrémental, seules les slices retraitées y sont ajoutées (ils sont reconstruits s'ils en comptaient
+# déjà une). Il met aussi à jour le cube pré-agrégé de la dispersion album/artiste par mois, taille et
+# collaborative (`cube_dispersion.py`, dossier `alcrowd/cube/`), sauf avec --sans-cube, avec la même règle.
+# En fin d'exécution, l'index inversé des URIs vers les playlists est reconstruit à partir du Parquet
+# (`index_inverse.py`, dossier `alcrowd/index_inverse/`), sauf avec --sans-index.
+# Par défaut (--decodage colonnes), chaque slice est décodée directement en colonnes typées par
+# `decodage_slices.py` (fichier projeté en mémoire, lecteur JSON de pyarrow), sans construire de
+# dictionnaire par piste ; une slice qui ne suit pas le schéma attendu repasse par json.load. Le débit de
+# décodage (Mo/s) et le nombre de slices de chaque chemin sont affichés par lot. --decodage json garde
+# json.load pour toutes les slices ; --flatten explode l'implique.
+# Avec --workers N, la lecture et l'aplatissement des slices d'un lot sont répartis sur N processus ;
+# les résultats sont fusionnés dans l'ordre des slices puis des pid, la sortie ne dépend donc pas
+# de l'ordonnancement des processus.
+#
+# Chaque étape (chargement, aplatissement, nettoyage, déduplication, écritures) est mesurée
+# (`instrumentation.py` : durée, temps CPU, pic RSS, lignes) et un rapport JSON est écrit en fin d'exécution.
 
 #################################################################################################
 
 # Importation des bibliothèques
 import pandas as pd
 import os
+import re
 import glob
 import json
+import shutil
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
-print("Nous débutons par l'importation des bibliothèques")
+from deduplication import EnsembleHachages, hacher_identite, premieres_occurrences
+from manifeste_slices import (charger_manifeste, sauvegarder_manifeste, comparer_slices, entree_slice,
+                              ClesModifiees)
+from schema_donnees import (SCHEMA_COMPACT, appliquer_schema, charger_dictionnaires, sauvegarder_dictionnaires,
+                            empreinte_memoire, enregistrer_empreinte)
+from index_inverse import construire_index
+from classements_frequents import ClassementsMensuels, construire_classements
+from cube_dispersion import CubeDispersion, construire_cube
+from decodage_slices import decoder_slice
+from instrumentation import Instrumentation
+
+# pyarrow est optionnel : sans lui, seul le CSV est produit
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 #################################################################################################
 
-# Chargement et fusion des données
-base_dir = os.path.dirname(os.path.abspath(__file__))
-alcrowd_path = os.path.join(base_dir, 'alcrowd')
-output_dir = alcrowd_path
-os.makedirs(output_dir, exist_ok=True)
+# Colonnes de pistes entières : l'explosion d'une playlist vide les convertit en float (NaN),
+# on les remet en entiers une fois les lignes sans piste supprimées.
+COLONNES_PISTES_ENTIERES = ['pos', 'track_duration_ms']
 
-#################################################################################################
+# Format fixe des dates : pandas omet l'heure lorsque toutes les dates d'un DataFrame tombent à
+# minuit, ce qui rendrait la sortie dépendante du découpage en lots.
+FORMAT_DATE = '%Y-%m-%d %H:%M:%S'
+
+# Colonnes présentes uniquement dans le fichier Parquet (le CSV garde son format historique)
+COLONNES_HORS_CSV = ['slice']
+
+
+# Indice de début d'une slice (mpd.slice.1000-1999.json -> 1000), utilisé pour trier les fichiers
+def indice_slice(chemin):
+    match = re.search(r'mpd\.slice\.(\d+)-(\d+)\.json$', os.path.basename(chemin))
+    return int(match.group(1)) if match else -1
+
+
+# Ordre de traitement des slices : indice de slice, puis nom du fichier
+def cle_slice(chemin):
+    return indice_slice(chemin), os.path.basename(chemin)
+
+
+# Liste des fichiers JSON triés par indice de slice (glob ne garantit aucun ordre)
+def lister_slices(dossier):
+    fichiers = glob.glob(os.path.join(dossier, 'mpd.slice.*.json'))
+    return sorted(fichiers, key=cle_slice)
+
+
+# Découpage de la liste des fichiers en lots de taille bornée
+def lots_de_slices(fichiers, taille_lot):
+    if taille_lot <= 0:
+        yield fichiers
+        return
+    for debut in range(0, len(fichiers), taille_lot):
+        yield fichiers[debut:debut + taille_lot]
 
-# Chargement des fichiers JSON
-json_files = glob.glob(os.path.join(alcrowd_path, 'mpd.slice.*.json'))
-all_playlists = []
-for file in json_files:
-    with open(file, 'r') as f:
-        data = json.load(f)
-        all_playlists.extend(data['playlists'])
 
-print(f"Chargement de {len(all_playlists)} playlists")
+# Chargement des playlists d'une liste de fichiers JSON
+def charger_playlists(fichiers):
+    playlists = []
+    for file in fichiers:
+        with open(file, 'r') as f:
+            data = json.load(f)
+            playlists.extend(data['playlists'])
+    return playlists
 
 #################################################################################################
 
 # Aplatissement des données (une ligne par piste)
-if all_playlists:
-    mpd_df = pd.DataFrame(all_playlists)
+
+# Méthode historique : explosion de la colonne 'tracks' puis une pd.Series par piste.
+# Conservée comme référence pour le benchmark (--flatten explode).
+def aplatir_playlists_explode(playlists):
+    mpd_df = pd.DataFrame(playlists)
     mpd_exploded_df = mpd_df.explode('tracks')
     tracks_df = mpd_exploded_df['tracks'].apply(pd.Series)
     mpd_flat_df = pd.concat([mpd_exploded_df.drop(columns=['tracks']), tracks_df], axis=1)
-    
+
     # Renommage des colonnes pour éviter les conflits
     if 'duration_ms' in mpd_flat_df.columns:
         cols = mpd_flat_df.columns.tolist()
@@ -60,52 +148,660 @@ if all_playlists:
             idx_track_duration = cols.index('duration_ms', idx_playlist_duration + 1)
             cols[idx_track_duration] = 'track_duration_ms'
         mpd_flat_df.columns = cols
-    
-    df = mpd_flat_df.copy()
-    print("DataFrame aplati créé avec succès.")
-    print("Dimensions initiales :", df.shape)
-else:
-    raise ValueError("Aucune playlist n'a été chargée. Vérifiez les fichiers JSON.")
+
+    return mpd_flat_df.copy()
+
+
+# Méthode par colonnes : les pistes de toutes les playlists sont chaînées dans une seule liste
+# de dictionnaires, convertie en une fois par pandas (comme un record_path de pd.json_normalize),
+# puis les colonnes de playlist sont répétées autant de fois que la playlist a de pistes.
+# Les playlists sans piste ne produisent aucune ligne (au lieu d'une ligne NaN supprimée ensuite).
+def aplatir_playlists_colonnes(playlists):
+    mpd_df = pd.DataFrame(playlists)
+    nb_pistes = [len(tracks) if isinstance(tracks, list) else 0 for tracks in mpd_df['tracks']]
+    pistes = [piste for tracks in mpd_df['tracks'] if isinstance(tracks, list) for piste in tracks]
+
+    index_pistes = mpd_df.index.repeat(nb_pistes)
+    playlists_df = mpd_df.drop(columns=['tracks']).rename(columns={'duration_ms': 'playlist_duration_ms'})
+    playlists_df = playlists_df.loc[index_pistes].reset_index(drop=True)
+    tracks_df = pd.DataFrame(pistes).rename(columns={'duration_ms': 'track_duration_ms'})
+
+    mpd_flat_df = pd.concat([playlists_df, tracks_df], axis=1)
+    mpd_flat_df.index = index_pistes
+    return mpd_flat_df
+
+
+METHODES_APLATISSEMENT = {
+    'columns': aplatir_playlists_colonnes,
+    'explode': aplatir_playlists_explode,
+}
+
+
+def aplatir_playlists(playlists, methode='columns'):
+    return METHODES_APLATISSEMENT[methode](playlists)
 
 #################################################################################################
 
-# Nettoyage des données
-print("\nÉtape 3: Début du nettoyage des données.")
+# Nettoyage d'un DataFrame aplati
+# Les effectifs de chaque étape sont renvoyés avec le DataFrame pour être agrégés et affichés
+# par lot, les slices pouvant être nettoyées dans des processus séparés.
+# La déduplication est mesurée comme une sous-étape de `mesures` (instrumentation.py).
+def nettoyer(df, mesures):
+    compteurs = {'lignes_aplaties': len(df), 'description_supprimee': False}
+
+    # Gestion des valeurs manquantes
+    df.dropna(subset=['track_uri'], inplace=True)
+    compteurs['lignes_sans_nan'] = len(df)
+
+    if 'description' in df.columns:
+        df.drop(columns=['description'], inplace=True)
+        compteurs['description_supprimee'] = True
+
+    # Le '0' peut apparaître si une colonne 'tracks' était vide (pd.Series d'un NaN -> colonne 0).
+    for colonne_vide in ('0', 0):
+        if colonne_vide in df.columns and df[colonne_vide].isnull().all():
+            df.drop(columns=[colonne_vide], inplace=True)
+
+    for col in COLONNES_PISTES_ENTIERES:
+        if col in df.columns and df[col].dtype.kind == 'f' and df[col].notnull().all():
+            df[col] = df[col].astype('int64')
+
+    # Conversion des types de données
+    df['modified_at'] = pd.to_datetime(df['modified_at'], unit='s')
+
+    # Gestion des doublons : une ligne est identifiée par (pid, pos, track_uri), hachés sur 64 bits,
+    # au lieu de hacher toutes les colonnes comme drop_duplicates
+    with mesures.etape('deduplication', lignes_entree=len(df)) as etape:
+        df = df[premieres_occurrences(hacher_identite(df))]
+        etape['lignes_sortie'] = len(df)
+    compteurs['lignes_sans_doublons'] = len(df)
+    return df, compteurs
+
+
+# Chargement, aplatissement et nettoyage d'une slice.
+# Fonction de module pour pouvoir être exécutée dans un pool de processus (--workers).
+# Les lignes sont triées par pid (tri stable : l'ordre des pistes d'une playlist est conservé).
+# Les mesures des étapes sont renvoyées pour être fusionnées dans le rapport du processus principal.
+def traiter_slice(fichier, methode_aplatissement='columns', decodage='colonnes'):
+    mesures = Instrumentation()
+    lecture = {'octets_json': os.path.getsize(fichier), 'slices_colonnes': 0, 'slices_json': 0}
+    debut = time.perf_counter()
+    decodee = None
+    if decodage == 'colonnes' and methode_aplatissement == 'columns':
+        with mesures.etape('decodage') as etape:
+            decodee = decoder_slice(fichier)
+            etape['lignes_sortie'] = len(decodee[0]) if decodee is not None else 0
+    if decodee is not None:
+        df, nb_playlists = decodee
+        lecture['slices_colonnes'] = 1
+    else:
+        with mesures.etape('chargement') as etape:
+            playlists = charger_playlists([fichier])
+            etape['lignes_sortie'] = len(playlists)
+        lecture['slices_json'] = 1
+        if not playlists:
+            lecture['duree_lecture'] = time.perf_counter() - debut
+            return None, {'playlists': 0, **lecture}, mesures.etapes
+        with mesures.etape('aplatissement', lignes_entree=len(playlists)) as etape:
+            df = aplatir_playlists(playlists, methode_aplatissement)
+            etape['lignes_sortie'] = len(df)
+        nb_playlists = len(playlists)
+        del playlists
+    lecture['duree_lecture'] = time.perf_counter() - debut
+    with mesures.etape('nettoyage', lignes_entree=len(df)) as etape:
+        df, compteurs = nettoyer(df, mesures)
+        compteurs['playlists'] = nb_playlists
+        compteurs.update(lecture)
+        df['slice'] = indice_slice(fichier)
+        df = df.sort_values('pid', kind='stable')
+        etape['lignes_sortie'] = len(df)
+    return df, compteurs, mesures.etapes
+
+
+# Débit de lecture des slices : octets JSON lus par seconde de décodage (et d'aplatissement pour le
+# chemin json.load), durées cumulées sur les processus
+def afficher_debit(total):
+    mo = total.get('octets_json', 0) / 1e6
+    duree = total.get('duree_lecture', 0)
+    debit = f"{mo / duree:.1f} Mo/s" if duree > 0 else "débit non mesuré"
+    print(f"Décodage : {mo:.1f} Mo de JSON, {debit} ({total.get('slices_colonnes', 0)} slice(s) décodée(s) "
+          f"en colonnes, {total.get('slices_json', 0)} par json.load)")
+
+
+# Traitement d'un lot de slices, séquentiel ou via un pool de processus.
+# executor.map renvoie les résultats dans l'ordre des fichiers : la fusion est donc triée par
+# slice puis par pid quel que soit l'ordre de fin des processus.
+# Les doublons sont retirés dans chaque slice, puis entre slices grâce à l'ensemble des hachages
+# déjà vus (`ensemble_vu`), partagé par tous les lots d'une exécution. Si `hachages_bruts` est un
+# dictionnaire, il reçoit pour chaque indice de slice les hachages de ses clés avant ce second filtrage.
+def traiter_lot(fichiers, instrumentation, methode_aplatissement='columns', executor=None, ensemble_vu=None,
+                decodage='colonnes', hachages_bruts=None):
+    appliquer = executor.map if executor is not None else map
+    with instrumentation.etape('traitement_slices') as etape:
+        resultats = list(appliquer(traiter_slice, fichiers, [methode_aplatissement] * len(fichiers),
+                                   [decodage] * len(fichiers)))
+        for _, _, mesures in resultats:
+            instrumentation.fusionner(mesures)
+
+        frames = [df for df, _, _ in resultats if df is not None and not df.empty]
+        etape['lignes_sortie'] = sum(len(df) for df in frames)
+    total = {}
+    for _, compteurs, _ in resultats:
+        for cle, valeur in compteurs.items():
+            total[cle] = total.get(cle, 0) + valeur
+
+    print(f"Chargement de {total.get('playlists', 0)} playlists")
+    afficher_debit(total)
+    if not frames:
+        return None
+    with instrumentation.etape('fusion_slices') as etape:
+        df = pd.concat(frames, ignore_index=True)
+        etape['lignes_sortie'] = len(df)
+    del frames, resultats
+
+    doublons_inter_slices = 0
+    if ensemble_vu is not None:
+        with instrumentation.etape('deduplication_inter_slices', lignes_entree=len(df)) as etape:
+            hachages = hacher_identite(df)
+            if hachages_bruts is not None:
+                for indice, positions in df.groupby('slice', sort=False).indices.items():
+                    hachages_bruts[indice] = hachages[positions]
+            garder = ensemble_vu.filtrer(hachages)
+            doublons_inter_slices = int((~garder).sum())
+            if doublons_inter_slices:
+                df = df[garder].reset_index(drop=True)
+            etape['lignes_sortie'] = len(df)
+
+    print("DataFrame aplati créé avec succès.")
+    print(f"Lignes avant suppression des NaN ('track_uri'): {total['lignes_aplaties']}")
+    print(f"Lignes après suppression des NaN ('track_uri'): {total['lignes_sans_nan']}")
+    if total['description_supprimee']:
+        print("Colonne 'description' supprimée.")
+    print(f"Lignes avant suppression des doublons : {total['lignes_sans_nan']}")
+    print(f"Lignes après suppression des doublons : {total['lignes_sans_doublons'] - doublons_inter_slices}")
+    if doublons_inter_slices:
+        print(f"Dont doublons répartis sur plusieurs slices : {doublons_inter_slices}")
+    print("Conversion du type de 'modified_at' en datetime.")
+    return df
 
 #################################################################################################
 
-# Gestion des valeurs manquantes
-print(f"Lignes avant suppression des NaN ('track_uri'): {len(df)}")
-df.dropna(subset=['track_uri'], inplace=True)
-print(f"Lignes après suppression des NaN ('track_uri'): {len(df)}")
+# Écriture d'un lot dans le CSV de sortie : le premier lot fixe l'ordre des colonnes et écrit l'en-tête
+def ecrire_lot_csv(df, chemin, colonnes=None):
+    if colonnes is None:
+        colonnes = [col for col in df.columns if col not in COLONNES_HORS_CSV]
+        df.to_csv(chemin, columns=colonnes, index=False, encoding='utf-8', date_format=FORMAT_DATE)
+        return colonnes
+
+    colonnes_en_trop = [col for col in df.columns if col not in colonnes and col not in COLONNES_HORS_CSV]
+    if colonnes_en_trop:
+        print(f"Attention : colonnes absentes du premier lot ignorées : {colonnes_en_trop}")
+    df.reindex(columns=colonnes).to_csv(chemin, mode='a', header=False, index=False,
+                                        encoding='utf-8', date_format=FORMAT_DATE)
+    return colonnes
+
+
+# Schéma Parquet déduit du premier lot, déjà converti au schéma compact (schema_donnees.py) :
+# les URIs sont des codes int32, les noms des dictionnaires à index int32 fixe pour que tous
+# les lots partagent le même schéma.
+def schema_parquet(df):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for col in df.columns:
+        if SCHEMA_COMPACT.get(col) == 'category':
+            schema = schema.set(schema.get_field_index(col),
+                                pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+    return schema
 
-if 'description' in df.columns:
-    df.drop(columns=['description'], inplace=True)
-    print("Colonne 'description' supprimée.")
 
-# Le '0' peut apparaître si une colonne 'tracks' était vide.
-if '0' in df.columns and df['0'].isnull().all():
-    df.drop(columns=['0'], inplace=True)
+# Écriture d'un lot dans le fichier Parquet (un groupe de lignes par lot)
+def ecrire_lot_parquet(df, chemin, writer=None):
+    if writer is None:
+        writer = pq.ParquetWriter(chemin, schema_parquet(df))
+    df = df.reindex(columns=writer.schema.names)
+    writer.write_table(pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False))
+    return writer
+
 
 #################################################################################################
 
-# Gestion des doublons
-print(f"Lignes avant suppression des doublons : {len(df)}")
-df.drop_duplicates(inplace=True)
-print(f"Lignes après suppression des doublons : {len(df)}")
+# Contexte d'une exécution : dossier de sortie, tables d'URIs (persistantes, codes stables d'une
+# exécution à l'autre), ensemble des clés déjà vues, mesures d'empreinte mémoire et instrumentation.
+# Avec conserver=True, les lots nettoyés sont gardés en mémoire (`frames`) pour être passés aux étapes
+# suivantes sans relire les sorties (`pipeline.py`). Avec indexer=True, l'index inversé est reconstruit
+# en fin d'exécution (`index_inverse.py`). `decodage` choisit la lecture des slices (`decodage_slices.py`).
+# Avec classer=True, chaque lot est ajouté aux classements mensuels (`classements_frequents.py`) ;
+# avec cuber=True, au cube de la dispersion album/artiste (`cube_dispersion.py`).
+class ExecutionNettoyage:
+    def __init__(self, output_dir, instrumentation, methode_aplatissement='columns', executor=None,
+                 conserver=False, indexer=True, decodage='colonnes', classer=True, cuber=True):
+        self.output_dir = output_dir
+        self.instrumentation = instrumentation
+        self.methode_aplatissement = methode_aplatissement
+        self.decodage = decodage
+        self.executor = executor
+        self.csv_path = os.path.join(output_dir, 'alcrowd_cleaned.csv')
+        self.parquet_path = os.path.join(output_dir, 'alcrowd_cleaned.parquet')
+        self.dictionnaires = charger_dictionnaires(output_dir) if pa is not None else None
+        self.ensemble_vu = EnsembleHachages()
+        self.nb_lignes = 0
+        self.octets_avant = self.octets_apres = 0
+        self.frames = [] if conserver else None
+        self.indexer = indexer
+        self.classer = classer
+        self.dossier_classements = os.path.join(output_dir, 'classements')
+        self.classements = ClassementsMensuels() if classer else None
+        # Slices à compter par une reconstruction en fin d'exécution (classements périmés)
+        self.classements_a_reconstruire = None
+        self.cuber = cuber
+        self.dossier_cube = os.path.join(output_dir, 'cube')
+        self.cube = CubeDispersion() if cuber else None
+        self.cube_a_reconstruire = None
+
+    def traiter(self, fichiers, hachages_bruts=None):
+        return traiter_lot(fichiers, self.instrumentation, self.methode_aplatissement, self.executor,
+                           self.ensemble_vu, self.decodage, hachages_bruts)
+
+    # Conversion au schéma compact (codes d'URIs) avec suivi de l'empreinte mémoire
+    def compacter(self, df):
+        with self.instrumentation.etape('compactage', lignes_entree=len(df)) as etape:
+            df_compact = appliquer_schema(df, self.dictionnaires)
+            etape['lignes_sortie'] = len(df_compact)
+        self.octets_avant += empreinte_memoire(df)
+        self.octets_apres += empreinte_memoire(df_compact)
+        return df_compact
+
+    # Ajout d'un lot nettoyé aux classements mensuels
+    def classer_lot(self, df, fichiers):
+        if self.classements is None:
+            return
+        noms = [os.path.basename(chemin) for chemin in fichiers]
+        if df is None or df.empty:
+            self.classements.enregistrer_slices(noms)
+            return
+        with self.instrumentation.etape('classements', lignes_entree=len(df)):
+            self.classements.ajouter(df, noms)
+
+    # Ajout d'un lot nettoyé au cube de la dispersion album/artiste
+    def cuber_lot(self, df, fichiers):
+        if self.cube is None:
+            return
+        noms = [os.path.basename(chemin) for chemin in fichiers]
+        if df is None or df.empty:
+            self.cube.enregistrer_slices(noms)
+            return
+        with self.instrumentation.etape('cube', lignes_entree=len(df)):
+            self.cube.ajouter(df, noms)
+
+    # Slice inchangée mais retraitée (mode incrémental) : les classements et le cube ne peuvent pas la
+    # retirer s'ils la comptent déjà, ils sont alors reconstruits en fin d'exécution à partir de `slices`
+    def invalider_slice(self, nom, slices):
+        if self.classements is not None and nom in self.classements.slices:
+            self.classements = None
+            self.classements_a_reconstruire = slices
+        if self.cube is not None and nom in self.cube.slices:
+            self.cube = None
+            self.cube_a_reconstruire = slices
+
+
+# Nettoyage complet : toutes les slices sont traitées et les sorties réécrites
+def nettoyage_complet(json_files, execution, taille_lot):
+    if os.path.isdir(execution.parquet_path):
+        shutil.rmtree(execution.parquet_path)
+
+    colonnes = None
+    writer_parquet = None
+    try:
+        for numero, lot in enumerate(lots_de_slices(json_files, taille_lot), 1):
+            if taille_lot > 0:
+                print(f"\nLot {numero} : {len(lot)} slice(s)")
+            df = execution.traiter(lot)
+            execution.classer_lot(df, lot)
+            execution.cuber_lot(df, lot)
+            if df is None or df.empty:
+                continue
+            with execution.instrumentation.etape('ecriture_csv', lignes_entree=len(df)):
+                colonnes = ecrire_lot_csv(df, execution.csv_path, colonnes)
+            if pa is not None:
+                df_compact = execution.compacter(df)
+                with execution.instrumentation.etape('ecriture_parquet', lignes_entree=len(df)):
+                    writer_parquet = ecrire_lot_parquet(df_compact, execution.parquet_path, writer_parquet)
+                del df_compact
+            execution.nb_lignes += len(df)
+            if execution.frames is not None:
+                execution.frames.append(df)
+            del df
+    finally:
+        if writer_parquet is not None:
+            writer_parquet.close()
+
+    if colonnes is None:
+        raise ValueError("Aucune playlist n'a été chargée. Vérifiez les fichiers JSON.")
+    return colonnes
 
 #################################################################################################
 
-# Conversion des types de données
-df['modified_at'] = pd.to_datetime(df['modified_at'], unit='s')
-print("Conversion du type de 'modified_at' en datetime.")
-print("Dimensions finales après nettoyage :", df.shape)
+# Nettoyage incrémental : seules les slices nouvelles ou modifiées d'après le manifeste sont traitées, ainsi
+# que les slices suivantes dont une clé figure dans l'ancienne ou la nouvelle version de l'une d'elles
+# (leurs doublons sont recherchés dans les slices précédentes, `ClesModifiees`).
+# Chaque slice a ses propres sorties (partitions) :
+# - un fragment CSV sans en-tête, les hachages des clés gardées et ceux de toutes ses clés avant le
+#   dédoublonnage entre slices (clés brutes) dans `alcrowd/partitions/` ;
+# - un fichier `part-<indice>.parquet` dans le dossier `alcrowd_cleaned.parquet/`, lu comme un seul jeu de données.
+# Le CSV final est tronqué juste avant la première slice modifiée puis complété avec les fragments
+# suivants : l'ajout de nouvelles slices en fin de corpus n'écrit que leurs propres lignes.
+def chemins_partition(execution, chemin_slice):
+    nom = os.path.basename(chemin_slice)[:-len('.json')]
+    dossier = os.path.join(execution.output_dir, 'partitions')
+    return {
+        'csv': os.path.join(dossier, f'{nom}.csv'),
+        'hachages': os.path.join(dossier, f'{nom}.hachages.npy'),
+        'hachages_bruts': os.path.join(dossier, f'{nom}.hachages_bruts.npy'),
+        'parquet': os.path.join(execution.parquet_path, f'part-{indice_slice(chemin_slice):010d}-{nom}.parquet'),
+    }
+
+
+def ecrire_partition(execution, chemin_slice, df, colonnes, hachages_bruts):
+    chemins = chemins_partition(execution, chemin_slice)
+    df.reindex(columns=colonnes).to_csv(chemins['csv'], header=False, index=False,
+                                        encoding='utf-8', date_format=FORMAT_DATE)
+    hachages = hacher_identite(df) if len(df) else np.empty(0, dtype=np.uint64)
+    np.save(chemins['hachages'], hachages)
+    np.save(chemins['hachages_bruts'], hachages_bruts)
+    if pa is not None:
+        if os.path.exists(chemins['parquet']):
+            os.remove(chemins['parquet'])
+        if len(df):
+            ecrire_lot_parquet(execution.compacter(df), chemins['parquet']).close()
+    return entree_slice(chemin_slice, len(df), os.path.getsize(chemins['csv']), hachages.tobytes())
+
+
+def supprimer_partition(execution, nom_slice):
+    for chemin in chemins_partition(execution, os.path.join(execution.output_dir, nom_slice)).values():
+        if os.path.exists(chemin):
+            os.remove(chemin)
+
+
+# Clés brutes enregistrées avec la partition d'une slice (None si elles manquent)
+def charger_hachages_bruts(execution, nom_slice):
+    chemin = chemins_partition(execution, os.path.join(execution.output_dir, nom_slice))['hachages_bruts']
+    return np.load(chemin) if os.path.exists(chemin) else None
+
+
+# Reconstitution du CSV final à partir des fragments, en conservant le début déjà à jour
+def assembler_csv(execution, json_files, manifeste, premiere_modifiee):
+    entete = pd.DataFrame(columns=manifeste['colonnes']).to_csv(index=False).encode('utf-8')
+    etat = manifeste.get('csv')
+    csv_intact = (etat is not None and os.path.exists(execution.csv_path)
+                  and os.stat(execution.csv_path).st_size == etat['taille']
+                  and os.stat(execution.csv_path).st_mtime_ns == etat['mtime_ns'])
+    noms = [os.path.basename(chemin) for chemin in json_files]
+    if csv_intact:
+        # Le début du CSV est conservé tant que l'ordre des slices n'a pas changé
+        debut = 0
+        while (debut < min(premiere_modifiee, len(etat['slices']))
+               and etat['slices'][debut] == noms[debut]):
+            debut += 1
+    else:
+        debut = 0
+
+    with open(execution.csv_path, 'r+b' if debut > 0 else 'wb') as sortie:
+        if debut > 0:
+            sortie.truncate(len(entete) + sum(manifeste['slices'][nom]['octets_csv'] for nom in noms[:debut]))
+            sortie.seek(0, os.SEEK_END)
+        else:
+            sortie.write(entete)
+        for chemin in json_files[debut:]:
+            with open(chemins_partition(execution, chemin)['csv'], 'rb') as fragment:
+                shutil.copyfileobj(fragment, sortie)
+
+    stat = os.stat(execution.csv_path)
+    manifeste['csv'] = {'taille': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'slices': noms}
+    return len(json_files) - debut
+
+
+def nettoyage_incremental(json_files, execution, taille_lot):
+    manifeste_path = os.path.join(execution.output_dir, 'manifeste_slices.json')
+    manifeste = charger_manifeste(manifeste_path)
+    os.makedirs(os.path.join(execution.output_dir, 'partitions'), exist_ok=True)
+    if pa is not None:
+        if os.path.isfile(execution.parquet_path):
+            os.remove(execution.parquet_path)
+        os.makedirs(execution.parquet_path, exist_ok=True)
+
+    def partitions_presentes(nom):
+        chemins = chemins_partition(execution, os.path.join(execution.output_dir, nom))
+        presents = all(os.path.exists(chemins[cle]) for cle in ('csv', 'hachages', 'hachages_bruts'))
+        if pa is not None and manifeste['slices'][nom]['lignes'] > 0:
+            presents = presents and os.path.exists(chemins['parquet'])
+        return presents
+
+    a_traiter, inchangees, disparues = comparer_slices(json_files, manifeste, partitions_presentes)
+    print(f"Manifeste : {len(a_traiter)} slice(s) nouvelle(s) ou modifiée(s), {len(inchangees)} inchangée(s), "
+          f"{len(disparues)} disparue(s).")
+
+    # Anciennes clés brutes des slices modifiées et disparues, lues avant que leurs partitions ne soient
+    # réécrites ou supprimées (None si elles manquent ; rien pour une slice nouvelle)
+    anciennes = {nom: charger_hachages_bruts(execution, nom) for nom in disparues}
+    for chemin in a_traiter:
+        nom = os.path.basename(chemin)
+        if nom in manifeste['slices']:
+            anciennes[nom] = charger_hachages_bruts(execution, nom)
+    for nom in disparues:
+        supprimer_partition(execution, nom)
+        del manifeste['slices'][nom]
+
+    # Les classements ne peuvent pas retirer une slice : ils ne sont complétés que s'ils comptent
+    # exactement les slices inchangées, sinon ils sont reconstruits en fin d'exécution
+    noms = [os.path.basename(chemin) for chemin in json_files]
+    if execution.classer:
+        existants = ClassementsMensuels.charger(execution.dossier_classements)
+        if existants is not None and set(existants.slices) == {os.path.basename(chemin) for chemin in inchangees}:
+            execution.classements = existants
+        elif not inchangees:
+            # Toutes les slices sont retraitées : les classements repartent de zéro
+            execution.classements = ClassementsMensuels()
+        else:
+            execution.classements = None
+            execution.classements_a_reconstruire = noms
+    # Même règle pour le cube
+    if execution.cuber:
+        existant = CubeDispersion.charger(execution.dossier_cube)
+        if existant is not None and set(existant.slices) == {os.path.basename(chemin) for chemin in inchangees}:
+            execution.cube = existant
+        elif not inchangees:
+            execution.cube = CubeDispersion()
+        else:
+            execution.cube = None
+            execution.cube_a_reconstruire = noms
+
+    modifiees = ClesModifiees()
+    a_traiter = set(a_traiter)
+    traitees = []
+
+    # Traitement d'une suite de slices consécutives ; les clés brutes des slices nouvelles ou modifiées
+    # s'ajoutent ensuite aux clés modifiées
+    def traiter_groupe(lot):
+        print(f"\nLot {len(traitees) + 1} : {len(lot)} slice(s)")
+        hachages_bruts = {}
+        df = execution.traiter(lot, hachages_bruts)
+        execution.classer_lot(df, lot)
+        execution.cuber_lot(df, lot)
+        if df is not None and manifeste['colonnes'] is None:
+            manifeste['colonnes'] = [col for col in df.columns if col not in COLONNES_HORS_CSV]
+        with execution.instrumentation.etape('ecriture_partitions', lignes_entree=len(df) if df is not None else 0):
+            parties = dict(tuple(df.groupby('slice', sort=False))) if df is not None else {}
+            for chemin in lot:
+                indice = indice_slice(chemin)
+                partie = parties.get(indice, pd.DataFrame(columns=manifeste['colonnes'] or []))
+                bruts = hachages_bruts.get(indice, np.empty(0, dtype=np.uint64))
+                manifeste['slices'][os.path.basename(chemin)] = ecrire_partition(execution, chemin, partie,
+                                                                                 manifeste['colonnes'], bruts)
+                if chemin in a_traiter:
+                    modifiees.ajouter(bruts)
+        traitees.append(lot)
+
+    # Parcours dans l'ordre des slices : une slice disparue ou modifiée compte pour les slices qui la suivent
+    disparues = sorted(disparues, key=cle_slice)
+    retraitees, lot = [], []
+    for chemin in json_files:
+        while disparues and cle_slice(disparues[0]) < cle_slice(chemin):
+            modifiees.ajouter(anciennes[disparues.pop(0)])
+        nom = os.path.basename(chemin)
+        if chemin in a_traiter:
+            if nom in anciennes:
+                modifiees.ajouter(anciennes[nom])
+        else:
+            # Les clés modifiées des slices précédentes doivent être connues : le lot en cours est traité
+            if lot:
+                traiter_groupe(lot)
+                lot = []
+            with execution.instrumentation.etape('chargement_hachages'):
+                bruts = charger_hachages_bruts(execution, nom)
+                if not modifiees.concernent(bruts):
+                    # Slice conservée : ses clés servent à retirer les doublons des slices suivantes
+                    execution.ensemble_vu.ajouter(np.load(chemins_partition(execution, chemin)['hachages']))
+                    continue
+            retraitees.append(chemin)
+            execution.invalider_slice(nom, noms)
+        lot.append(chemin)
+        if taille_lot > 0 and len(lot) == taille_lot:
+            traiter_groupe(lot)
+            lot = []
+    if lot:
+        traiter_groupe(lot)
+    print(f"{len(retraitees)} slice(s) inchangée(s) retraitée(s) : elles partagent des clés avec une slice "
+          f"modifiée, nouvelle ou disparue.")
+
+    if manifeste['colonnes'] is None:
+        raise ValueError("Aucune playlist n'a été chargée. Vérifiez les fichiers JSON.")
+
+    # Le début du CSV est conservé jusqu'à la première slice retraitée ou disparue (assembler_csv)
+    indices_modifies = [json_files.index(chemin) for lot in traitees for chemin in lot]
+    premiere_modifiee = min(indices_modifies) if indices_modifies else len(json_files)
+    with execution.instrumentation.etape('assemblage_csv'):
+        nb_reecrites = assembler_csv(execution, json_files, manifeste, premiere_modifiee)
+    print(f"CSV final : {nb_reecrites} slice(s) réécrite(s) sur {len(json_files)}.")
+
+    if pa is not None:
+        os.utime(execution.parquet_path)
+    sauvegarder_manifeste(manifeste, manifeste_path)
+    execution.nb_lignes = sum(entree['lignes'] for entree in manifeste['slices'].values())
+    return manifeste['colonnes']
 
 #################################################################################################
 
-# Sauvegarde des données nettoyées
-cleaned_data_path = os.path.join(output_dir, 'alcrowd_cleaned.csv')
-df.to_csv(cleaned_data_path, index=False, encoding='utf-8')
+# Fin d'une exécution : classements mensuels, tables d'URIs (nécessaires pour décoder le Parquet),
+# index inversé et suivi de l'empreinte mémoire
+def terminer_nettoyage(execution, colonnes):
+    print("Dimensions finales après nettoyage :", (execution.nb_lignes, len(colonnes)))
+    print(f"\nNettoyage terminé")
+    print(f"Les données nettoyées ont été sauvegardées ici : {execution.csv_path}")
+    if execution.classer:
+        with execution.instrumentation.etape('sauvegarde_classements'):
+            if execution.classements_a_reconstruire is not None:
+                print("Classements absents ou comptant des slices modifiées ou supprimées : reconstruits "
+                      "à partir des données nettoyées.")
+                execution.classements = construire_classements(execution.classements_a_reconstruire,
+                                                               dossier=execution.output_dir)
+            execution.classements.sauvegarder(execution.dossier_classements)
+        print(f"Classements mensuels des artistes et albums : {execution.dossier_classements}")
+    if execution.cuber:
+        with execution.instrumentation.etape('sauvegarde_cube'):
+            if execution.cube_a_reconstruire is not None:
+                print("Cube absent ou comptant des slices modifiées ou supprimées : reconstruit "
+                      "à partir des données nettoyées.")
+                execution.cube = construire_cube(execution.cube_a_reconstruire, dossier=execution.output_dir)
+            execution.cube.sauvegarder(execution.dossier_cube)
+        print(f"Cube de la dispersion album/artiste ({len(execution.cube.cellules)} cellules) : "
+              f"{execution.dossier_cube}")
+    if pa is None:
+        return
+    with execution.instrumentation.etape('sauvegarde_dictionnaires'):
+        sauvegarder_dictionnaires(execution.dictionnaires, execution.output_dir)
+    print(f"Version colonnaire typée (Parquet) : {execution.parquet_path}")
+    if execution.indexer:
+        with execution.instrumentation.etape('index_inverse', lignes_entree=execution.nb_lignes):
+            construire_index(execution.output_dir, execution.dictionnaires)
+    if execution.octets_avant:
+        octets_dictionnaires = sum(dictionnaire.octets() for dictionnaire in execution.dictionnaires.values())
+        mesure = enregistrer_empreinte(os.path.join(execution.output_dir, 'empreinte_memoire.jsonl'),
+                                       execution.nb_lignes, execution.octets_avant, execution.octets_apres,
+                                       octets_dictionnaires)
+        print(f"Empreinte mémoire : {execution.octets_avant / 1024**2:.1f} Mo avant, "
+              f"{execution.octets_apres / 1024**2:.1f} Mo après (+ {octets_dictionnaires / 1024**2:.1f} Mo de "
+              f"tables d'URIs), soit {mesure['reduction']:.1%} de réduction")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nettoyage des fichiers mpd.slice.*.json du MPD.")
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help="Nombre de slices traitées par lot en mode flux (0 = tout en mémoire).")
+    parser.add_argument('--flatten', choices=sorted(METHODES_APLATISSEMENT), default='columns',
+                        help="Méthode d'aplatissement des pistes (columns = construction par colonnes, "
+                             "explode = ancienne méthode explode + apply(pd.Series)).")
+    parser.add_argument('--decodage', choices=['colonnes', 'json'], default='colonnes',
+                        help="Lecture des slices (colonnes = décodage direct en colonnes typées avec repli "
+                             "sur json.load, json = json.load pour toutes les slices).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus pour lire et aplatir les slices en parallèle.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne traiter que les slices nouvelles ou modifiées depuis la dernière exécution "
+                             "(manifeste alcrowd/manifeste_slices.json).")
+    parser.add_argument('--sans-index', action='store_true',
+                        help="Ne pas reconstruire l'index inversé URIs -> playlists (alcrowd/index_inverse/).")
+    parser.add_argument('--sans-classements', action='store_true',
+                        help="Ne pas mettre à jour les classements mensuels des artistes et albums "
+                             "(alcrowd/classements/).")
+    parser.add_argument('--sans-cube', action='store_true',
+                        help="Ne pas mettre à jour le cube de la dispersion album/artiste (alcrowd/cube/).")
+    parser.add_argument('--rapport', default=None,
+                        help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+    args = parser.parse_args()
+    instrumentation = Instrumentation('nettoyage.py', vars(args), args.rapport)
+
+    print("Nous débutons par l'importation des bibliothèques")
+
+    #############################################################################################
+
+    # Chargement et fusion des données
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    alcrowd_path = os.path.join(base_dir, 'alcrowd')
+    output_dir = alcrowd_path
+    os.makedirs(output_dir, exist_ok=True)
+    if pa is None:
+        print("pyarrow n'est pas installé : seul le CSV sera produit.")
+
+    with instrumentation.etape('lister_slices') as etape:
+        json_files = lister_slices(alcrowd_path)
+        etape['lignes_sortie'] = len(json_files)
+    if not json_files:
+        raise ValueError("Aucune playlist n'a été chargée. Vérifiez les fichiers JSON.")
+
+    if args.batch_size > 0:
+        print(f"Mode flux : {len(json_files)} slices traitées par lots de {args.batch_size}.")
+    if args.workers > 1:
+        print(f"Mode parallèle : {args.workers} processus.")
+
+    #############################################################################################
+
+    # Traitement lot par lot (un seul lot contenant toutes les slices en mode mémoire)
+    print("\nÉtape 3: Début du nettoyage des données.")
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    execution = ExecutionNettoyage(output_dir, instrumentation, args.flatten, executor,
+                                   indexer=not args.sans_index, decodage=args.decodage,
+                                   classer=not args.sans_classements, cuber=not args.sans_cube)
+    try:
+        if args.incremental:
+            colonnes = nettoyage_incremental(json_files, execution, args.batch_size)
+        else:
+            colonnes = nettoyage_complet(json_files, execution, args.batch_size)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    terminer_nettoyage(execution, colonnes)
+    instrumentation.terminer()
+
 
-print(f"\nNettoyage terminé")
-print(f"Les données nettoyées ont été sauvegardées ici : {cleaned_data_path}") 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce script enchaîne toute la chaîne de traitement dans un seul processus, sous forme d'un graphe
+# d'étapes (chaque étape déclare les étapes dont elle dépend) :
+#
+#   ingestion -> nettoyage -> caracteristiques_playlists -> analyse_dispersion -> figures_dispersion
+#                          \                            \                    \-> dashboards
+#                           -> statistiques_eda ---------> figures_eda
+#
+# - ingestion : inventaire des slices JSON et empreinte de leur contenu ;
+# - nettoyage : lecture, aplatissement, nettoyage et écriture du CSV et du Parquet (`nettoyage.py`) ;
+# - caracteristiques_playlists : statistiques par playlist (`agregation_playlists.py`) et un point par
+#   playlist pour le pairplot ;
+# - statistiques_eda : describe(), résumés de distribution, Top 20, fréquences de mots, corrélation ;
+# - analyse_dispersion : test de Wilcoxon et indicateurs de l'hypothèse (`statistiques_dispersion.py`),
+#   intervalles de confiance bootstrap et tailles d'effet par catégorie de taille (`bootstrap_dispersion.py`) ;
+# - figures_eda, figures_dispersion, dashboards : rendu des graphiques (`rendu_figures.py`).
+#
+# Les étapes se passent leurs résultats en mémoire : les données nettoyées ne sont pas relues depuis
+# le CSV ou le Parquet par les analyses. Chaque étape a une clé SHA-256 dérivée des sources de ses
+# modules, de ses paramètres et des clés des étapes dont elle dépend (et, pour l'ingestion, du contenu
+# des slices) : une étape dont la clé est déjà dans le cache (`cache_resultats.py`, dossier
+# `alcrowd/cache_pipeline/`) est sautée, ses résultats et fichiers sont restaurés depuis le cache
+# seulement si une étape suivante en a besoin. Les données nettoyées ne sont pas copiées dans le cache :
+# sur un succès, elles sont relues depuis le Parquet (ou le CSV) si leur empreinte n'a pas changé.
+#
+# Utilisation :
+#   python pipeline.py                           (toutes les étapes)
+#   python pipeline.py --etapes dashboards       (les dashboards et, si nécessaire, leurs dépendances)
+#   python pipeline.py --etapes figures --forcer figures_eda
+#   python pipeline.py --lister                  (graphe et état du cache, sans rien exécuter)
+#
+# Les scripts `nettoyage.py`, `analyse_exploratoire.py` et `album_unique_artistes.py` restent
+# utilisables seuls (modes par blocs, incrémental ou approché, non repris ici).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import hashlib
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from nettoyage import ExecutionNettoyage, lister_slices, nettoyage_complet, terminer_nettoyage
+from chargement_donnees import (DOSSIER_DONNEES, charger_donnees_nettoyees, chemin_donnees_nettoyees,
+                                preparer_donnees)
+from agregation_playlists import agreger_playlists
+from statistiques_dispersion import (COLONNES_DISPERSION, categoriser_taille, ajouter_ratios, tester_wilcoxon,
+                                     calculer_resultats, ratio_par_categorie)
+from bootstrap_dispersion import intervalles_bootstrap, formater_intervalles
+from statistiques_exploratoire import (COLONNES_EDA, COLONNES_TOP, COLONNES_PAIRPLOT, COLONNES_POINTS,
+                                       premiere_ligne_par_playlist, resumer_colonnes, top_valeurs, compter_mots,
+                                       matrice_correlation, selectionner_points)
+from resume_distributions import sauvegarder_resumes
+from figures_exploratoire import taches_figures
+from figures_dispersion import configurer_style, taches_technique, taches_dashboards
+from rendu_figures import executer_rendus
+from cache_resultats import CacheResultats, empreinte_sources, TAILLE_MAX_MO
+from instrumentation import Instrumentation
+
+DOSSIER_CACHE_PIPELINE = os.path.join(DOSSIER_DONNEES, 'cache_pipeline')
+
+# Colonnes des données nettoyées passées aux analyses : celles de l'analyse exploratoire d'abord
+# (describe() et la corrélation suivent l'ordre des colonnes), puis celles de la dispersion
+COLONNES_ANALYSES = COLONNES_EDA + [col for col in COLONNES_DISPERSION if col not in COLONNES_EDA]
+
+#################################################################################################
+
+# Une étape du graphe. `fonction(pipeline, entrees)` reçoit les résultats des étapes dont elle dépend
+# ({nom: résultats}) et renvoie un dictionnaire : les objets pandas sont mis en cache en pickle, la clé
+# 'fichiers' liste les fichiers produits (copiés dans le cache), les autres valeurs en JSON.
+# - persistante=False : l'étape est toujours exécutée et ses résultats ne sont pas mis en cache ;
+# - parametres : paramètres de la commande qui changent ses résultats (inclus dans sa clé) ;
+# - empreinte(pipeline) : empreinte des données lues hors du graphe (incluse dans sa clé) ;
+# - en_memoire : résultats gardés en mémoire seulement, reconstitués par `charger(pipeline, valeurs)`
+#   sur un succès du cache, qui n'est retenu que si `verifier(pipeline, valeurs)` le confirme.
+class Etape:
+    def __init__(self, nom, fonction, dependances=(), modules=(), parametres=(), persistante=True,
+                 empreinte=None, en_memoire=(), charger=None, verifier=None):
+        self.nom = nom
+        self.fonction = fonction
+        self.dependances = list(dependances)
+        self.modules = list(modules)
+        self.parametres = list(parametres)
+        self.persistante = persistante
+        self.empreinte = empreinte
+        self.en_memoire = list(en_memoire)
+        self.charger = charger
+        self.verifier = verifier
+
+
+class Pipeline:
+    def __init__(self, etapes, parametres, cache, instrumentation, dossier=DOSSIER_DONNEES, forcees=()):
+        self.etapes = {etape.nom: etape for etape in etapes}
+        self.parametres = parametres
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.dossier = dossier
+        self.forcees = set(forcees)
+        self.cles = {}
+        self.sorties = {}
+        self.statuts = {}
+
+    # Étapes demandées et toutes leurs dépendances, dans l'ordre de déclaration (qui est un ordre topologique)
+    def selection(self, cibles):
+        retenues = set()
+        a_visiter = list(cibles)
+        while a_visiter:
+            nom = a_visiter.pop()
+            if nom not in retenues:
+                retenues.add(nom)
+                a_visiter.extend(self.etapes[nom].dependances)
+        return [nom for nom in self.etapes if nom in retenues]
+
+    # Clé d'une étape : sources, paramètres, données lues hors du graphe et clés des dépendances
+    def cle(self, nom):
+        if nom not in self.cles:
+            etape = self.etapes[nom]
+            contenu = {
+                'etape': nom,
+                'sources': empreinte_sources(etape.modules + ['pipeline.py']),
+                'parametres': {parametre: self.parametres[parametre] for parametre in etape.parametres},
+                'donnees': etape.empreinte(self) if etape.empreinte is not None else None,
+                'dependances': {dep: self.cle(dep) for dep in etape.dependances},
+            }
+            self.cles[nom] = hashlib.sha256(json.dumps(contenu, sort_keys=True).encode()).hexdigest()
+        return self.cles[nom]
+
+    #############################################################################################
+
+    # Résultats d'une étape : depuis la mémoire, depuis le cache si sa clé y figure, sinon en l'exécutant
+    # (après avoir obtenu ceux de ses dépendances). Avec utile=False, une étape en cache n'est pas
+    # rechargée : seuls ses fichiers sont restaurés.
+    def obtenir(self, nom, utile=True):
+        if nom in self.sorties:
+            return self.sorties[nom]
+        etape = self.etapes[nom]
+        cle = self.cle(nom)
+
+        en_cache = None
+        if etape.persistante and nom not in self.forcees:
+            en_cache = self.cache.lire(cle)
+            if en_cache is not None and etape.verifier is not None and not etape.verifier(self, en_cache['valeurs']):
+                print(f"\n[{nom}] sorties modifiées depuis leur mise en cache : étape réexécutée.")
+                en_cache = None
+        if en_cache is not None:
+            self.statuts[nom] = 'cache'
+            print(f"\n[{nom}] entrées inchangées (clé {cle[:12]}) : étape sautée.")
+            if not utile:
+                return None
+            with self.instrumentation.etape(nom) as mesure:
+                sortie = dict(en_cache['tables'], **en_cache['valeurs'])
+                if etape.charger is not None:
+                    sortie.update(etape.charger(self, en_cache['valeurs']))
+                mesure['statut'] = 'cache'
+                mesure['lignes_sortie'] = lignes(sortie)
+        else:
+            entrees = {dep: self.obtenir(dep) for dep in etape.dependances}
+            print(f"\n[{nom}] exécution...")
+            with self.instrumentation.etape(nom) as mesure:
+                sortie = etape.fonction(self, entrees)
+                mesure['statut'] = 'execute'
+                mesure['lignes_sortie'] = lignes(sortie)
+                if etape.persistante:
+                    self.enregistrer(etape, cle, sortie)
+            self.statuts[nom] = 'execute'
+        self.sorties[nom] = sortie
+        return sortie
+
+    # Mise en cache des résultats d'une étape, hors résultats gardés en mémoire seulement
+    def enregistrer(self, etape, cle, sortie):
+        tables, valeurs = {}, {}
+        for nom, valeur in sortie.items():
+            if nom == 'fichiers' or nom in etape.en_memoire:
+                continue
+            if isinstance(valeur, (pd.DataFrame, pd.Series)):
+                tables[nom] = valeur
+            else:
+                valeurs[nom] = valeur
+        self.cache.enregistrer(cle, tables, valeurs, sortie.get('fichiers', []))
+
+    # Exécution des étapes demandées, dans l'ordre du graphe
+    def executer(self, cibles):
+        for nom in self.selection(cibles):
+            if nom in cibles:
+                self.obtenir(nom, utile=False)
+        return self.statuts
+
+
+# Nombre de lignes du premier DataFrame des résultats, pour le rapport d'exécution
+def lignes(sortie):
+    for valeur in sortie.values():
+        if isinstance(valeur, pd.DataFrame):
+            return len(valeur)
+    return None
+
+#################################################################################################
+
+# Étapes du graphe
+
+# Ingestion : liste des slices ; l'empreinte de leur contenu (mémorisée par taille et date de
+# modification dans l'index du cache) est dans la clé de l'étape, et donc de toutes les suivantes
+def empreinte_slices(pipeline):
+    return [[os.path.basename(fichier), pipeline.cache.empreinte_fichier(fichier)]
+            for fichier in lister_slices(pipeline.dossier)]
+
+
+def etape_ingestion(pipeline, entrees):
+    fichiers = lister_slices(pipeline.dossier)
+    if not fichiers:
+        raise ValueError("Aucune playlist n'a été chargée. Vérifiez les fichiers JSON.")
+    print(f"{len(fichiers)} slice(s) trouvée(s) dans {pipeline.dossier}.")
+    return {'fichiers_json': fichiers}
+
+
+# Nettoyage complet des slices ; les lots nettoyés sont gardés en mémoire et passés aux analyses
+# au schéma compact, comme s'ils avaient été relus par charger_donnees_nettoyees
+def etape_nettoyage(pipeline, entrees):
+    workers = pipeline.parametres['workers'] or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    execution = ExecutionNettoyage(pipeline.dossier, pipeline.instrumentation, pipeline.parametres['flatten'],
+                                   executor, conserver=True)
+    try:
+        colonnes = nettoyage_complet(entrees['ingestion']['fichiers_json'], execution,
+                                     pipeline.parametres['batch_size'])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    terminer_nettoyage(execution, colonnes)
+
+    df = pd.concat(execution.frames, ignore_index=True)
+    del execution.frames
+    df = preparer_donnees(df, COLONNES_ANALYSES, pipeline.dossier, compact=True)
+    return {'donnees': df, 'nb_lignes': len(df),
+            'empreinte_sorties': pipeline.cache.empreinte_donnees(chemin_donnees_nettoyees(pipeline.dossier))}
+
+
+# Sur un succès du cache, les sorties du nettoyage doivent être celles qu'il a écrites
+def verifier_nettoyage(pipeline, valeurs):
+    try:
+        chemin = chemin_donnees_nettoyees(pipeline.dossier)
+    except FileNotFoundError:
+        return False
+    return pipeline.cache.empreinte_donnees(chemin) == valeurs['empreinte_sorties']
+
+
+def charger_nettoyage(pipeline, valeurs):
+    return {'donnees': charger_donnees_nettoyees(COLONNES_ANALYSES, pipeline.dossier)}
+
+
+# Caractéristiques par playlist : albums/artistes/titres uniques, ratio, différence et catégorie de
+# taille pour la dispersion ; première ligne de chaque playlist pour le pairplot et le nuage de points
+def etape_caracteristiques(pipeline, entrees):
+    df = entrees['nettoyage']['donnees']
+    playlists_stats = ajouter_ratios(agreger_playlists(df))
+    playlists_stats['categorie_taille'] = categoriser_taille(playlists_stats['num_tracks'])
+    points_playlists = premiere_ligne_par_playlist(df[COLONNES_POINTS].dropna())
+    print(f"Statistiques calculées pour {len(playlists_stats)} playlists uniques.")
+    return {'playlists_stats': playlists_stats, 'points_playlists': points_playlists}
+
+
+def etape_statistiques_eda(pipeline, entrees):
+    df = entrees['nettoyage']['donnees'][COLONNES_EDA]
+    description = df.describe()
+    print("Statistiques descriptives des colonnes numériques :")
+    print(description)
+    resumes = resumer_colonnes(df=df)
+    output_dir = os.path.join(pipeline.dossier, 'analyse_exploratoire_plots')
+    os.makedirs(output_dir, exist_ok=True)
+    resumes_path = os.path.join(output_dir, 'resumes_distributions.json')
+    sauvegarder_resumes(resumes, resumes_path)
+    sortie = {'description': description, 'resumes': resumes,
+              'frequences_mots': compter_mots(df, pipeline.parametres['ponderation_mots']),
+              'corr_matrix': matrice_correlation(df), 'fichiers': [resumes_path]}
+    for col in COLONNES_TOP:
+        sortie[f'top_{col}'] = top_valeurs(df[col].value_counts())
+    return sortie
+
+
+def etape_analyse_dispersion(pipeline, entrees):
+    playlists_stats = entrees['caracteristiques_playlists']['playlists_stats']
+    statistic, p_value = tester_wilcoxon(playlists_stats)
+    resultats = calculer_resultats(playlists_stats, statistic, p_value)
+    ratio_par_taille = ratio_par_categorie(playlists_stats)
+    print(f"{resultats['pct_plus_albums']:.1f}% des playlists ont plus d'albums que d'artistes "
+          f"(Wilcoxon : p = {resultats['p_value']:.2e}), ratio moyen albums/artistes : {resultats['ratio_moyen']:.3f}")
+    intervalles = intervalles_bootstrap(playlists_stats, pipeline.parametres['resamples'],
+                                        pipeline.parametres['niveau'], pipeline.parametres['graine'],
+                                        pipeline.parametres['workers'])
+    print(formater_intervalles(intervalles, pipeline.parametres['niveau']))
+    results_path = os.path.join(pipeline.dossier, 'analyse_dispersion_resultats.csv')
+    playlists_stats.to_csv(results_path, index=False)
+    bootstrap_path = os.path.join(pipeline.dossier, 'analyse_dispersion_bootstrap.csv')
+    intervalles.to_csv(bootstrap_path)
+    return {'resultats': resultats, 'ratio_par_taille': ratio_par_taille, 'intervalles_bootstrap': intervalles,
+            'fichiers': [results_path, bootstrap_path]}
+
+
+def etape_figures_eda(pipeline, entrees):
+    statistiques = entrees['statistiques_eda']
+    points_traces, densite = selectionner_points(entrees['caracteristiques_playlists']['points_playlists'],
+                                                 pipeline.parametres['seuil_points'],
+                                                 pipeline.parametres['rendu'])
+    taches = taches_figures(statistiques['resumes'], {col: statistiques[f'top_{col}'] for col in COLONNES_TOP},
+                            statistiques['frequences_mots'], statistiques['corr_matrix'], points_traces,
+                            COLONNES_PAIRPLOT, densite, os.path.join(pipeline.dossier, 'analyse_exploratoire_plots'))
+    executer_rendus(taches, workers=pipeline.parametres['workers'])
+    return {'fichiers': [arguments['chemin'] for _, arguments in taches]}
+
+
+def etape_figures_dispersion(pipeline, entrees):
+    analyse = entrees['analyse_dispersion']
+    taches = taches_technique(entrees['caracteristiques_playlists']['playlists_stats'], analyse['resultats'],
+                              analyse['ratio_par_taille'], pipeline.dossier)
+    executer_rendus(taches, workers=pipeline.parametres['workers'], configurer_style=configurer_style)
+    return {'fichiers': [arguments['chemin'] for _, arguments in taches]}
+
+
+def etape_dashboards(pipeline, entrees):
+    analyse = entrees['analyse_dispersion']
+    taches = taches_dashboards(analyse['resultats'], analyse['ratio_par_taille'], pipeline.dossier)
+    executer_rendus(taches, workers=pipeline.parametres['workers'], configurer_style=configurer_style)
+    return {'fichiers': [arguments['chemin'] for _, arguments in taches]}
+
+
+MODULES_NETTOYAGE = ['nettoyage.py', 'deduplication.py', 'schema_donnees.py', 'chargement_donnees.py',
+                     'index_inverse.py', 'decodage_slices.py', 'classements_frequents.py',
+                     'cube_dispersion.py', 'agregation_playlists.py', 'statistiques_dispersion.py', 'hyperloglog.py']
+MODULES_RENDU = ['rendu_figures.py']
+
+ETAPES = [
+    Etape('ingestion', etape_ingestion, persistante=False, empreinte=empreinte_slices),
+    Etape('nettoyage', etape_nettoyage, ['ingestion'], MODULES_NETTOYAGE, en_memoire=['donnees'],
+          charger=charger_nettoyage, verifier=verifier_nettoyage),
+    Etape('caracteristiques_playlists', etape_caracteristiques, ['nettoyage'],
+          ['agregation_playlists.py', 'statistiques_dispersion.py', 'statistiques_exploratoire.py']),
+    Etape('statistiques_eda', etape_statistiques_eda, ['nettoyage'],
+          ['statistiques_exploratoire.py', 'statistiques_flux.py', 'resume_distributions.py'],
+          parametres=['ponderation_mots']),
+    Etape('analyse_dispersion', etape_analyse_dispersion, ['caracteristiques_playlists'],
+          ['statistiques_dispersion.py', 'bootstrap_dispersion.py'], parametres=['resamples', 'niveau', 'graine']),
+    Etape('figures_eda', etape_figures_eda, ['statistiques_eda', 'caracteristiques_playlists'],
+          ['figures_exploratoire.py', 'resume_distributions.py', 'statistiques_exploratoire.py',
+           'statistiques_flux.py'] + MODULES_RENDU, parametres=['seuil_points', 'rendu']),
+    Etape('figures_dispersion', etape_figures_dispersion, ['caracteristiques_playlists', 'analyse_dispersion'],
+          ['figures_dispersion.py'] + MODULES_RENDU),
+    Etape('dashboards', etape_dashboards, ['analyse_dispersion'], ['figures_dispersion.py'] + MODULES_RENDU),
+]
+
+# Groupes d'étapes utilisables avec --etapes et --forcer
+GROUPES = {
+    'tout': [etape.nom for etape in ETAPES],
+    'figures': ['figures_eda', 'figures_dispersion', 'dashboards'],
+}
+
+
+def developper(noms):
+    etapes = []
+    for nom in noms:
+        for etape in GROUPES.get(nom, [nom]):
+            if etape not in etapes:
+                etapes.append(etape)
+    return etapes
+
+#################################################################################################
+
+def main():
+    noms_valides = [etape.nom for etape in ETAPES] + list(GROUPES)
+    parser = argparse.ArgumentParser(description="Chaîne de traitement complète, étapes mises en cache.")
+    parser.add_argument('--etapes', nargs='+', choices=noms_valides, default=['tout'],
+                        help="Étapes à produire, avec leurs dépendances si nécessaire (défaut : tout).")
+    parser.add_argument('--forcer', nargs='*', choices=noms_valides, default=None,
+                        help="Étapes à réexécuter même si elles sont en cache "
+                             "(sans nom : les étapes demandées).")
+    parser.add_argument('--lister', action='store_true',
+                        help="Afficher le graphe des étapes et leur état dans le cache, sans rien exécuter.")
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help="Nombre de slices nettoyées par lot (0 = tout en mémoire).")
+    parser.add_argument('--flatten', choices=['columns', 'explode'], default='columns',
+                        help="Méthode d'aplatissement des pistes (voir nettoyage.py).")
+    parser.add_argument('--seuil-points', type=int, default=50_000,
+                        help="Nombre maximal de playlists tracées point par point (défaut : 50 000).")
+    parser.add_argument('--rendu', choices=['echantillon', 'densite'], default='echantillon',
+                        help="Rendu du pairplot et du nuage de points au-delà du seuil (défaut : echantillon).")
+    parser.add_argument('--ponderation-mots', choices=['playlist', 'piste'], default='playlist',
+                        help="Poids des noms de playlists dans le nuage de mots (voir analyse_exploratoire.py).")
+    parser.add_argument('--resamples', type=int, default=2000,
+                        help="Nombre de rééchantillons bootstrap de l'analyse de dispersion (défaut : 2000).")
+    parser.add_argument('--niveau', type=float, default=0.95,
+                        help="Niveau des intervalles de confiance bootstrap (défaut : 0.95).")
+    parser.add_argument('--graine', type=int, default=0,
+                        help="Graine aléatoire du bootstrap (défaut : 0).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Nombre de processus du nettoyage, du bootstrap et du rendu "
+                             "(défaut : tous les cœurs ; 1 = séquentiel).")
+    parser.add_argument('--taille-cache', type=int, default=TAILLE_MAX_MO,
+                        help=f"Taille maximale du cache des étapes en Mo (défaut : {TAILLE_MAX_MO}).")
+    parser.add_argument('--rapport', default=None,
+                        help="Chemin du rapport d'exécution JSON (défaut : alcrowd/rapports_execution/).")
+    args = parser.parse_args()
+
+    # Une étape forcée est exécutée même si elle n'est pas demandée
+    cibles = developper(args.etapes)
+    forcees = cibles if args.forcer == [] else developper(args.forcer or [])
+    cibles += [nom for nom in forcees if nom not in cibles]
+    cache = CacheResultats(DOSSIER_CACHE_PIPELINE, args.taille_cache)
+    instrumentation = Instrumentation('pipeline.py', vars(args), args.rapport) if not args.lister else None
+    pipeline = Pipeline(ETAPES, vars(args), cache, instrumentation, forcees=forcees)
+
+    if args.lister:
+        for nom in pipeline.selection(cibles):
+            etape = pipeline.etapes[nom]
+            cle = pipeline.cle(nom)
+            etat = 'en cache' if cle in cache.index['entrees'] else ('toujours exécutée' if not etape.persistante
+                                                                     else 'à exécuter')
+            dependances = ', '.join(etape.dependances) or '-'
+            print(f"{nom:<28} {cle[:12]}  {etat:<18} dépend de : {dependances}")
+        cache.sauvegarder_index()
+        return
+
+    print(f"Étapes demandées : {', '.join(cibles)}")
+    statuts = pipeline.executer(cibles)
+    cache.sauvegarder_index()
+
+    print("\nBilan des étapes :")
+    for nom in pipeline.selection(cibles):
+        statut = {'cache': 'sautée (cache)', 'execute': 'exécutée'}.get(statuts.get(nom), 'non nécessaire')
+        print(f"  - {nom:<28} {statut}")
+    instrumentation.terminer()
+
+
+if __name__ == '__main__':
+    main()
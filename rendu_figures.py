@@ -0,0 +1,54 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module exécute les tâches de rendu des figures des scripts d'analyse :
+# Une tâche est un couple (fonction, arguments) : la fonction, définie dans un module de figures,
+# reçoit des statistiques déjà calculées, enregistre son fichier et renvoie un message.
+# Les tâches sont réparties sur un pool de processus utilisant le backend Agg (aucune fenêtre,
+# aucun plt.show() bloquant) : le rendu complet dure à peu près le temps de la figure la plus lente.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import time
+import matplotlib
+from concurrent.futures import ProcessPoolExecutor
+
+#################################################################################################
+
+# Préparation d'un processus de rendu : backend sans affichage puis style propre au script
+def initialiser_rendu(configurer_style=None):
+    matplotlib.use('Agg')
+    if configurer_style is not None:
+        configurer_style()
+
+
+def executer_tache(tache):
+    fonction, arguments = tache
+    return fonction(**arguments)
+
+
+# Exécution des tâches, dans un pool de `workers` processus (tous les cœurs par défaut) ou dans le
+# processus courant avec workers=1. Les messages sont affichés dans l'ordre des tâches.
+def executer_rendus(taches, workers=None, configurer_style=None):
+    debut = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(taches))
+    if workers <= 1:
+        # Le style du script ne doit pas rester appliqué aux figures rendues ensuite dans ce processus
+        with matplotlib.rc_context():
+            initialiser_rendu(configurer_style)
+            for tache in taches:
+                print(executer_tache(tache))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initialiser_rendu,
+                                 initargs=(configurer_style,)) as executor:
+            for message in executor.map(executer_tache, taches):
+                print(message)
+    print(f"{len(taches)} figure(s) rendue(s) en {time.perf_counter() - debut:.1f} s "
+          f"({max(workers, 1)} processus).")
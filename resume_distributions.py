@@ -0,0 +1,142 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module précalcule les résumés des distributions tracées par `analyse_exploratoire.py` :
+# Histogramme de 50 classes (espacées logarithmiquement pour les colonnes très asymétriques).
+# Quantiles, moustaches à 1,5 écart interquartile et un nombre borné de valeurs extrêmes.
+# Densité (KDE gaussienne) évaluée sur une grille fixe : les valeurs sont réparties sur la grille
+# puis convoluées avec le noyau par FFT, au lieu d'évaluer le noyau en chaque ligne.
+#
+# Un résumé est calculé une fois par colonne à partir d'un comptage de valeurs (`statistiques_flux.py`)
+# et les graphiques sont tracés à partir des résumés : leur coût ne dépend plus du nombre de lignes.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import json
+import colorsys
+import numpy as np
+import seaborn as sns
+from scipy.signal import fftconvolve
+
+NB_CLASSES = 50
+POINTS_GRILLE_KDE = 512
+MAX_VALEURS_EXTREMES = 100
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+#################################################################################################
+
+# Même règle que l'affichage historique : échelle log pour les données positives très étalées
+def echelle_log(valeurs):
+    return valeurs.max() > 1000 and valeurs.min() >= 0
+
+
+# Densité gaussienne des valeurs pondérées, évaluée sur une grille régulière de `nb_points` points
+# couvrant [min, max] (règle de Scott pour la largeur du noyau, comme seaborn).
+def kde_sur_grille(valeurs, poids, nb_points=POINTS_GRILLE_KDE):
+    n = poids.sum()
+    moyenne = np.average(valeurs, weights=poids)
+    ecart_type = np.sqrt(np.sum(poids * (valeurs - moyenne) ** 2) / max(n - 1, 1))
+    largeur = ecart_type * n ** (-1 / 5)
+    debut, fin = valeurs.min(), valeurs.max()
+    if largeur == 0 or debut == fin:
+        return None
+
+    # Grille élargie de 3 largeurs de noyau de chaque côté pour que la convolution ne déborde pas
+    pas = (fin - debut) / (nb_points - 1)
+    marge = int(np.ceil(3 * largeur / pas))
+    bords = debut + (np.arange(-marge, nb_points + marge + 1) - 0.5) * pas
+    masses, _ = np.histogram(valeurs, bins=bords, weights=poids)
+    decalages = np.arange(-marge, marge + 1) * pas
+    noyau = np.exp(-0.5 * (decalages / largeur) ** 2)
+    densite = fftconvolve(masses, noyau / noyau.sum(), mode='same') / (n * pas)
+    return np.linspace(debut, fin, nb_points), np.maximum(densite[marge:marge + nb_points], 0)
+
+
+# Résumé d'une colonne à partir de son comptage de valeurs
+def resumer_distribution(comptage, nb_classes=NB_CLASSES):
+    comptes = comptage.serie()
+    valeurs = comptes.index.to_numpy(dtype=np.float64)
+    poids = comptes.to_numpy(dtype=np.float64)
+    log = bool(echelle_log(valeurs))
+
+    # Histogramme (en échelle log, les valeurs nulles ne sont pas représentables)
+    if log:
+        positives = valeurs > 0
+        bords = np.geomspace(valeurs[positives].min(), valeurs.max(), nb_classes + 1)
+        espace = np.log10(valeurs[positives])
+        poids_espace = poids[positives]
+    else:
+        bords = np.linspace(valeurs.min(), valeurs.max(), nb_classes + 1)
+        espace, poids_espace = valeurs, poids
+    effectifs, _ = np.histogram(valeurs, bins=bords, weights=poids)
+
+    # Densité mise à l'échelle des effectifs : densité x effectif total x largeur de classe
+    kde = kde_sur_grille(espace, poids_espace)
+    if kde is not None:
+        grille, densite = kde
+        largeur_classe = (np.log10(bords[-1]) - np.log10(bords[0]) if log else bords[-1] - bords[0]) / nb_classes
+        kde = {'x': (10 ** grille if log else grille).tolist(),
+               'y': (densite * poids_espace.sum() * largeur_classe).tolist()}
+
+    # Boîte à moustaches
+    q1, mediane, q3 = (comptage.quantile(q) for q in (0.25, 0.5, 0.75))
+    ecart = q3 - q1
+    dans_moustaches = valeurs[(valeurs >= q1 - 1.5 * ecart) & (valeurs <= q3 + 1.5 * ecart)]
+    extremes = valeurs[(valeurs < q1 - 1.5 * ecart) | (valeurs > q3 + 1.5 * ecart)]
+    if len(extremes) > MAX_VALEURS_EXTREMES:
+        # Valeurs extrêmes régulièrement réparties en rang, minimum et maximum compris
+        extremes = extremes[np.unique(np.linspace(0, len(extremes) - 1, MAX_VALEURS_EXTREMES).round().astype(int))]
+
+    return {
+        'effectif': int(poids.sum()),
+        'echelle_log': log,
+        'bords': bords.tolist(),
+        'effectifs': effectifs.tolist(),
+        'kde': kde,
+        'quantiles': {str(q): comptage.quantile(q) for q in QUANTILES},
+        'boite': {
+            'med': mediane, 'q1': q1, 'q3': q3,
+            'whislo': float(dans_moustaches.min()) if len(dans_moustaches) else q1,
+            'whishi': float(dans_moustaches.max()) if len(dans_moustaches) else q3,
+            'fliers': extremes.tolist(),
+        },
+    }
+
+
+def sauvegarder_resumes(resumes, chemin):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(resumes, f, indent=1)
+
+#################################################################################################
+
+# Tracés à partir des résumés, aux couleurs de seaborn
+
+def tracer_histogramme(ax, resume, colonne):
+    couleur = sns.color_palette()[0]
+    bords = np.asarray(resume['bords'])
+    ax.bar(bords[:-1], resume['effectifs'], width=np.diff(bords), align='edge',
+           color=couleur, alpha=0.5, edgecolor='black', linewidth=0.5)
+    if resume['kde'] is not None:
+        ax.plot(resume['kde']['x'], resume['kde']['y'], color=couleur)
+    if resume['echelle_log']:
+        ax.set_xscale('log')
+    ax.set_xlabel(colonne)
+    ax.set_ylabel('Count')
+
+
+def tracer_boite(ax, resume, colonne):
+    couleur = sns.desaturate(sns.color_palette()[0], 0.75)
+    gris = [colorsys.rgb_to_hls(*couleur)[1] * 0.6] * 3
+    traits = {'color': gris, 'linewidth': 1.25}
+    ax.bxp([dict(resume['boite'], label='')], widths=0.8, patch_artist=True,
+           boxprops={'facecolor': couleur, 'edgecolor': gris, 'linewidth': 1.25},
+           whiskerprops=traits, capprops=traits, medianprops=traits,
+           flierprops={'marker': 'd', 'markerfacecolor': gris, 'markeredgecolor': gris})
+    ax.set_xticks([])
+    ax.set_ylabel(colonne)
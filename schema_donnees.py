@@ -0,0 +1,181 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module déclare le schéma compact de la table des pistes nettoyée :
+# URIs encodées en codes int32 avec des tables de correspondance à part (code -> URI).
+# Compteurs réduits au plus petit entier suffisant, avec vérification des bornes.
+# Booléens (`collaborative`) en bool, noms en catégories, `modified_at` en datetime.
+# Le même schéma est appliqué au nettoyage (`nettoyage.py`) et au chargement (`chargement_donnees.py`).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import os
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+#################################################################################################
+
+# Schéma déclaré : colonne -> type compact
+# Les largeurs sont fixes (et non déduites de chaque lot) pour que tous les lots partagent le même schéma.
+SCHEMA_COMPACT = {
+    'pid': 'int32',
+    'slice': 'int32',
+    'pos': 'int16',
+    'num_tracks': 'int16',
+    'num_albums': 'int16',
+    'num_artists': 'int16',
+    'num_edits': 'int16',
+    'num_followers': 'int32',
+    'track_duration_ms': 'int32',
+    'playlist_duration_ms': 'int64',
+    'collaborative': 'bool',
+    'modified_at': 'datetime64[ns]',
+    'name': 'category',
+    'artist_name': 'category',
+    'album_name': 'category',
+    'track_name': 'category',
+    'track_uri': 'uri',
+    'artist_uri': 'uri',
+    'album_uri': 'uri',
+}
+
+COLONNES_URI = [col for col, type_col in SCHEMA_COMPACT.items() if type_col == 'uri']
+
+#################################################################################################
+
+# Dictionnaire d'URIs persistant : chaque nouvelle URI reçoit le code suivant, les codes déjà
+# attribués ne changent jamais (les lots successifs et les exécutions successives restent cohérents).
+# Chaque lot est d'abord factorisé : seules ses valeurs distinctes passent par le dictionnaire Python.
+class DictionnaireUri:
+    def __init__(self, valeurs=None):
+        self.valeurs = list(valeurs) if valeurs is not None else []
+        self.codes = {valeur: code for code, valeur in enumerate(self.valeurs)}
+
+    def __len__(self):
+        return len(self.valeurs)
+
+    # Code d'une valeur, attribué à la première rencontre
+    def code(self, valeur):
+        code = self.codes.get(valeur)
+        if code is None:
+            code = len(self.valeurs)
+            if code > np.iinfo(np.int32).max:
+                raise OverflowError("Trop d'URIs distinctes pour des codes int32.")
+            self.codes[valeur] = code
+            self.valeurs.append(valeur)
+        return code
+
+    # Codes int32 des valeurs (-1 = valeur manquante), en ajoutant les URIs inconnues au dictionnaire
+    def encoder(self, valeurs):
+        codes_lot, distinctes = pd.factorize(np.asarray(valeurs, dtype=object))
+        correspondance = np.fromiter((self.code(valeur) for valeur in distinctes),
+                                     dtype=np.int32, count=len(distinctes))
+        codes = np.full(len(codes_lot), -1, dtype=np.int32)
+        presentes = codes_lot >= 0
+        codes[presentes] = correspondance[codes_lot[presentes]]
+        return codes
+
+    # Reconstruction d'une colonne catégorielle à partir des codes (-1 = valeur manquante)
+    def decoder(self, codes):
+        return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int32),
+                                         categories=pd.Index(self.valeurs, dtype=object))
+
+    # Taille en mémoire de la table de correspondance
+    def octets(self):
+        return int(pd.Series(self.valeurs, dtype=object).memory_usage(deep=True, index=False))
+
+    def sauvegarder(self, chemin):
+        pd.DataFrame({'uri': pd.Series(self.valeurs, dtype=object)}).to_parquet(chemin, index=False)
+
+    @classmethod
+    def charger(cls, chemin):
+        if not os.path.exists(chemin):
+            return cls()
+        return cls(pd.read_parquet(chemin)['uri'].tolist())
+
+
+# Chemin de la table de correspondance d'une colonne d'URIs
+def chemin_dictionnaire(dossier, colonne):
+    return os.path.join(dossier, 'dictionnaires_uri', f'{colonne}.parquet')
+
+
+def charger_dictionnaires(dossier):
+    return {col: DictionnaireUri.charger(chemin_dictionnaire(dossier, col)) for col in COLONNES_URI}
+
+
+def sauvegarder_dictionnaires(dictionnaires, dossier):
+    os.makedirs(os.path.join(dossier, 'dictionnaires_uri'), exist_ok=True)
+    for col, dictionnaire in dictionnaires.items():
+        dictionnaire.sauvegarder(chemin_dictionnaire(dossier, col))
+
+#################################################################################################
+
+# Conversion d'une colonne entière vers sa largeur déclarée, en refusant tout dépassement
+def reduire_entier(serie, type_cible):
+    if serie.dtype == type_cible:
+        return serie
+    bornes = np.iinfo(type_cible)
+    if serie.isnull().any():
+        raise ValueError(f"Colonne '{serie.name}' : valeurs manquantes incompatibles avec {type_cible}.")
+    if len(serie) and (serie.min() < bornes.min or serie.max() > bornes.max):
+        raise OverflowError(f"Colonne '{serie.name}' : valeurs hors de l'intervalle de {type_cible} "
+                            f"[{serie.min()}, {serie.max()}] ; élargir SCHEMA_COMPACT.")
+    return serie.astype(type_cible)
+
+
+# Application du schéma compact à un DataFrame.
+# Avec `dictionnaires`, les colonnes d'URIs deviennent des codes int32 (stockage Parquet) ;
+# sans, elles deviennent des catégories (chargement en mémoire).
+def appliquer_schema(df, dictionnaires=None):
+    colonnes = {}
+    for col in df.columns:
+        serie = df[col]
+        type_col = SCHEMA_COMPACT.get(col)
+        if type_col is None:
+            colonnes[col] = serie
+        elif type_col == 'uri':
+            if dictionnaires is not None:
+                colonnes[col] = dictionnaires[col].encoder(serie)
+            elif isinstance(serie.dtype, pd.CategoricalDtype):
+                colonnes[col] = serie
+            else:
+                colonnes[col] = serie.astype('category')
+        elif type_col == 'bool':
+            # Le MPD stocke 'true'/'false' en texte
+            colonnes[col] = serie if serie.dtype == bool else serie.astype(str).str.lower().eq('true')
+        elif type_col == 'category':
+            colonnes[col] = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype('category')
+        elif type_col.startswith('datetime'):
+            colonnes[col] = serie if pd.api.types.is_datetime64_any_dtype(serie) else pd.to_datetime(serie)
+        else:
+            colonnes[col] = reduire_entier(serie, type_col)
+    return pd.DataFrame(colonnes, index=df.index)
+
+#################################################################################################
+
+# Empreinte mémoire (octets) d'un DataFrame, chaînes de caractères comprises
+def empreinte_memoire(df):
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+# Ajout d'une mesure avant/après dans l'historique (une ligne JSON par exécution)
+def enregistrer_empreinte(chemin, lignes, octets_avant, octets_apres, octets_dictionnaires=0):
+    mesure = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'lignes': int(lignes),
+        'octets_avant': int(octets_avant),
+        'octets_apres': int(octets_apres),
+        'octets_dictionnaires': int(octets_dictionnaires),
+        'reduction': round(1 - (octets_apres + octets_dictionnaires) / octets_avant, 4) if octets_avant else None,
+    }
+    with open(chemin, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(mesure) + '\n')
+    return mesure
@@ -0,0 +1,86 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe les calculs de l'analyse de la dispersion album/artiste, partagés par
+# `album_unique_artistes.py` et le pipeline (`pipeline.py`) :
+# ratio et différence albums/artistes par playlist, catégories de taille, test de Wilcoxon et
+# indicateurs de l'hypothèse, statistiques utilisées par les figures (`figures_dispersion.py`).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import pandas as pd
+from scipy import stats
+
+# Colonnes des données nettoyées utilisées par l'analyse
+COLONNES_DISPERSION = ['name', 'pid', 'num_albums', 'num_artists', 'num_tracks',
+                       'artist_name', 'album_name', 'track_name']
+
+#################################################################################################
+
+# Catégories de taille des playlists
+def categoriser_taille(num_tracks):
+    return pd.cut(
+        num_tracks,
+        bins=[0, 20, 50, 100, float('inf')],
+        labels=['Petite (≤20)', 'Moyenne (21-50)', 'Grande (51-100)', 'Très grande (>100)']
+    )
+
+
+# Ratio et différence albums/artistes, ajoutés aux statistiques par playlist
+def ajouter_ratios(playlists_stats):
+    playlists_stats['ratio_albums_artistes'] = (
+        playlists_stats['albums_uniques_reels'] /
+        playlists_stats['artistes_uniques_reels']
+    )
+    playlists_stats['diff_albums_artistes'] = (
+        playlists_stats['albums_uniques_reels'] -
+        playlists_stats['artistes_uniques_reels']
+    )
+    return playlists_stats
+
+#################################################################################################
+
+# Test de Wilcoxon pour échantillons appariés (albums uniques contre artistes uniques)
+def tester_wilcoxon(playlists_stats):
+    statistic, p_value = stats.wilcoxon(
+        playlists_stats['albums_uniques_reels'],
+        playlists_stats['artistes_uniques_reels']
+    )
+    return float(statistic), float(p_value)
+
+
+# Indicateurs de l'hypothèse, sérialisables en JSON (mis en cache avec les tables)
+def calculer_resultats(playlists_stats, statistic, p_value):
+    nb_playlists = len(playlists_stats)
+    plus_albums = int((playlists_stats['albums_uniques_reels'] > playlists_stats['artistes_uniques_reels']).sum())
+    ratio_sup_1 = int((playlists_stats['ratio_albums_artistes'] > 1).sum())
+    diff_positive = int((playlists_stats['diff_albums_artistes'] > 0).sum())
+    return {
+        'nb_playlists': nb_playlists,
+        'plus_albums': plus_albums,
+        'pct_plus_albums': plus_albums / nb_playlists * 100,
+        'statistique_wilcoxon': statistic,
+        'p_value': p_value,
+        'ratio_moyen': float(playlists_stats['ratio_albums_artistes'].mean()),
+        'ratio_median': float(playlists_stats['ratio_albums_artistes'].median()),
+        'ratio_sup_1': ratio_sup_1,
+        'pct_ratio_sup_1': ratio_sup_1 / nb_playlists * 100,
+        'diff_positive': diff_positive,
+        'pct_diff_positive': diff_positive / nb_playlists * 100,
+        'diff_moyenne': float(playlists_stats['diff_albums_artistes'].mean()),
+        'diff_mediane': float(playlists_stats['diff_albums_artistes'].median()),
+        'moyennes': [float(playlists_stats['artistes_uniques_reels'].mean()),
+                     float(playlists_stats['albums_uniques_reels'].mean())],
+    }
+
+
+# Ratio moyen par catégorie de taille (la catégorie est ajoutée aux statistiques par playlist)
+def ratio_par_categorie(playlists_stats):
+    playlists_stats['categorie_taille'] = categoriser_taille(playlists_stats['num_tracks'])
+    return playlists_stats.groupby('categorie_taille')['ratio_albums_artistes'].mean()
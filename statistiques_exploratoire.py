@@ -0,0 +1,193 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe les calculs de l'analyse exploratoire, partagés par `analyse_exploratoire.py`
+# et le pipeline (`pipeline.py`) : colonnes analysées, points par playlist du pairplot et du nuage
+# de points, résumés de distribution, Top 20, fréquences des mots des noms de playlists et choix
+# des points tracés (tous, échantillon ou densité 2D).
+
+#################################################################################################
+
+# Importation des bibliothèques
+import re
+import numpy as np
+from collections import Counter, defaultdict
+from wordcloud import WordCloud
+from wordcloud.tokenization import score
+
+from statistiques_flux import ComptageValeurs, EchantillonReservoir
+from resume_distributions import resumer_distribution
+
+# Colonnes des données nettoyées utilisées par l'analyse
+COLONNES_NUMERIQUES = ['pid', 'num_tracks', 'num_albums', 'num_followers', 'num_edits',
+                       'playlist_duration_ms', 'num_artists', 'pos', 'track_duration_ms']
+COLONNES_EDA = COLONNES_NUMERIQUES + ['name', 'artist_name', 'album_name']
+
+# Colonnes dont la distribution est résumée (histogrammes, densités, boxplots)
+COLONNES_DISTRIBUTIONS = ['num_followers', 'num_tracks', 'playlist_duration_ms', 'track_duration_ms',
+                          'num_artists', 'num_albums']
+# Colonnes catégorielles du Top 20
+COLONNES_TOP = ['artist_name', 'album_name']
+
+# Pairplot au niveau playlist : track_duration_ms, propre à chaque piste, y est remplacée par la durée
+# moyenne des pistes de la playlist (playlist_duration_ms / num_tracks)
+COLONNES_PAIRPLOT = ['num_followers', 'num_tracks', 'duree_moyenne_piste_ms', 'num_artists']
+# Première ligne de chaque playlist : un point par pid pour le pairplot et le nuage de points
+COLONNES_POINTS = ['pid', 'num_followers', 'num_tracks', 'playlist_duration_ms', 'num_artists']
+
+#################################################################################################
+
+# Première ligne de chaque playlist (colonnes de playlist uniquement), avec la durée moyenne de ses pistes
+def premiere_ligne_par_playlist(points):
+    premieres = points.drop_duplicates('pid').reset_index(drop=True)
+    premieres['duree_moyenne_piste_ms'] = premieres['playlist_duration_ms'] / premieres['num_tracks']
+    return premieres
+
+
+# Résumés de distribution des colonnes de COLONNES_DISTRIBUTIONS, à partir de comptages de valeurs
+# déjà accumulés (lecture par blocs) ou d'un DataFrame chargé en mémoire
+def resumer_colonnes(comptages=None, df=None):
+    resumes = {}
+    for col in COLONNES_DISTRIBUTIONS:
+        if comptages is not None:
+            comptage = comptages[col]
+        else:
+            comptage = ComptageValeurs()
+            comptage.ajouter(df[col])
+        resumes[col] = resumer_distribution(comptage)
+    return resumes
+
+
+# Les `n` valeurs les plus fréquentes d'une série de comptes
+def top_valeurs(comptes, n=20):
+    top_n = comptes.nlargest(n)
+    # Les colonnes catégorielles (Parquet) gardent toutes leurs catégories : on repasse en texte
+    top_n.index = top_n.index.astype(str)
+    return top_n
+
+
+# Extracteur de mots du nuage de mots (mêmes mots vides et même normalisation que le rendu)
+def extracteur_mots():
+    return WordCloud(width=800, height=400, background_color='white')
+
+
+# Fréquences des mots des noms de playlists, accumulées bloc par bloc (colonnes 'pid' et 'name').
+# Chaque nom distinct d'un bloc est découpé une seule fois, avec son poids : 1 par playlist
+# (ponderation='playlist', un nom par pid) ou son nombre de lignes (ponderation='piste').
+# Les mots et les paires de mots voisins d'un même nom sont comptés avec les règles de
+# WordCloud.process_text (mots vides, nombres, "'s") ; la fusion des pluriels et des casses puis la
+# détection des expressions (collocations) sont appliquées une fois, sur les comptes pondérés.
+# La mémoire dépend du vocabulaire, pas du nombre de lignes.
+class ComptageMots:
+    def __init__(self, ponderation='playlist', extracteur=None):
+        self.ponderation = ponderation
+        self.extracteur = extracteur or extracteur_mots()
+        motif = r"\w[\w']*" if self.extracteur.min_word_length <= 1 else r"\w[\w']+"
+        self.motif = re.compile(self.extracteur.regexp or motif)
+        self.mots_vides = {mot.lower() for mot in self.extracteur.stopwords}
+        self.mots = Counter()
+        self.paires = Counter()
+        self.dernier_pid = None
+
+    def decouper(self, nom):
+        mots = [mot[:-2] if mot.lower().endswith("'s") else mot for mot in self.motif.findall(nom)]
+        if not self.extracteur.include_numbers:
+            mots = [mot for mot in mots if not mot.isdigit()]
+        if self.extracteur.min_word_length:
+            mots = [mot for mot in mots if len(mot) >= self.extracteur.min_word_length]
+        return mots
+
+    def ajouter(self, bloc):
+        if self.ponderation == 'playlist':
+            # Les lignes d'une playlist sont contiguës : une playlist coupée entre deux blocs n'est comptée qu'une fois
+            bloc = bloc.drop_duplicates('pid')
+            if len(bloc) and bloc['pid'].iloc[0] == self.dernier_pid:
+                bloc = bloc.iloc[1:]
+            if len(bloc):
+                self.dernier_pid = bloc['pid'].iloc[-1]
+        noms = bloc['name'].value_counts(sort=False, dropna=True)
+        for nom, poids in noms[noms > 0].items():
+            mots = self.decouper(str(nom))
+            for mot in mots:
+                if mot.lower() not in self.mots_vides:
+                    self.mots[mot] += int(poids)
+            for mot1, mot2 in zip(mots, mots[1:]):
+                if mot1.lower() not in self.mots_vides and mot2.lower() not in self.mots_vides:
+                    self.paires[f"{mot1} {mot2}"] += int(poids)
+
+    def frequences(self):
+        comptes, formes = fusionner_formes(self.mots, self.extracteur.normalize_plurals)
+        if not self.extracteur.collocations:
+            return comptes
+        comptes_paires, _ = fusionner_formes(self.paires, self.extracteur.normalize_plurals)
+        # Même critère que wordcloud.tokenization.unigrams_and_bigrams
+        nb_mots = sum(self.mots.values())
+        comptes_mots = dict(comptes)
+        for paire, compte in comptes_paires.items():
+            mot1, mot2 = (formes[mot.lower()] for mot in paire.split(' '))
+            if score(compte, comptes_mots[mot1], comptes_mots[mot2], nb_mots) > self.extracteur.collocation_threshold:
+                comptes[mot1] -= compte
+                comptes[mot2] -= compte
+                comptes[paire] = compte
+        return {mot: compte for mot, compte in comptes.items() if compte > 0}
+
+
+# Fusion des casses (forme la plus fréquente) et des pluriels en "s" de comptes pondérés,
+# comme wordcloud.tokenization.process_tokens. Renvoie les comptes et la forme retenue de chaque mot.
+def fusionner_formes(comptes, normaliser_pluriels=True):
+    casses = defaultdict(dict)
+    for mot, compte in comptes.items():
+        casse = casses[mot.lower()]
+        casse[mot] = casse.get(mot, 0) + compte
+    pluriels = {}
+    if normaliser_pluriels:
+        for minuscule in list(casses):
+            if minuscule.endswith('s') and not minuscule.endswith('ss') and minuscule[:-1] in casses:
+                singulier = casses[minuscule[:-1]]
+                for mot, compte in casses.pop(minuscule).items():
+                    singulier[mot[:-1]] = singulier.get(mot[:-1], 0) + compte
+                pluriels[minuscule] = minuscule[:-1]
+    fusionnes = {}
+    formes = {}
+    for minuscule, casse in casses.items():
+        forme = max(casse.items(), key=lambda item: item[1])[0]
+        fusionnes[forme] = sum(casse.values())
+        formes[minuscule] = forme
+    for pluriel, singulier in pluriels.items():
+        formes[pluriel] = formes[singulier]
+    return fusionnes, formes
+
+
+# Fréquences des mots des noms de playlists d'un DataFrame chargé en mémoire
+def compter_mots(df, ponderation='playlist', extracteur=None):
+    comptage = ComptageMots(ponderation, extracteur)
+    comptage.ajouter(df[['pid', 'name']])
+    return comptage.frequences()
+
+
+# Matrice de corrélation des colonnes numériques d'un DataFrame chargé en mémoire
+def matrice_correlation(df):
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    return df[numeric_cols].corr()
+
+
+# Points tracés : toutes les playlists sous le seuil, sinon un échantillon uniforme ou une densité 2D.
+# Renvoie les points et l'indicateur de rendu par densité.
+def selectionner_points(points_playlists, seuil_points, rendu):
+    densite = rendu == 'densite' and len(points_playlists) > seuil_points
+    if rendu == 'echantillon' and len(points_playlists) > seuil_points:
+        echantillon = EchantillonReservoir(seuil_points)
+        echantillon.ajouter(points_playlists)
+        points_traces = echantillon.lignes
+        print(f"Pairplot et nuage de points tracés sur un échantillon de {len(points_traces)} playlists "
+              f"sur {len(points_playlists)}.")
+    else:
+        points_traces = points_playlists
+        print(f"Pairplot et nuage de points tracés sur {len(points_traces)} playlists"
+              f"{' (densité 2D)' if densite else ''}.")
+    return points_traces, densite
@@ -0,0 +1,136 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Ce module regroupe les accumulateurs utilisés par l'analyse exploratoire par blocs
+# (`analyse_exploratoire.py --par-blocs`). Chaque accumulateur reçoit les blocs un par un et
+# ne conserve qu'un résumé de taille bornée :
+# - AccumulateurMoments : effectif, moyennes et matrice des co-moments (Welford / Chan), d'où les
+#   moyennes, écarts-types et la matrice de corrélation ;
+# - ComptageValeurs : nombre d'apparitions de chaque valeur distincte, d'où les minimum, maximum,
+#   quantiles exacts et les valeurs les plus fréquentes ;
+# - EchantillonReservoir : échantillon uniforme de taille fixe des lignes, pour les graphiques point à point.
+
+#################################################################################################
+
+# Importation des bibliothèques
+import numpy as np
+import pandas as pd
+
+#################################################################################################
+
+class AccumulateurMoments:
+    def __init__(self, colonnes):
+        self.colonnes = list(colonnes)
+        self.n = 0
+        self.moyenne = np.zeros(len(self.colonnes))
+        self.comoments = np.zeros((len(self.colonnes), len(self.colonnes)))
+
+    # Fusion des moments d'un bloc avec les moments accumulés (formule de Chan et al.)
+    def ajouter(self, bloc):
+        valeurs = bloc[self.colonnes].to_numpy(dtype=np.float64)
+        nb = len(valeurs)
+        if nb == 0:
+            return
+        moyenne_bloc = valeurs.mean(axis=0)
+        centrees = valeurs - moyenne_bloc
+        comoments_bloc = centrees.T @ centrees
+
+        total = self.n + nb
+        ecart = moyenne_bloc - self.moyenne
+        self.comoments += comoments_bloc + np.outer(ecart, ecart) * (self.n * nb / total)
+        self.moyenne += ecart * (nb / total)
+        self.n = total
+
+    def ecart_type(self):
+        if self.n < 2:
+            return np.full(len(self.colonnes), np.nan)
+        return np.sqrt(np.diag(self.comoments) / (self.n - 1))
+
+    def correlation(self):
+        variances = np.sqrt(np.diag(self.comoments))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoments / np.outer(variances, variances)
+        return pd.DataFrame(correlation, index=self.colonnes, columns=self.colonnes)
+
+#################################################################################################
+
+# Comptage des valeurs distinctes d'une colonne (ou de couples de colonnes pour un DataFrame).
+# La mémoire dépend du nombre de valeurs distinctes et non du nombre de lignes.
+class ComptageValeurs:
+    def __init__(self):
+        self.comptes = None
+
+    def ajouter(self, valeurs):
+        comptes = valeurs.value_counts(sort=False, dropna=True)
+        comptes = comptes[comptes > 0]
+        if isinstance(comptes.index, pd.CategoricalIndex):
+            comptes.index = pd.Index(np.asarray(comptes.index))
+        if self.comptes is not None:
+            comptes = pd.concat([self.comptes, comptes])
+        niveaux = list(range(comptes.index.nlevels))
+        self.comptes = comptes.groupby(level=niveaux).sum().astype(np.int64)
+
+    # Comptes triés par valeur croissante
+    def serie(self):
+        if self.comptes is None:
+            return pd.Series(dtype=np.int64)
+        return self.comptes
+
+    def total(self):
+        return int(self.serie().sum())
+
+    # Quantile à interpolation linéaire, comme pandas.Series.quantile
+    def quantile(self, q):
+        comptes = self.serie()
+        if comptes.empty:
+            return np.nan
+        valeurs = comptes.index.to_numpy(dtype=np.float64)
+        cumul = comptes.to_numpy().cumsum()
+        position = (cumul[-1] - 1) * q
+        bas, haut = int(np.floor(position)), int(np.ceil(position))
+        valeur_bas = valeurs[np.searchsorted(cumul, bas, side='right')]
+        valeur_haut = valeurs[np.searchsorted(cumul, haut, side='right')]
+        return valeur_bas + (position - bas) * (valeur_haut - valeur_bas)
+
+#################################################################################################
+
+# Échantillon uniforme de `taille` lignes : chaque ligne reçoit une clé aléatoire et seules
+# les plus petites clés sont conservées d'un bloc à l'autre.
+class EchantillonReservoir:
+    def __init__(self, taille, graine=0):
+        self.taille = taille
+        self.rng = np.random.default_rng(graine)
+        self.lignes = None
+        self.cles = np.empty(0)
+
+    def ajouter(self, bloc):
+        cles = self.rng.random(len(bloc))
+        if self.lignes is not None:
+            bloc = pd.concat([self.lignes, bloc], ignore_index=True)
+            cles = np.concatenate([self.cles, cles])
+        else:
+            bloc = bloc.reset_index(drop=True)
+        if len(cles) > self.taille:
+            gardees = np.sort(np.argpartition(cles, self.taille)[:self.taille])
+            bloc, cles = bloc.iloc[gardees].reset_index(drop=True), cles[gardees]
+        self.lignes, self.cles = bloc, cles
+
+#################################################################################################
+
+# Tableau équivalent à DataFrame.describe() à partir des accumulateurs
+def decrire(moments, comptages):
+    ecarts_types = moments.ecart_type()
+    resume = {}
+    for i, col in enumerate(moments.colonnes):
+        comptage = comptages[col]
+        resume[col] = [
+            float(comptage.total()), moments.moyenne[i], ecarts_types[i],
+            float(comptage.serie().index.min()), comptage.quantile(0.25), comptage.quantile(0.5),
+            comptage.quantile(0.75), float(comptage.serie().index.max()),
+        ]
+    return pd.DataFrame(resume, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
@@ -0,0 +1,20 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Configuration des tests (python -m pytest depuis la racine du projet) : les modules du projet et
+# le générateur de slices synthétiques (`benchmarks/generer_slices.py`) sont importables directement.
+
+#################################################################################################
+
+import os
+import sys
+
+racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for chemin in (racine, os.path.join(racine, 'benchmarks')):
+    if chemin not in sys.path:
+        sys.path.insert(0, chemin)
@@ -0,0 +1,65 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Le mode approché (`agregation_playlists.agreger_playlists_approche`) doit donner une ligne par playlist
+# (name, pid), comme le mode exact, même quand une playlist a des lignes dans plusieurs slices.
+
+#################################################################################################
+
+import json
+import numpy as np
+
+from generer_slices import generer_slices
+from nettoyage import ExecutionNettoyage, lister_slices, nettoyage_complet, terminer_nettoyage
+from instrumentation import Instrumentation
+from chargement_donnees import charger_donnees_nettoyees
+from agregation_playlists import (agreger_playlists, agreger_playlists_approche, COLONNES_PREMIERES,
+                                  COLONNES_DISTINCTES, COLONNES_SKETCHES)
+
+
+# Réémission dans la seconde slice de playlists de la première, avec une piste de plus : seule cette
+# piste survit au dédoublonnage, la playlist a donc des lignes dans les deux slices
+def reemettre_avec_une_piste(premiere, seconde, nb_playlists=20):
+    with open(premiere, encoding='utf-8') as f:
+        playlists = json.load(f)['playlists'][:nb_playlists]
+    with open(seconde, encoding='utf-8') as f:
+        contenu = json.load(f)
+    for playlist in playlists:
+        piste = dict(playlist['tracks'][0], pos=len(playlist['tracks']),
+                     track_uri=f"spotify:track:reemise{playlist['pid']}",
+                     album_name=f"album réémis {playlist['pid']}", artist_name=f"artiste réémis {playlist['pid']}")
+        playlist['tracks'].append(piste)
+    contenu['playlists'].extend(playlists)
+    with open(seconde, 'w', encoding='utf-8') as f:
+        json.dump(contenu, f)
+    return [playlist['pid'] for playlist in playlists]
+
+
+def test_playlist_repartie_sur_plusieurs_slices(tmp_path):
+    generer_slices(str(tmp_path), 400, taille_slice=200, taux_doublons=0)
+    fichiers = lister_slices(str(tmp_path))
+    pids = reemettre_avec_une_piste(fichiers[0], fichiers[1])
+    execution = ExecutionNettoyage(str(tmp_path), Instrumentation(), indexer=False, classer=False, cuber=False)
+    terminer_nettoyage(execution, nettoyage_complet(fichiers, execution, 0))
+
+    df = charger_donnees_nettoyees(['name', 'pid', 'slice'] + COLONNES_PREMIERES + list(COLONNES_DISTINCTES),
+                                   str(tmp_path))
+    assert (df[df['pid'].isin(pids)].groupby('pid')['slice'].nunique() == 2).all()
+    exact = agreger_playlists(df)
+    approche, sketches = agreger_playlists_approche(0.01, str(tmp_path))
+
+    assert len(approche) == len(exact)
+    assert (approche['name'].astype(str).to_numpy() == exact['name'].astype(str).to_numpy()).all()
+    assert (approche['pid'].to_numpy() == exact['pid'].to_numpy()).all()
+    for col in COLONNES_PREMIERES:
+        assert (approche[col].to_numpy() == exact[col].to_numpy()).all()
+    for col, nom_sortie in COLONNES_SKETCHES.items():
+        assert len(sketches[col]) == len(exact)
+        # Quelques centaines de valeurs au plus par playlist : l'estimation est quasi exacte
+        ecarts = np.abs(approche[nom_sortie].to_numpy() - exact[nom_sortie].to_numpy())
+        assert (ecarts <= np.maximum(1, 0.03 * exact[nom_sortie].to_numpy())).all()
@@ -0,0 +1,54 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Les valeurs observées des intervalles bootstrap (`analyse_dispersion_bootstrap.csv`) doivent être celles
+# des statistiques par playlist (`analyse_dispersion_resultats.csv`), y compris avec des playlists sans
+# artiste : elles comptent dans le pourcentage de playlists avec plus d'albums, pas dans le ratio moyen.
+
+#################################################################################################
+
+import os
+import types
+import numpy as np
+import pandas as pd
+
+from pipeline import etape_analyse_dispersion
+from statistiques_dispersion import ajouter_ratios
+
+
+def playlists(nb=3000, graine=0):
+    rng = np.random.default_rng(graine)
+    artistes = rng.integers(1, 60, nb)
+    stats = pd.DataFrame({
+        'name': 'playlist', 'pid': np.arange(nb), 'num_tracks': rng.integers(5, 250, nb),
+        'artistes_uniques_reels': artistes,
+        'albums_uniques_reels': np.maximum(artistes + rng.integers(-5, 8, nb), 0),
+    })
+    # Playlists sans artiste, avec ou sans album, dans toutes les catégories de taille
+    sans_artiste = rng.random(nb) < 0.05
+    stats.loc[sans_artiste, 'artistes_uniques_reels'] = 0
+    stats.loc[sans_artiste & (rng.random(nb) < 0.5), 'albums_uniques_reels'] = 0
+    return ajouter_ratios(stats)
+
+
+def test_valeurs_observees_comme_les_resultats(tmp_path):
+    pipeline = types.SimpleNamespace(dossier=str(tmp_path),
+                                     parametres={'resamples': 200, 'niveau': 0.95, 'graine': 0, 'workers': 1})
+    sortie = etape_analyse_dispersion(pipeline, {'caracteristiques_playlists': {'playlists_stats': playlists()}})
+    resultats = pd.read_csv(os.path.join(tmp_path, 'analyse_dispersion_resultats.csv'))
+    bootstrap = pd.read_csv(os.path.join(tmp_path, 'analyse_dispersion_bootstrap.csv'), index_col='categorie_taille')
+
+    assert np.isclose(bootstrap.loc['Total', 'pct_plus_albums'], sortie['resultats']['pct_plus_albums'])
+    groupes = [('Total', resultats)] + [(str(nom), groupe) for nom, groupe in resultats.groupby('categorie_taille')]
+    for nom, groupe in groupes:
+        assert bootstrap.loc[nom, 'nb_playlists'] == len(groupe)
+        assert np.isclose(bootstrap.loc[nom, 'pct_plus_albums'], (groupe['diff_albums_artistes'] > 0).mean() * 100)
+        definis = groupe[groupe['artistes_uniques_reels'] > 0]
+        assert np.isclose(bootstrap.loc[nom, 'ratio_moyen'], definis['ratio_albums_artistes'].mean())
+        assert bootstrap.loc[nom, 'pct_plus_albums_bas'] <= bootstrap.loc[nom, 'pct_plus_albums'] \
+            <= bootstrap.loc[nom, 'pct_plus_albums_haut']
@@ -0,0 +1,117 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Le dédoublonnage du nettoyage (`deduplication.py`) garde la première occurrence de chaque clé
+# (pid, pos, track_uri), dans un lot comme d'un lot à l'autre, quelle que soit la fusion des blocs triés
+# de l'ensemble des hachages vus, même quand les autres colonnes diffèrent : c'est là qu'il s'écarte de
+# df.drop_duplicates() sur toutes les colonnes.
+
+#################################################################################################
+
+import numpy as np
+import pandas as pd
+
+import nettoyage
+from deduplication import CLE_IDENTITE, EnsembleHachages, hacher_identite, premieres_occurrences
+from instrumentation import Instrumentation
+
+
+# Pistes dont une partie est répétée, dans le même lot ou dans un lot suivant : à l'identique, ou avec
+# la même clé mais d'autres `modified_at` et `num_followers` (playlist réémise). D'autres lignes ne
+# diffèrent que par une composante de la clé.
+def pistes(nb_lignes=5000, graine=0):
+    rng = np.random.default_rng(graine)
+    df = pd.DataFrame({
+        'pid': rng.integers(0, 50, nb_lignes),
+        'pos': rng.integers(0, 30, nb_lignes),
+        'track_uri': [f'spotify:track:{i}' for i in rng.integers(0, 20, nb_lignes)],
+    })
+    df['name'] = 'playlist ' + df['pid'].astype(str)
+    df['track_name'] = 'titre ' + df['track_uri'].str.rsplit(':', n=1).str[-1]
+    reemises = rng.random(nb_lignes) < 0.5
+    df['modified_at'] = 1_500_000_000 + df['pid'] * 1000 + reemises * rng.integers(1, 4, nb_lignes)
+    df['num_followers'] = np.where(reemises, rng.integers(0, 100, nb_lignes), 1)
+    return df
+
+
+# Première occurrence de chaque clé : le résultat attendu, différent de df.drop_duplicates()
+def attendu_par_cle(df):
+    attendu = df.drop_duplicates(CLE_IDENTITE, keep='first')
+    assert len(attendu) < len(df.drop_duplicates())
+    return attendu
+
+
+def test_hachage_distingue_les_composantes_de_la_cle():
+    df = pd.DataFrame({'pid': [1, 12, 1, 1], 'pos': [23, 3, 23, 23], 'track_uri': ['a', 'a', 'b', 'a']})
+    hachages = hacher_identite(df)
+    assert len(set(hachages[:3].tolist())) == 3
+    assert hachages[0] == hachages[3]
+    # Les autres colonnes n'entrent pas dans la clé
+    assert (hacher_identite(df.assign(name='x')) == hachages).all()
+
+
+def test_premieres_occurrences_par_cle():
+    df = pistes()
+    garder = premieres_occurrences(hacher_identite(df))
+    assert df[garder].index.equals(attendu_par_cle(df).index)
+    # Une ligne de même clé qu'une précédente mais d'autres colonnes différentes est retirée
+    assert (~garder & ~df.duplicated().to_numpy()).any()
+
+
+def test_lots_successifs_comme_la_table_complete():
+    df = pistes()
+    ensemble = EnsembleHachages()
+    gardes = []
+    # Lots de tailles variées : les blocs de l'ensemble sont fusionnés à des moments différents
+    bornes = [0, 7, 300, 301, 1200, 1250, 3000, 3001, 4999, 5000]
+    for debut, fin in zip(bornes, bornes[1:]):
+        lot = df.iloc[debut:fin]
+        gardes.append(lot[ensemble.filtrer(hacher_identite(lot))])
+    resultat = pd.concat(gardes)
+    attendu = attendu_par_cle(df)
+    assert resultat.index.equals(attendu.index)
+    assert resultat.equals(attendu)
+    assert len(ensemble) == len(attendu)
+
+
+def test_fusion_des_blocs_tries():
+    rng = np.random.default_rng(1)
+    ensemble = EnsembleHachages()
+    vus = set()
+    for taille in [1, 2, 3, 100, 5, 5, 5, 400, 1, 60, 60, 60, 1000]:
+        hachages = rng.integers(0, 3000, taille).astype(np.uint64)
+        ensemble.ajouter(hachages)
+        vus.update(hachages.tolist())
+        # Blocs triés, sans doublon interne, de tailles plus que doublées d'un bloc au précédent
+        for bloc in ensemble.blocs:
+            assert (np.diff(bloc.astype(np.int64)) > 0).all()
+        for precedent, suivant in zip(ensemble.blocs, ensemble.blocs[1:]):
+            assert len(precedent) > 2 * len(suivant)
+        tous = np.arange(3000, dtype=np.uint64)
+        assert (ensemble.contient(tous) == np.isin(tous, np.fromiter(vus, dtype=np.uint64))).all()
+
+
+def test_clef_repetee_dans_un_lot_et_deja_vue():
+    ensemble = EnsembleHachages(np.array([5, 9], dtype=np.uint64))
+    hachages = np.array([7, 5, 7, 8, 9, 8, 7], dtype=np.uint64)
+    garder = ensemble.filtrer(hachages)
+    assert garder.tolist() == [True, False, False, True, False, False, False]
+    assert ensemble.filtrer(np.array([7, 8, 10], dtype=np.uint64)).tolist() == [False, False, True]
+
+
+def test_collision_de_hachage(monkeypatch):
+    # Deux clés différentes de même hachage sont confondues : seule la première est gardée. C'est la
+    # limite assumée du hachage 64 bits (probabilité ~1e-4 sur tout le MPD), documentée dans deduplication.py.
+    # La collision est forcée en ne hachant que le pid.
+    monkeypatch.setattr(nettoyage, 'hacher_identite', lambda df: hacher_identite(df, ['pid']))
+    df = pd.DataFrame({'pid': [3, 3, 4, 3], 'pos': [0, 1, 0, 0], 'track_uri': ['a', 'b', 'a', 'a'],
+                       'modified_at': 1_500_000_000})
+    resultat, compteurs = nettoyage.nettoyer(df, Instrumentation())
+    assert resultat['pos'].tolist() == [0, 0]
+    assert resultat['pid'].tolist() == [3, 4]
+    assert compteurs['lignes_sans_doublons'] == 2
@@ -0,0 +1,154 @@
+# Membres du groupe :
+# Hugo HOUNTONDJI
+# LO Maty
+# HU Angel
+# PASINI Georgio
+
+#################################################################################################
+
+# Le nettoyage incrémental (`nettoyage.py --incremental`) doit produire les mêmes sorties qu'une
+# reconstruction complète, y compris quand une slice modifiée ou supprimée change les doublons retirés
+# dans les slices suivantes (playlists réémises d'une slice à l'autre par le générateur), en ne retraitant
+# parmi les slices inchangées que celles qui partagent des clés avec une slice modifiée.
+
+#################################################################################################
+
+import os
+import json
+import shutil
+import numpy as np
+import pytest
+
+from generer_slices import generer_slices
+from nettoyage import (ExecutionNettoyage, lister_slices, nettoyage_complet, nettoyage_incremental,
+                       terminer_nettoyage)
+from instrumentation import Instrumentation
+from classements_frequents import ClassementsMensuels
+from cube_dispersion import CubeDispersion
+
+
+def nettoyer(dossier, incremental):
+    execution = ExecutionNettoyage(str(dossier), Instrumentation(), indexer=False)
+    fichiers = lister_slices(str(dossier))
+    if incremental:
+        colonnes = nettoyage_incremental(fichiers, execution, 0)
+    else:
+        colonnes = nettoyage_complet(fichiers, execution, 0)
+    terminer_nettoyage(execution, colonnes)
+
+
+def lire_csv(dossier):
+    with open(os.path.join(dossier, 'alcrowd_cleaned.csv'), 'rb') as f:
+        return f.read()
+
+
+# Retrait, dans une slice, des playlists que la slice suivante réémet : leurs lignes ne sont plus des
+# doublons dans la slice suivante
+def retirer_playlists_reemises(slice_modifiee, slice_suivante):
+    with open(slice_suivante, encoding='utf-8') as f:
+        reemises = {playlist['pid'] for playlist in json.load(f)['playlists']}
+    with open(slice_modifiee, encoding='utf-8') as f:
+        contenu = json.load(f)
+    avant = len(contenu['playlists'])
+    contenu['playlists'] = [playlist for playlist in contenu['playlists'] if playlist['pid'] not in reemises]
+    assert len(contenu['playlists']) < avant
+    with open(slice_modifiee, 'w', encoding='utf-8') as f:
+        json.dump(contenu, f, indent=2)
+
+
+@pytest.mark.parametrize('modification, indice', [('modifiee', 0), ('modifiee', 1), ('supprimee', 1)])
+def test_incremental_identique_reconstruction_complete(tmp_path, modification, indice):
+    incremental, complet = tmp_path / 'incremental', tmp_path / 'complet'
+    incremental.mkdir()
+    complet.mkdir()
+    generer_slices(str(incremental), 1000, taille_slice=200, taux_doublons=0.05)
+    nettoyer(incremental, incremental=True)
+
+    fichiers = lister_slices(str(incremental))
+    if modification == 'modifiee':
+        retirer_playlists_reemises(fichiers[indice], fichiers[indice + 1])
+    else:
+        os.remove(fichiers[indice])
+    nettoyer(incremental, incremental=True)
+
+    for chemin in lister_slices(str(incremental)):
+        shutil.copy(chemin, complet)
+    nettoyer(complet, incremental=False)
+
+    assert lire_csv(incremental) == lire_csv(complet)
+
+    # Classements et cube : mêmes slices comptées, mêmes résumés et mêmes agrégats
+    classements = [ClassementsMensuels.charger(os.path.join(dossier, 'classements'))
+                   for dossier in (incremental, complet)]
+    assert sorted(classements[0].slices) == sorted(classements[1].slices)
+    for col in classements[0].colonnes:
+        assert classements[0].mois == classements[1].mois
+        for m in classements[0].mois:
+            resumes = [c.resumes[col][m] for c in classements]
+            assert resumes[0].comptes.sort_index().equals(resumes[1].comptes.sort_index())
+            assert (resumes[0].n, resumes[0].delta) == (resumes[1].n, resumes[1].delta)
+    cubes = [CubeDispersion.charger(os.path.join(dossier, 'cube')) for dossier in (incremental, complet)]
+    assert sorted(cubes[0].slices) == sorted(cubes[1].slices)
+    assert cubes[0].cellules.index.equals(cubes[1].cellules.index)
+    np.testing.assert_allclose(cubes[0].cellules.to_numpy(), cubes[1].cellules.to_numpy(), rtol=1e-12)
+    for col in cubes[0].sketches:
+        assert (cubes[0].sketches[col].registres == cubes[1].sketches[col].registres).all()
+
+
+# Sans modification, aucune slice n'est retraitée ; des slices ajoutées en fin de corpus sont les seules traitées
+def test_incremental_ajout_en_fin(tmp_path, capsys):
+    dossier = tmp_path / 'alcrowd'
+    dossier.mkdir()
+    generer_slices(str(dossier), 600, taille_slice=200, taux_doublons=0.05)
+    nettoyer(dossier, incremental=True)
+    capsys.readouterr()
+    nettoyer(dossier, incremental=True)
+    sortie = capsys.readouterr().out
+    assert "0 slice(s) nouvelle(s)" in sortie and "0 slice(s) inchangée(s) retraitée(s)" in sortie
+
+    # Une slice supplémentaire, copie décalée de la dernière (mêmes pistes, autres pid)
+    derniere = lister_slices(str(dossier))[-1]
+    with open(derniere, encoding='utf-8') as f:
+        contenu = json.load(f)
+    for playlist in contenu['playlists']:
+        playlist['pid'] += 600
+    with open(os.path.join(dossier, 'mpd.slice.600-799.json'), 'w', encoding='utf-8') as f:
+        json.dump(contenu, f)
+    nettoyer(dossier, incremental=True)
+    assert "1 slice(s) nouvelle(s)" in capsys.readouterr().out
+
+    complet = tmp_path / 'complet'
+    complet.mkdir()
+    for chemin in lister_slices(str(dossier)):
+        shutil.copy(chemin, complet)
+    nettoyer(complet, incremental=False)
+    assert lire_csv(dossier) == lire_csv(complet)
+
+
+# Une slice modifiée au début du corpus ne fait retraiter que les slices qui partagent des clés avec elle :
+# ici la suivante, qui réémet certaines de ses playlists. Les partitions des autres slices ne sont pas réécrites.
+def test_incremental_ne_retraite_que_les_slices_concernees(tmp_path, capsys):
+    dossier, complet = tmp_path / 'alcrowd', tmp_path / 'complet'
+    dossier.mkdir()
+    complet.mkdir()
+    generer_slices(str(dossier), 1000, taille_slice=200, taux_doublons=0.05)
+    nettoyer(dossier, incremental=True)
+    fichiers = lister_slices(str(dossier))
+    partitions = [os.path.join(dossier, 'partitions', os.path.basename(chemin)[:-len('.json')] + '.csv')
+                  for chemin in fichiers]
+    avant = [os.stat(chemin).st_mtime_ns for chemin in partitions]
+
+    retirer_playlists_reemises(fichiers[0], fichiers[1])
+    capsys.readouterr()
+    nettoyer(dossier, incremental=True)
+    sortie = capsys.readouterr().out
+    assert "1 slice(s) nouvelle(s) ou modifiée(s)" in sortie
+    assert "1 slice(s) inchangée(s) retraitée(s)" in sortie
+    apres = [os.stat(chemin).st_mtime_ns for chemin in partitions]
+    assert apres[0] != avant[0] and apres[1] != avant[1]
+    assert apres[2:] == avant[2:]
+
+    for chemin in fichiers:
+        shutil.copy(chemin, complet)
+    nettoyer(complet, incremental=False)
+    assert lire_csv(dossier) == lire_csv(complet)